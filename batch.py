@@ -0,0 +1,131 @@
+"""Batch mode: run the digest for many accounts in one process.
+
+The batch config is a JSON file listing accounts and the settings that
+differ between them, on top of shared ``defaults``::
+
+    {
+      "defaults": {"MODEL_ID": "gpt-4o-mini",
+                   "SYNC_CHECKPOINT_PATH": "/data/{account}/checkpoint.db"},
+      "accounts": [
+        {"name": "team-a", "NEWSBLUR_USERNAME": "a",
+         "NEWSBLUR_PASSWORD": "${TEAM_A_PASSWORD}",
+         "SLACK_WEBHOOK_URL": "https://hooks.slack.com/services/..."}
+      ]
+    }
+
+Settings use the same names as the environment variables of a single run and
+fall back to the environment. ``${VAR}`` is expanded from the environment so
+secrets can stay out of the file, and ``{account}`` becomes the account name
+so per-account state files do not collide.
+"""
+import json
+import logging
+import os
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable
+
+
+@dataclass
+class Account:
+    name: str
+    settings: dict[str, str]
+
+
+@dataclass
+class AccountResult:
+    name: str
+    ok: bool
+    seconds: float
+
+
+def load_batch_config(path: str) -> list[Account]:
+    """Read the accounts in the batch config at ``path``; raises ValueError if invalid."""
+    with open(path, encoding="utf-8") as f:
+        try:
+            config = json.load(f)
+        except ValueError as e:
+            raise ValueError(f"Batch config {path} is not valid JSON: {e}")
+    if not isinstance(config, dict):
+        raise ValueError(f"Batch config {path} must be a JSON object")
+    defaults = config.get("defaults") or {}
+    if not isinstance(defaults, dict):
+        raise ValueError(f"Batch config {path} defaults must be an object")
+    entries = config.get("accounts") or []
+    if not isinstance(entries, list):
+        raise ValueError(f"Batch config {path} accounts must be a list")
+    accounts = []
+    names = set()
+    for entry in entries:
+        if not isinstance(entry, dict):
+            raise ValueError(f"Batch account {entry!r} must be an object")
+        name = entry.get("name")
+        if not name or not isinstance(name, str):
+            raise ValueError("Every batch account needs a name")
+        if name in names:
+            raise ValueError(f"Duplicate batch account name {name!r}")
+        names.add(name)
+        settings = {}
+        for key, value in {**defaults, **entry}.items():
+            if key == "name":
+                continue
+            if isinstance(value, bool):
+                value = "true" if value else "false"
+            settings[key] = os.path.expandvars(str(value)).replace("{account}", name)
+        accounts.append(Account(name, settings))
+    if not accounts:
+        raise ValueError(f"Batch config {path} lists no accounts")
+    return accounts
+
+
+def shard_accounts(accounts: list[Account], shard_index: int, shard_count: int) -> list[Account]:
+    """Return this worker's share of ``accounts``.
+
+    Accounts are assigned by a stable hash of their name, so every worker
+    agrees on the split without coordinating and adding an account does not
+    move the others.
+    """
+    if shard_count <= 1:
+        return list(accounts)
+    if not 0 <= shard_index < shard_count:
+        raise ValueError(f"Shard index {shard_index} is outside 0..{shard_count - 1}")
+    return [
+        account
+        for account in accounts
+        if zlib.crc32(account.name.encode("utf-8")) % shard_count == shard_index
+    ]
+
+
+def run_accounts(
+    accounts: list[Account], run: Callable[[Account], bool], concurrency: int
+) -> list[AccountResult]:
+    """Run ``run`` for every account with at most ``concurrency`` at a time.
+
+    ``run`` returns whether the account's digest succeeded; raising counts
+    as a failure. A failing account is logged and reported but does not stop
+    the others. Results are returned in account order.
+    """
+
+    def run_one(account: Account) -> AccountResult:
+        start = time.perf_counter()
+        logging.info(f"Starting digest for account {account.name}")
+        try:
+            ok = run(account)
+        except Exception as e:
+            logging.error(f"Digest for account {account.name} failed: {e}")
+            return AccountResult(account.name, False, time.perf_counter() - start)
+        seconds = time.perf_counter() - start
+        if not ok:
+            logging.error(f"Digest for account {account.name} failed after {seconds:.1f}s")
+            return AccountResult(account.name, False, seconds)
+        logging.info(f"Finished digest for account {account.name} in {seconds:.1f}s")
+        return AccountResult(account.name, True, seconds)
+
+    if not accounts:
+        return []
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(concurrency, len(accounts))), thread_name_prefix="account"
+    ) as executor:
+        return list(executor.map(run_one, accounts))
@@ -0,0 +1,58 @@
+"""Micro-benchmark: streaming extractor vs. the previous BeautifulSoup path.
+
+Run from the repository root:
+
+    python benchmarks/bench_clean_html.py [--repeat N] [--limit CHARS]
+
+Each fixture page is also inflated to a large document to show the effect of
+stopping once the character budget is reached.
+"""
+import argparse
+import glob
+import os
+import sys
+import timeit
+
+from bs4 import BeautifulSoup
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from extract import extract_text  # noqa: E402
+
+FIXTURES = os.path.join(ROOT, "tests", "fixtures", "pages")
+# Matches main.MAX_CONTENT_LENGTH
+DEFAULT_LIMIT = 3000
+
+
+def bs4_text(html: str, limit: int) -> str:
+    return BeautifulSoup(html, "html.parser").get_text()[:limit]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT)
+    args = parser.parse_args()
+
+    documents = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURES, "*.html"))):
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        name = os.path.basename(path)
+        documents[name] = html
+        documents[f"{name} x50"] = html * 50
+
+    print(f"{'document':<28} {'bytes':>9} {'bs4 ms':>9} {'stream ms':>10} {'speedup':>8}")
+    for name, html in documents.items():
+        assert extract_text(html, args.limit) == bs4_text(html, args.limit), name
+        bs4_s = timeit.timeit(lambda: bs4_text(html, args.limit), number=args.repeat)
+        stream_s = timeit.timeit(lambda: extract_text(html, args.limit), number=args.repeat)
+        print(
+            f"{name:<28} {len(html):>9} {bs4_s / args.repeat * 1000:>9.3f} "
+            f"{stream_s / args.repeat * 1000:>10.3f} {bs4_s / stream_s:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
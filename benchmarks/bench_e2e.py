@@ -0,0 +1,153 @@
+"""End-to-end benchmark of main() against local stand-in servers.
+
+Run from the repository root:
+
+    python benchmarks/bench_e2e.py [--feeds 10 100 1000] [--newsblur-latency S] ...
+
+For every feed count a stand-in NewsBlur/page/OpenAI/Slack server is started
+(tests/standins.py) and the real pipeline runs in a fresh interpreter so peak
+RSS is measured per run. Each pipeline stage is timed by wrapping the
+corresponding function in main. Pipeline options (FETCH_MODE,
+FETCH_CONCURRENCY, PIPELINED, PRECOMPRESS_TOKENS, PAGE_CACHE_PATH, ...) are
+taken from the environment.
+Add --json to print machine-readable results for tracking across releases.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "tests"))
+
+from standins import StandInConfig, StandInServer  # noqa: E402
+
+STAGES = (
+    "connect_newsblur",
+    "select_feeds_to_fetch",
+    "fetch_all_feed_stories",
+    "fetch_river_stories",
+    "fetch_fallback_content",
+    "run_pipelined",
+    "precompress_stories",
+    "summarize_stories",
+    "send_to_slack",
+    "mark_stories_as_read",
+)
+
+
+def run_child() -> None:
+    """Run main.main() once with stage timers and print the results as JSON."""
+    import resource
+
+    start = time.perf_counter()
+    import main
+
+    import_s = time.perf_counter() - start
+    timings: dict[str, float] = {}
+    stories = {"count": 0}
+
+    def timed(name, fn):
+        def wrapper(*args, **kwargs):
+            t = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                timings[name] = timings.get(name, 0.0) + time.perf_counter() - t
+        return wrapper
+
+    for name in STAGES:
+        setattr(main, name, timed(name, getattr(main, name)))
+    summarize = main.summarize_stories
+
+    def counting_summarize(feeds, *args, **kwargs):
+        stories["count"] += sum(len(feed.stories) for feed in feeds)
+        return summarize(feeds, *args, **kwargs)
+
+    main.summarize_stories = counting_summarize
+
+    run_start = time.perf_counter()
+    main.main()
+    total_s = time.perf_counter() - run_start
+    print(json.dumps({
+        "import_s": import_s,
+        "total_s": total_s,
+        "stages": timings,
+        "stories": stories["count"],
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }))
+
+
+def run_sweep(args) -> list[dict]:
+    results = []
+    for feeds in args.feeds:
+        config = StandInConfig(
+            feeds=feeds,
+            stories_per_feed=args.stories_per_feed,
+            content_chars=args.content_chars,
+            short_content_ratio=args.short_ratio,
+            page_bytes=args.page_bytes,
+            newsblur_latency=args.newsblur_latency,
+            page_latency=args.page_latency,
+            openai_latency=args.openai_latency,
+            slack_latency=args.slack_latency,
+        )
+        with StandInServer(config) as server:
+            env = {**os.environ, **server.env()}
+            out = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child"],
+                cwd=ROOT,
+                env=env,
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+            result = json.loads(out.strip().splitlines()[-1])
+            result["feeds"] = feeds
+            result["requests"] = dict(server.requests)
+        results.append(result)
+    return results
+
+
+def print_table(results: list[dict]) -> None:
+    stages = [s for s in STAGES if any(s in r["stages"] for r in results)]
+    header = f"{'feeds':>6} {'total s':>8} {'stories/s':>9} {'RSS MB':>7}"
+    header += "".join(f" {s[:14]:>14}" for s in stages)
+    print(header)
+    for r in results:
+        throughput = r["stories"] / r["total_s"] if r["total_s"] else 0.0
+        line = f"{r['feeds']:>6} {r['total_s']:>8.2f} {throughput:>9.1f} {r['peak_rss_mb']:>7.1f}"
+        line += "".join(f" {r['stages'].get(s, 0.0):>14.3f}" for s in stages)
+        print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--feeds", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--stories-per-feed", type=int, default=5)
+    parser.add_argument("--content-chars", type=int, default=1500)
+    parser.add_argument("--short-ratio", type=float, default=0.2)
+    parser.add_argument("--page-bytes", type=int, default=20_000)
+    parser.add_argument("--newsblur-latency", type=float, default=0.02)
+    parser.add_argument("--page-latency", type=float, default=0.05)
+    parser.add_argument("--openai-latency", type=float, default=0.5)
+    parser.add_argument("--slack-latency", type=float, default=0.02)
+    parser.add_argument("--json", action="store_true", help="print raw results as JSON")
+    args = parser.parse_args()
+
+    if args.child:
+        run_child()
+        return
+    results = run_sweep(args)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Tokens saved per page by main-content extraction on the fixture corpus.
+
+Run from the repository root:
+
+    python benchmarks/bench_main_content.py [--limit CHARS] [DIR]
+
+For every saved page, compares the full page text against the main article
+text, both truncated to the prompt budget the way fetch_webpage does. Token
+counts use the ~4 characters per token estimate main.estimate_tokens falls back
+to without tiktoken.
+"""
+import argparse
+import glob
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from extract import extract_main_text, extract_text  # noqa: E402
+
+FIXTURES = os.path.join(ROOT, "tests", "fixtures", "pages")
+# Matches main.MAX_CONTENT_LENGTH
+DEFAULT_LIMIT = 3000
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("directory", nargs="?", default=FIXTURES)
+    parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT)
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.directory, "*.html")))
+    total_full = total_main = 0
+    print(f"{'page':<28} {'full tok':>9} {'main tok':>9} {'saved':>7}")
+    for path in paths:
+        with open(path, encoding="utf-8", errors="ignore") as f:
+            html = f.read()
+        full = " ".join(extract_text(html).split())[: args.limit]
+        main_text = extract_main_text(html) or full
+        main_text = main_text[: args.limit]
+        full_tokens, main_tokens = estimate_tokens(full), estimate_tokens(main_text)
+        total_full += full_tokens
+        total_main += main_tokens
+        saved = 1 - main_tokens / full_tokens
+        print(f"{os.path.basename(path):<28} {full_tokens:>9} {main_tokens:>9} {saved:>6.0%}")
+    if paths:
+        print(
+            f"{'mean per page':<28} {total_full / len(paths):>9.0f} "
+            f"{total_main / len(paths):>9.0f} {1 - total_main / total_full:>6.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Peak memory of story ingestion as the NewsBlur payload grows.
+
+Run from the repository root:
+
+    python benchmarks/bench_memory.py [--stories 100 1000 4000] [--content-chars N]
+
+For every payload size a stand-in NewsBlur server (tests/standins.py) serves
+one feed with that many unread stories, and ``fetch_feed_stories`` runs in a
+fresh interpreter so peak RSS is measured per run, over the same NewsBlur
+session the pipeline uses. The ``json`` column loads
+the same response with ``response.json()`` for comparison, which is what
+ingestion did before it parsed the stories array incrementally. Streamed
+ingestion should stay flat however large the payload gets.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "tests"))
+
+from standins import StandInConfig, StandInServer  # noqa: E402
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss of a child starts at the parent's peak on Linux, and the parent
+    # holds the stand-in's payloads; VmHWM is reset when the child execs
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_child(mode: str) -> None:
+    """Ingest feed 0 once and print timings and RSS as JSON."""
+    import main
+    from models import Feed
+
+    # The pipeline's own session, so its response hooks are measured too
+    session = main.create_newsblur_session()
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    if mode == "stream":
+        stories = main.fetch_feed_stories(session, Feed("0", "Feed 0"), fetch_fallback=False)
+    else:
+        response = session.get(
+            f"{main.NEWSBLUR_URL}/reader/feed/0", timeout=main.DEFAULT_TIMEOUT
+        )
+        raw_stories = response.json()["stories"][:main.MAX_STORIES]
+        stories = [main.parse_story(raw, fetch_fallback=False) for raw in raw_stories]
+    print(json.dumps({
+        "seconds": time.perf_counter() - start,
+        "stories": len(stories),
+        "baseline_rss_mb": baseline,
+        "peak_rss_mb": peak_rss_mb(),
+    }))
+
+
+def measure(server: StandInServer, mode: str) -> dict:
+    out = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", mode],
+        cwd=ROOT,
+        env={**os.environ, **server.env()},
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--child", choices=("stream", "json"), help=argparse.SUPPRESS)
+    parser.add_argument("--stories", type=int, nargs="+", default=[100, 1000, 4000])
+    parser.add_argument("--content-chars", type=int, default=10_000)
+    parser.add_argument("--json", action="store_true", help="print raw results as JSON")
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child)
+        return
+    results = []
+    for count in args.stories:
+        config = StandInConfig(
+            feeds=1,
+            stories_per_feed=count,
+            content_chars=args.content_chars,
+            short_content_ratio=0,
+        )
+        with StandInServer(config) as server:
+            payload_mb = len(json.dumps({"stories": server.unread(0)})) / 1e6
+            results.append({
+                "stories": count,
+                "payload_mb": payload_mb,
+                "stream": measure(server, "stream"),
+                "json": measure(server, "json"),
+            })
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'stories':>8} {'payload MB':>10} {'stream RSS MB':>13} {'json RSS MB':>11} "
+          f"{'stream s':>8} {'json s':>7}")
+    for r in results:
+        print(
+            f"{r['stories']:>8} {r['payload_mb']:>10.1f} "
+            f"{r['stream']['peak_rss_mb']:>13.1f} {r['json']['peak_rss_mb']:>11.1f} "
+            f"{r['stream']['seconds']:>8.3f} {r['json']['seconds']:>7.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Import-time and cold-start benchmark for main.py.
+
+Run from the repository root:
+
+    python benchmarks/bench_startup.py [--runs N] [--max-import-ms MS]
+
+Each measurement runs in a fresh interpreter. "cold start" is a full
+``main.main()`` call that exits early on missing configuration, which is the
+fixed cost every container run pays before doing any work. With
+``--max-import-ms`` the script exits non-zero when the median import time
+exceeds the budget, so it can guard against regressions in CI.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"
+COLD_START_SNIPPET = (
+    "import time; t = time.perf_counter(); import main; main.main(); "
+    "print(time.perf_counter() - t)"
+)
+
+
+def measure(snippet: str, runs: int) -> list[float]:
+    env = {
+        **os.environ,
+        "NEWSBLUR_USERNAME": "",
+        "NEWSBLUR_PASSWORD": "",
+        "MODEL_ID": "",
+        "SLACK_WEBHOOK_URL": "",
+    }
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", snippet],
+            cwd=ROOT,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        samples.append(float(out.strip().splitlines()[-1]) * 1000)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--max-import-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    results = {
+        "import main": measure(IMPORT_SNIPPET, args.runs),
+        "cold start": measure(COLD_START_SNIPPET, args.runs),
+    }
+    print(f"{'stage':<14} {'median ms':>10} {'min ms':>8} {'max ms':>8}")
+    for name, samples in results.items():
+        print(
+            f"{name:<14} {statistics.median(samples):>10.1f} "
+            f"{min(samples):>8.1f} {max(samples):>8.1f}"
+        )
+
+    import_ms = statistics.median(results["import main"])
+    if args.max_import_ms is not None and import_ms > args.max_import_ms:
+        print(f"import time {import_ms:.1f} ms exceeds budget of {args.max_import_ms:.1f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Extractive pre-compression of story text before it is sent to the model.
+
+Each story is split into sentences and the sentences are ranked with
+TextRank over TF-IDF cosine similarity. Document frequencies are taken over
+every sentence in the batch, so words common to all of a run's stories carry
+little weight. Only the highest-ranked sentences that fit the per-story token
+budget are kept, in their original order.
+
+The ranking runs on NumPy, which is imported the first time a story needs
+compressing rather than at startup.
+"""
+import math
+import re
+from collections import Counter
+from typing import Optional
+
+from tokens import count_tokens, truncate_tokens
+
+DAMPING = 0.85
+ITERATIONS = 30
+TOLERANCE = 1e-6
+
+_BOUNDARY = re.compile(r"(\w*)([.!?]+)[\"')\]]*\s+(?=[\"'(\[]?[A-Z0-9])")
+_TERMINATED = re.compile(r"[.!?][\"')\]]*$")
+_WORD = re.compile(r"\w+")
+# Words whose trailing period does not end a sentence
+ABBREVIATIONS = frozenset(
+    {"mr", "mrs", "ms", "dr", "prof", "st", "jr", "sr", "vs", "etc", "inc", "ltd", "co", "no"}
+)
+STOPWORDS = frozenset(
+    "a an and are as at be been but by for from had has have he her his i if in into is it its "
+    "of on or our she so than that the their them there they this to was we were which who will "
+    "with would you".split()
+)
+
+def split_sentences(text: str) -> list[str]:
+    sentences = []
+    start = 0
+    for match in _BOUNDARY.finditer(text):
+        word, mark = match.group(1), match.group(2)
+        if mark == "." and (word.lower() in ABBREVIATIONS or (len(word) == 1 and word.isupper())):
+            continue
+        sentence = text[start:match.end()].strip()
+        if sentence:
+            sentences.append(sentence)
+        start = match.end()
+    tail = text[start:].strip()
+    if tail:
+        sentences.append(tail)
+    return sentences
+
+
+def sentence_terms(sentence: str) -> Counter:
+    return Counter(
+        word for word in _WORD.findall(sentence.lower())
+        if len(word) > 1 and word not in STOPWORDS
+    )
+
+
+def tfidf_vectors(terms: list[Counter], idf: dict[str, float]) -> list[dict[str, float]]:
+    """Unit-length TF-IDF vectors, with sublinear term frequency."""
+    vectors = []
+    for counts in terms:
+        vector = {term: (1 + math.log(n)) * idf[term] for term, n in counts.items()}
+        norm = math.sqrt(sum(w * w for w in vector.values()))
+        vectors.append({t: w / norm for t, w in vector.items()} if norm else {})
+    return vectors
+
+
+def textrank(vectors: list[dict[str, float]]) -> list[float]:
+    """TextRank scores of sentences from their cosine similarity graph."""
+    import numpy as np
+
+    vocabulary = {term: k for k, term in enumerate({t for v in vectors for t in v})}
+    n = len(vectors)
+    matrix = np.zeros((n, max(1, len(vocabulary))))
+    for i, vector in enumerate(vectors):
+        for term, weight in vector.items():
+            matrix[i, vocabulary[term]] = weight
+    weights = matrix @ matrix.T
+    np.fill_diagonal(weights, 0.0)
+    out = weights.sum(axis=1)
+    linked = out > 0
+    transition = np.zeros_like(weights)
+    transition[linked] = weights[linked] / out[linked][:, None]
+    scores = np.full(n, 1.0 / n)
+    for _ in range(ITERATIONS):
+        # Sentences similar to nothing spread their score evenly
+        dangling = scores[~linked].sum() / n
+        new = (1 - DAMPING) / n + DAMPING * (dangling + transition.T @ scores)
+        converged = np.abs(new - scores).max() < TOLERANCE
+        scores = new
+        if converged:
+            break
+    return scores.tolist()
+
+
+def compress_texts(texts: list[str], budget: int) -> list[str]:
+    """Reduce every text over ``budget`` tokens to its most central sentences.
+
+    Texts within the budget are returned unchanged. A trailing sentence
+    fragment, left by an earlier character cut, is never kept.
+    """
+    lengths = [count_tokens(text) for text in texts]
+    if budget <= 0 or all(n <= budget for n in lengths):
+        return list(texts)
+    sentences = [split_sentences(text) for text in texts]
+    terms = [[sentence_terms(s) for s in story] for story in sentences]
+    frequencies = Counter(term for story in terms for counts in story for term in counts)
+    total = sum(len(story) for story in terms)
+    idf = {term: math.log((1 + total) / (1 + df)) + 1 for term, df in frequencies.items()}
+
+    results = []
+    for text, n, story, story_terms in zip(texts, lengths, sentences, terms):
+        if n <= budget:
+            results.append(text)
+            continue
+        if len(story) > 1 and not _TERMINATED.search(story[-1]):
+            story, story_terms = story[:-1], story_terms[:-1]
+        vectors = tfidf_vectors(story_terms, idf)
+        scores = textrank(vectors)
+        results.append(select_sentences(story, scores, budget) or truncate_tokens(text, budget))
+    return results
+
+
+def select_sentences(sentences: list[str], scores: list[float], budget: int) -> Optional[str]:
+    """Join the best-scoring sentences that fit in ``budget``, in text order.
+
+    A sentence too long for the space left is skipped for the next one down,
+    but sentences below average centrality are never used to fill the space.
+    """
+    ranked = sorted(range(len(sentences)), key=lambda i: (-scores[i], i))
+    average = sum(scores) / len(scores)
+    kept = []
+    used = 0
+    for i in ranked:
+        if kept and scores[i] < average:
+            break
+        cost = count_tokens(sentences[i])
+        if used + cost <= budget:
+            kept.append(i)
+            used += cost
+    if not kept:
+        return None
+    return " ".join(sentences[i] for i in sorted(kept))
@@ -0,0 +1,133 @@
+"""Near-duplicate detection for stories syndicated across several feeds.
+
+Stories are fingerprinted with MinHash over word shingles and indexed by LSH
+banding: a story is only compared with the few earlier stories that share a
+band bucket with it, so the cost grows linearly with the number of stories
+rather than with the number of pairs.
+"""
+import re
+from hashlib import blake2b
+from typing import Optional
+
+from models import Feed, Story
+
+SHINGLE_SIZE = 5  # Words per shingle
+MIN_SHINGLES = 20  # Shorter texts (excerpts, teasers) are never treated as duplicates
+LSH_BANDS = 16
+LSH_ROWS = 4  # Signature length is LSH_BANDS * LSH_ROWS
+# Jaccard similarity of shingle sets at which two stories count as the same
+# article. 16 bands of 4 rows find pairs at this similarity ~99% of the time.
+SIMILARITY_THRESHOLD = 0.7
+
+_WORD = re.compile(r"\w+")
+
+
+def shingle_hashes(text: str, size: int = SHINGLE_SIZE) -> set[int]:
+    """Return 64-bit hashes of the word ``size``-grams of ``text``."""
+    words = _WORD.findall(text.lower())
+    return {
+        int.from_bytes(
+            blake2b(" ".join(words[i:i + size]).encode("utf-8"), digest_size=8).digest(),
+            "big",
+        )
+        for i in range(len(words) - size + 1)
+    }
+
+
+def minhash_signature(hashes: set[int], length: int) -> tuple:
+    """One-permutation MinHash signature of ``length`` bins.
+
+    Each shingle hash lands in one bin and every bin keeps its minimum, so a
+    signature costs one pass over the shingles instead of one per bin. Empty
+    bins borrow the value of the next non-empty bin to their right, tagged
+    with the distance, which keeps signatures of short texts comparable.
+    """
+    bins: list = [None] * length
+    for h in hashes:
+        i, value = h % length, h // length
+        if bins[i] is None or value < bins[i]:
+            bins[i] = value
+    filled = [i for i, value in enumerate(bins) if value is not None]
+    if not filled:
+        return ()
+    nearest = filled[0] + length  # Bins after the last filled one wrap around
+    for i in range(length - 1, -1, -1):
+        if bins[i] is None:
+            bins[i] = (bins[nearest % length], nearest - i)
+        else:
+            nearest = i
+    return tuple(bins)
+
+
+def jaccard(a: set, b: set) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class DuplicateIndex:
+    """Incremental LSH index; the first story of each cluster represents it.
+
+    Candidates from shared band buckets are confirmed with the exact Jaccard
+    similarity of their shingle sets, so banding only decides what to compare.
+    """
+
+    def __init__(
+        self,
+        threshold: float = SIMILARITY_THRESHOLD,
+        bands: int = LSH_BANDS,
+        rows: int = LSH_ROWS,
+    ):
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = rows
+        self._buckets: dict[tuple, list[int]] = {}
+        self._representatives: list[tuple[Story, set[int]]] = []
+
+    def add(self, story: Story) -> Optional[Story]:
+        """Index ``story``; return the earlier story it duplicates, or None."""
+        hashes = shingle_hashes(story.content_text)
+        if len(hashes) < MIN_SHINGLES:
+            return None
+        signature = minhash_signature(hashes, self.bands * self.rows)
+        keys = [
+            (band, signature[band * self.rows:(band + 1) * self.rows])
+            for band in range(self.bands)
+        ]
+        compared: set[int] = set()
+        for key in keys:
+            for entry in self._buckets.get(key, ()):
+                if entry in compared:
+                    continue
+                compared.add(entry)
+                representative, representative_hashes = self._representatives[entry]
+                if jaccard(hashes, representative_hashes) >= self.threshold:
+                    return representative
+        entry = len(self._representatives)
+        self._representatives.append((story, hashes))
+        for key in keys:
+            self._buckets.setdefault(key, []).append(entry)
+        return None
+
+
+def drop_near_duplicates(feeds: list[Feed], index: Optional[DuplicateIndex] = None) -> int:
+    """Remove stories that near-duplicate an earlier one, in feed order.
+
+    Each removed story is appended to its representative's ``duplicates`` so
+    the digest can link to it and it is still marked as read. Returns the
+    number of stories removed.
+    """
+    index = index or DuplicateIndex()
+    removed = 0
+    for feed in feeds:
+        kept = []
+        for story in feed.stories or []:
+            representative = index.add(story)
+            if representative is None:
+                kept.append(story)
+            else:
+                representative.duplicates.append(story)
+                removed += 1
+        if feed.stories:
+            feed.stories = kept
+    return removed
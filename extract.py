@@ -0,0 +1,322 @@
+import codecs
+import re
+from html.parser import HTMLParser
+from typing import Iterable, Iterator, Optional
+
+# Elements whose text never shows up in the rendered page
+SKIP_TAGS = frozenset({"script", "style", "template"})
+# Elements in which whitespace-only text is kept verbatim
+PRESERVE_WHITESPACE_TAGS = frozenset({"pre", "textarea"})
+ASCII_SPACES = str.maketrans("", "", "\x20\x0a\x09\x0c\x0d")
+# Main-content extraction: subtrees that are never article text
+BOILERPLATE_TAGS = SKIP_TAGS | frozenset(
+    {"nav", "header", "footer", "aside", "form", "button", "select", "iframe", "svg", "noscript"}
+)
+VOID_TAGS = frozenset(
+    {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+)
+BLOCK_TAGS = frozenset(
+    {
+        "address", "article", "blockquote", "dd", "div", "dl", "dt", "figcaption", "figure",
+        "h1", "h2", "h3", "h4", "h5", "h6", "li", "main", "ol", "p", "pre", "section",
+        "table", "td", "th", "tr", "ul", "br",
+    }
+)
+# Elements whose own text is scored as a paragraph
+PARAGRAPH_TAGS = frozenset({"p", "pre", "td", "blockquote", "li", "dd"})
+UNLIKELY_CLASSES = re.compile(
+    r"banner|breadcrumb|comment|consent|cookie|footer|menu|modal|nav|newsletter|"
+    r"popup|promo|related|share|sidebar|social|sponsor|subscribe|top-bar",
+    re.I,
+)
+LIKELY_CLASSES = re.compile(r"article|body|content|entry|main|post|story|text", re.I)
+# Shortest paragraph worth scoring, and shortest result trusted over full text
+MIN_PARAGRAPH_LENGTH = 25
+MIN_MAIN_CONTENT_LENGTH = 250
+# Size of the slices a complete document is fed to the tokenizer in, so that
+# extraction can stop early once the character budget is reached
+FEED_CHUNK_SIZE = 16 * 1024
+
+
+class TextExtractor(HTMLParser):
+    """Incremental HTML-to-text extractor.
+
+    Produces the same text as ``BeautifulSoup(html, "html.parser").get_text()``
+    for ordinary documents, without building a tree. Text inside script, style
+    and template elements is skipped. When ``limit`` is set, ``done`` becomes
+    true as soon as that many characters have been produced so callers can
+    stop feeding input.
+    """
+
+    def __init__(self, limit: Optional[int] = None):
+        super().__init__(convert_charrefs=True)
+        self.limit = limit
+        self.done = False
+        self._parts: list[str] = []
+        self._length = 0
+        self._skip_depth = 0
+        self._preserve_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in PRESERVE_WHITESPACE_TAGS:
+            self._preserve_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        elif tag in PRESERVE_WHITESPACE_TAGS and self._preserve_depth:
+            self._preserve_depth -= 1
+
+    def handle_data(self, data):
+        if self._skip_depth or self.done:
+            return
+        if not self._preserve_depth and not data.translate(ASCII_SPACES):
+            # Collapse whitespace-only runs between tags, as BeautifulSoup does
+            data = "\n" if "\n" in data else " "
+        self._parts.append(data)
+        self._length += len(data)
+        if self.limit is not None and self._length >= self.limit:
+            self.done = True
+
+    def unknown_decl(self, data):
+        # <![CDATA[...]]> sections are kept as text, like BeautifulSoup does
+        if data.startswith("CDATA["):
+            self.handle_data(data[len("CDATA["):])
+
+    def text(self) -> str:
+        text = "".join(self._parts)
+        return text[: self.limit] if self.limit is not None else text
+
+
+def extract_text_from_chunks(chunks: Iterable[str], limit: Optional[int] = None) -> str:
+    """Extract text from HTML delivered in pieces, stopping once ``limit`` is hit."""
+    parser = TextExtractor(limit)
+    for chunk in chunks:
+        parser.feed(chunk)
+        if parser.done:
+            return parser.text()
+    parser.close()
+    return parser.text()
+
+
+def extract_text(html: str, limit: Optional[int] = None) -> str:
+    """Extract visible text from ``html``, reading no further than needed for ``limit``."""
+    return extract_text_from_chunks(
+        (html[i:i + FEED_CHUNK_SIZE] for i in range(0, len(html), FEED_CHUNK_SIZE)),
+        limit,
+    )
+
+
+def decode_chunks(chunks: Iterable[bytes], encoding: str = "utf-8") -> Iterator[str]:
+    """Incrementally decode byte chunks, ignoring undecodable bytes."""
+    try:
+        decoder = codecs.getincrementaldecoder(encoding)(errors="ignore")
+    except LookupError:
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+    for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+class _Block:
+    __slots__ = ("tag", "parent", "children", "weight", "score", "scored", "link_chars")
+
+    def __init__(self, tag: str, parent: Optional["_Block"], weight: int = 0):
+        self.tag = tag
+        self.parent = parent
+        self.children: list = []  # _Block or str, in document order
+        self.weight = weight
+        self.score = 0.0
+        self.scored = False
+        self.link_chars = 0
+
+    def text(self) -> str:
+        # Walked with an explicit stack, since real pages nest arbitrarily deep
+        parts: list[str] = []
+        pending: list = [self]
+        while pending:
+            item = pending.pop()
+            if isinstance(item, str):
+                parts.append(item)
+                continue
+            block = item.tag in BLOCK_TAGS
+            if block:
+                pending.append("\n")
+            pending.extend(reversed(item.children))
+            if block:
+                pending.append("\n")
+        return "".join(parts)
+
+
+class _BlockTreeBuilder(HTMLParser):
+    """Builds a minimal element tree, dropping boilerplate subtrees as it goes."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = _Block("#root", None)
+        self.blocks: list[_Block] = []
+        self._stack = [self.root]
+        # Tags still open inside the boilerplate subtree being dropped, outermost first
+        self._dropped: list[str] = []
+        self._link_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in VOID_TAGS:
+            if tag == "br" and not self._dropped:
+                self._stack[-1].children.append("\n")
+            return
+        if self._dropped:
+            self._dropped.append(tag)
+            return
+        names = " ".join(value or "" for name, value in attrs if name in ("class", "id"))
+        likely = bool(names) and LIKELY_CLASSES.search(names) is not None
+        if tag in BOILERPLATE_TAGS or (
+            names and UNLIKELY_CLASSES.search(names) and not likely and tag != "body"
+        ):
+            self._dropped = [tag]
+            return
+        # A new block ends an open paragraph, and a new item an open list item
+        if tag in BLOCK_TAGS:
+            self._close("p", scope=("table", "td", "th"))
+        if tag == "li":
+            self._close("li", scope=("ul", "ol"))
+        weight = 0
+        if names:
+            weight = 25 if likely else 0
+        block = _Block(tag, self._stack[-1], weight)
+        self._stack[-1].children.append(block)
+        self._stack.append(block)
+        self.blocks.append(block)
+        if tag == "a":
+            self._link_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in VOID_TAGS:
+            return
+        if self._dropped:
+            # Elements left unclosed (<li>, <p>) close with their parent, as below
+            if tag in self._dropped:
+                del self._dropped[len(self._dropped) - 1 - self._dropped[::-1].index(tag):]
+                return
+            if all(block.tag != tag for block in self._stack):
+                return
+            # An element around the dropped subtree closes, so the subtree ended too
+            self._dropped = []
+        self._close(tag)
+
+    def _close(self, tag: str, scope: tuple[str, ...] = ()) -> None:
+        """Close the nearest open ``tag``, implicitly closing the rest.
+
+        The search stops at any element in ``scope``.
+        """
+        for i in range(len(self._stack) - 1, 0, -1):
+            if self._stack[i].tag == tag:
+                for block in self._stack[i:]:
+                    if block.tag == "a" and self._link_depth:
+                        self._link_depth -= 1
+                del self._stack[i:]
+                return
+            if self._stack[i].tag in scope:
+                return
+
+    def handle_data(self, data):
+        if self._dropped:
+            return
+        self._stack[-1].children.append(data)
+        if self._link_depth:
+            for block in self._stack:
+                block.link_chars += len(data)
+
+    def unknown_decl(self, data):
+        if data.startswith("CDATA["):
+            self.handle_data(data[len("CDATA["):])
+
+
+def _normalize(text: str) -> str:
+    lines = (" ".join(line.split()) for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def extract_main_text(html: str) -> Optional[str]:
+    """Return the main article text of ``html``, readability style.
+
+    Navigation, headers, footers, forms and elements whose class or id look
+    like boilerplate (cookie banners, share bars, sidebars) are dropped.
+    Paragraphs are scored by length and comma count; scores flow to their
+    parent and, halved, grandparent, are adjusted by class/id hints and
+    scaled down by link density. The best container and any strong
+    siblings make up the result. Returns ``None`` when no container holds
+    enough text to be trusted, so callers can fall back to the full text.
+    """
+    builder = _BlockTreeBuilder()
+    builder.feed(html)
+    builder.close()
+
+    lengths: dict[int, int] = {}
+
+    def text_length(block: _Block) -> int:
+        key = id(block)
+        if key not in lengths:
+            lengths[key] = len(" ".join(block.text().split()))
+        return lengths[key]
+
+    candidates: list[_Block] = []
+
+    def add_score(block: Optional[_Block], amount: float) -> None:
+        if block is None or block is builder.root:
+            return
+        if not block.scored:
+            block.scored = True
+            block.score = block.weight + (5 if block.tag in ("div", "article", "main") else 0)
+            candidates.append(block)
+        block.score += amount
+
+    for block in builder.blocks:
+        own_text = block.tag in PARAGRAPH_TAGS or (
+            block.tag in ("div", "section", "article")
+            and any(isinstance(c, str) and len(c.strip()) >= MIN_PARAGRAPH_LENGTH for c in block.children)
+        )
+        if not own_text:
+            continue
+        length = text_length(block)
+        if length < MIN_PARAGRAPH_LENGTH:
+            continue
+        score = 1 + block.text().count(",") + min(length // 100, 3)
+        add_score(block.parent, score)
+        if block.parent is not None:
+            add_score(block.parent.parent, score / 2)
+
+    if not candidates:
+        return None
+    for block in candidates:
+        length = text_length(block) or 1
+        block.score *= 1 - min(block.link_chars / length, 1)
+    best = max(candidates, key=lambda b: b.score)
+
+    # Pull in siblings that look like part of the same article
+    parts = []
+    threshold = max(10, best.score * 0.2)
+    siblings = best.parent.children if best.parent is not None else [best]
+    for sibling in siblings:
+        if isinstance(sibling, str):
+            continue
+        if sibling is best:
+            parts.append(sibling.text())
+            continue
+        length = text_length(sibling)
+        link_density = sibling.link_chars / length if length else 1
+        if (sibling.scored and sibling.score >= threshold) or (
+            sibling.tag == "p" and length > 80 and link_density < 0.25
+        ):
+            parts.append(sibling.text())
+
+    text = _normalize("\n".join(parts))
+    if len(text) < MIN_MAIN_CONTENT_LENGTH:
+        return None
+    return text
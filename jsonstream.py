@@ -0,0 +1,104 @@
+"""Incremental parsing of one array inside a streamed JSON object.
+
+NewsBlur returns every unread story of a feed, full HTML included, in a single
+JSON document, while the digest keeps only the first few. ``iter_array_items``
+decodes the stories one at a time as the response arrives, so the caller can
+stop reading once it has enough and never holds the whole payload in memory.
+"""
+import json
+import re
+from typing import Any, Iterable, Iterator
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+class _Reader:
+    """A cursor over text arriving in chunks; consumed text is dropped."""
+
+    def __init__(self, chunks: Iterable[str]):
+        self._chunks = iter(chunks)
+        self.buffer = ""
+        self.pos = 0
+        self.exhausted = False
+
+    def fill(self, size: int) -> bool:
+        """Buffer at least ``size`` unread characters; False if the input ends first."""
+        parts = [self.buffer[self.pos:]]
+        available = len(parts[0])
+        for chunk in self._chunks:
+            parts.append(chunk)
+            available += len(chunk)
+            if available >= size:
+                break
+        else:
+            self.exhausted = True
+        self.buffer = "".join(parts)
+        self.pos = 0
+        return available >= size
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character, or "" at the end of input."""
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill(1):
+                return ""
+
+    def expect(self, chars: str) -> str:
+        char = self.peek()
+        if not char or char not in chars:
+            found = repr(char) if char else "end of input"
+            raise ValueError(f"Expected one of {chars!r} in JSON, found {found}")
+        self.pos += 1
+        return char
+
+    def value(self) -> Any:
+        """Decode the JSON value at the cursor, reading more input as needed."""
+        self.peek()
+        while True:
+            available = len(self.buffer) - self.pos
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except ValueError:
+                if self.exhausted:
+                    raise
+            else:
+                # A number that ends the buffer may continue in the next chunk
+                if end < len(self.buffer) or self.exhausted:
+                    self.pos = end
+                    return value
+            # Wait for at least twice as much text before retrying, so a large
+            # value is decoded a logarithmic rather than linear number of times
+            self.fill(max(1, 2 * available))
+
+
+def iter_array_items(chunks: Iterable[str], key: str) -> Iterator[Any]:
+    """Yield the items of the array at ``key`` in the JSON object read from ``chunks``.
+
+    Items are yielded as soon as their text has arrived; nothing after the
+    array is read unless the caller keeps iterating past its end. Other
+    top-level values are decoded and discarded. Yields nothing if ``key`` is
+    missing or not an array. Raises ValueError on malformed JSON.
+    """
+    reader = _Reader(chunks)
+    reader.expect("{")
+    if reader.peek() == "}":
+        return
+    while True:
+        name = reader.value()
+        if not isinstance(name, str):
+            raise ValueError(f"Expected a JSON object key, found {name!r}")
+        reader.expect(":")
+        if name == key and reader.peek() == "[":
+            reader.expect("[")
+            if reader.peek() == "]":
+                return
+            while True:
+                yield reader.value()
+                if reader.expect(",]") == "]":
+                    return
+        reader.value()
+        if reader.expect(",}") == "}":
+            return
@@ -1,22 +1,62 @@
+import json
 import logging
 import os
-from typing import Optional
+import re
+import time
+from collections import ChainMap
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import chain
+from typing import Iterable, Iterator, Mapping, Optional
+from urllib.parse import urlsplit
 
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
-from openai import OpenAI
 
+from batch import AccountResult, load_batch_config, run_accounts, shard_accounts
+from compress import compress_texts
+from dedupe import DuplicateIndex, drop_near_duplicates
+from extract import decode_chunks, extract_main_text, extract_text, extract_text_from_chunks
+from jsonstream import iter_array_items
+from metrics import RunMetrics, write_json_report, write_prometheus_textfile
 from models import Feed, Story
+from pipeline import iter_pipeline
+from ratelimit import RateLimiter
+from resilience import CircuitBreaker, ResilientSession, RetryPolicy
+from storage import CookieStore, MarkReadJournal, PageCache, SummaryStore, SyncCheckpoint
+from tokens import count_tokens, fair_shares, truncate_tokens
 
 # Setup
 logging.basicConfig(level=logging.INFO)
 load_dotenv()
-openai = OpenAI()
+# OpenAI client, created on first use by get_openai_client(); importing the
+# SDK is a large share of start-up time and runs that exit early never need it
+openai = None
+# Optional on-disk cache for fetch_webpage, enabled by PAGE_CACHE_PATH in main()
+page_cache: Optional[PageCache] = None
+# Optional per-story summary store, enabled by SUMMARY_STORE_PATH in main()
+summary_store: Optional[SummaryStore] = None
+# Stage timings and counters for the current run, reported when main() ends
+metrics = RunMetrics()
+# Retry policy and per-host circuit breakers shared by the NewsBlur and
+# publisher sessions; configured from the environment in main()
+retry_policy = RetryPolicy()
+circuit_breaker = CircuitBreaker()
+# Seconds before a slow NewsBlur GET is hedged with a second request; None disables
+newsblur_hedge_delay: Optional[float] = None
+# Connection pools shared by every account in batch mode; None outside it
+newsblur_adapter: Optional[HTTPAdapter] = None
+web_session: Optional[requests.Session] = None
+# Logged-in NewsBlur sessions by username, kept between runs in service mode
+warm_sessions: Optional[dict[str, requests.Session]] = None
+# Requests and tokens per minute allowed to OpenAI, shared by every completion
+# in the process and kept in step with the x-ratelimit-* response headers
+openai_limiter = RateLimiter()
 
 # Parameters
 MAX_STORIES = 5  # Number of stories to process
 MAX_CONTENT_LENGTH = 3000  # Max length of story content to summarize
+MIN_CONTENT_LENGTH = 100  # Shorter RSS content triggers a full-page fetch
 MAX_TOKENS = None
 TEMPERATURE = 1.0
 SYSTEM_PROMPT = """You are an assistant that summarizes news articles.
@@ -30,18 +70,149 @@ The summary should be in the following format:
 ..
 2. *Feed title*
 etc.
+If a story lists "Also at" links, append each after its [Read more] link as
+<link|[site]>, where site is the link's domain name.
+"""
+# Used when summaries are memoized per story: the model only sees new or
+# changed stories and the digest is assembled locally in SYSTEM_PROMPT format.
+STORY_SUMMARY_PROMPT = """You are an assistant that summarizes news articles.
+Summarize every article accurately in 1-3 sentences.
+Respond with a JSON object mapping each article's ID to its summary, e.g.
+{"1": "summary of article 1", "2": "summary of article 2"}
 """
 
 # Networking
+# Overridable so the pipeline can run against a local stand-in server
+NEWSBLUR_URL = os.getenv("NEWSBLUR_URL", "https://newsblur.com").rstrip("/")
 # Use short connect timeout and reasonable read timeout to avoid hangs
 DEFAULT_TIMEOUT = (5, 15)
+# Keep-alive connections to NewsBlur kept by the shared session; sized for the
+# concurrent fetch and mark-as-read stages
+NEWSBLUR_POOL_SIZE = 16
+# Number of feeds fetched in parallel; 1 falls back to sequential fetching
+FETCH_CONCURRENCY = 8
+# Upper bound in seconds on how long a single feed may take end to end
+FEED_FETCH_TIMEOUT = 60
+# Full-page fallback fetches run across all feeds on one pooled session
+FALLBACK_CONCURRENCY = 16
+FALLBACK_PER_HOST = 4  # Max concurrent keep-alive connections per publisher
+FALLBACK_HOST_POOLS = 32  # Number of per-host connection pools kept alive
+# Feed ids per /reader/unread_story_hashes request (SYNC_CHECKPOINT_PATH)
+UNREAD_HASHES_BATCH_SIZE = 100
+# NewsBlur accepts at most this many hashes per mark_story_hashes_as_read call
+MARK_READ_CHUNK_SIZE = 5
+MARK_READ_CONCURRENCY = 4
+# River-of-news bulk fetching (FETCH_MODE=river)
+RIVER_BATCH_SIZE = 100  # Feed ids per river request
+RIVER_MAX_PAGES = 50  # Safety cap on pages requested per batch
+# Page cache (PAGE_CACHE_PATH); stale entries are revalidated with conditional GETs
+PAGE_CACHE_MAX_AGE = 24 * 60 * 60  # Seconds before a cached page is revalidated
+PAGE_CACHE_MAX_BYTES = 50_000_000  # Total cached text before LRU eviction
+SUMMARY_STORE_MAX_AGE = 7 * 24 * 60 * 60  # Seconds a stored story summary is kept
+# Full-page fetches are streamed and abandoned after this many bytes
+FETCH_MAX_BYTES = 2_000_000
+FETCH_CHUNK_SIZE = 16 * 1024
+# Only these content types are parsed; anything else (PDF, video, images) is skipped
+FETCH_CONTENT_TYPES = ("text/html", "application/xhtml+xml", "text/plain")
+# Keep only the main article body of fetched pages (drops nav, banners, footers).
+# This reads and holds the whole page, up to FETCH_MAX_BYTES, instead of
+# stopping once MAX_CONTENT_LENGTH characters of text are found; set it to
+# False to get the early stop back.
+MAIN_CONTENT_EXTRACTION = True
+# Prompts estimated above this many tokens are summarized map-reduce style in
+# parallel chunks of at most this size; 0 always uses a single completion
+SUMMARY_CHUNK_TOKENS = 24000
+SUMMARY_CONCURRENCY = 4  # Parallel chunk completions
+# Story text sent to the model per run, in tokens; longer content is trimmed
+# to fit (see fit_prompt_budget). 0 disables the budget.
+PROMPT_TOKEN_BUDGET = 100_000
+# Story content over this many tokens is reduced to its most central sentences
+# before summarizing (see compress.py); 0 sends the content as fetched
+PRECOMPRESS_TOKENS = 0
+PIPELINE_QUEUE_SIZE = 16  # Feeds buffered between pipelined stages
+
+# Resilience
+HTTP_MAX_RETRIES = 2  # Retries after the first attempt on transient failures
+HTTP_BACKOFF_BASE = 0.5  # Seconds; backoff ceiling for the first retry, doubling after
+HTTP_BACKOFF_MAX = 8.0
+BREAKER_FAILURE_THRESHOLD = 5  # Consecutive failures before a host is skipped
+BREAKER_RESET_TIMEOUT = 30.0  # Seconds before a skipped host is tried again
+NEWSBLUR_HEDGE_DELAY = 0.0  # Seconds; 0 disables hedged NewsBlur requests
+
+# OpenAI rate limits to start from; 0 learns them from the first response
+OPENAI_RPM_LIMIT = 0
+OPENAI_TPM_LIMIT = 0
+# Tokens reserved for a completion's output when MAX_TOKENS is unset
+COMPLETION_TOKEN_ESTIMATE = 1000
+
+# Batch mode
+BATCH_CONCURRENCY = 4  # Accounts processed at the same time
+BATCH_NEWSBLUR_CONNECTIONS = 32  # NewsBlur connections shared by all accounts
+
+# Slack
+# Web API base for chat.postMessage, used when SLACK_BOT_TOKEN is set so that
+# streamed sections can be threaded; overridable for a local stand-in server
+SLACK_API_URL = os.getenv("SLACK_API_URL", "https://slack.com/api").rstrip("/")
+SLACK_INTRO = "Here is the latest summarized news:\n\n"
+
+
+def env_int(name: str, default: int, env: Mapping[str, str] = os.environ) -> int:
+    value = env.get(name)
+    if value is None or value == "":
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        logging.error(f"Invalid integer for {name}: {value!r}; using {default}")
+        return default
+
+
+def env_float(name: str, default: float, env: Mapping[str, str] = os.environ) -> float:
+    value = env.get(name)
+    if value is None or value == "":
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        logging.error(f"Invalid number for {name}: {value!r}; using {default}")
+        return default
+
+
+def create_newsblur_session(pool_size: int = NEWSBLUR_POOL_SIZE) -> requests.Session:
+    session = ResilientSession(
+        retry_policy, circuit_breaker, hedge_after=newsblur_hedge_delay, on_event=metrics.incr
+    )
+    # In batch mode every account's session draws on one shared pool
+    adapter = newsblur_adapter or HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.hooks["response"].append(_count_newsblur_response)
+    return session
+
+
+def create_shared_newsblur_adapter(env: Mapping[str, str] = os.environ) -> HTTPAdapter:
+    """Return a NewsBlur pool for many sessions that blocks when it is exhausted."""
+    return HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=env_int("BATCH_NEWSBLUR_CONNECTIONS", BATCH_NEWSBLUR_CONNECTIONS, env),
+        pool_block=True,
+    )
+
 
+def _count_newsblur_response(response: requests.Response, *args, **kwargs) -> None:
+    metrics.incr("newsblur_requests")
+    # Hooks run before a streamed response is returned, so reading .content
+    # here would download the whole body; read_stories counts what it reads
+    if not kwargs.get("stream"):
+        metrics.incr("newsblur_bytes", len(response.content))
 
+
+@metrics.timed("authenticate_newsblur")
 def authenticate_newsblur(username: str, password: str) -> Optional[requests.Session]:
-    session = requests.Session()
+    session = create_newsblur_session()
     try:
         response = session.post(
-            "https://newsblur.com/api/login",
+            f"{NEWSBLUR_URL}/api/login",
             data={"username": username, "password": password},
             timeout=DEFAULT_TIMEOUT,
         )
@@ -54,9 +225,71 @@ def authenticate_newsblur(username: str, password: str) -> Optional[requests.Ses
     return session
 
 
+def restore_newsblur_session(cookie_store: CookieStore) -> Optional[requests.Session]:
+    cookies = cookie_store.load()
+    if not cookies:
+        return None
+    session = create_newsblur_session()
+    for cookie in cookies:
+        session.cookies.set(
+            cookie["name"],
+            cookie.get("value"),
+            domain=cookie.get("domain") or "",
+            path=cookie.get("path") or "/",
+            secure=bool(cookie.get("secure")),
+            expires=cookie.get("expires"),
+        )
+    return session
+
+
+def connect_newsblur(
+    username: str, password: str, cookie_store: Optional[CookieStore] = None
+) -> tuple[Optional[requests.Session], Optional[list[Feed]]]:
+    """Return an authenticated session and the feed list.
+
+    With a ``cookie_store``, cookies from an earlier run are tried first and
+    the feed list request doubles as the validity check; a rejected cookie
+    falls back to a full login whose cookies are stored for the next run.
+    In service mode a session still open from an earlier run is tried first.
+    """
+    if warm_sessions is not None and username in warm_sessions:
+        session = warm_sessions[username]
+        feeds = fetch_feeds(session)
+        if feeds is not None:
+            logging.info("Reusing warm NewsBlur session")
+            return session, feeds
+        logging.info("Warm NewsBlur session was rejected; logging in again")
+        warm_sessions.pop(username).close()
+    session, feeds = _connect_newsblur(username, password, cookie_store)
+    if session is not None and warm_sessions is not None:
+        warm_sessions[username] = session
+    return session, feeds
+
+
+def _connect_newsblur(
+    username: str, password: str, cookie_store: Optional[CookieStore]
+) -> tuple[Optional[requests.Session], Optional[list[Feed]]]:
+    if cookie_store is not None:
+        session = restore_newsblur_session(cookie_store)
+        if session is not None:
+            feeds = fetch_feeds(session)
+            if feeds is not None:
+                logging.info("Reusing stored NewsBlur session")
+                return session, feeds
+            logging.info("Stored NewsBlur session was rejected; logging in again")
+            cookie_store.clear()
+    session = authenticate_newsblur(username, password)
+    if not session:
+        return None, None
+    if cookie_store is not None:
+        cookie_store.save(session.cookies)
+    return session, fetch_feeds(session)
+
+
+@metrics.timed("fetch_feeds")
 def fetch_feeds(session: requests.Session) -> Optional[list[Feed]]:
     try:
-        response = session.get("https://newsblur.com/reader/feeds", timeout=DEFAULT_TIMEOUT)
+        response = session.get(f"{NEWSBLUR_URL}/reader/feeds", timeout=DEFAULT_TIMEOUT)
     except requests.exceptions.RequestException as e:
         logging.error(f"Failed to fetch feeds: {e}")
         return None
@@ -68,14 +301,104 @@ def fetch_feeds(session: requests.Session) -> Optional[list[Feed]]:
     except ValueError:
         logging.error("Failed to parse feeds response JSON")
         return None
+    if data.get("authenticated") is False:
+        logging.error("Failed to fetch feeds: not authenticated")
+        return None
     feeds = [
-        Feed(id=feed_id, title=feed_data.get("feed_title", ""))
+        Feed(
+            id=feed_id,
+            title=feed_data.get("feed_title", ""),
+            unread_positive=_unread_counter(feed_data.get("ps")),
+            unread_neutral=_unread_counter(feed_data.get("nt")),
+            unread_negative=_unread_counter(feed_data.get("ng")),
+        )
         for feed_id, feed_data in data.get("feeds", {}).items()
     ]
     return feeds
 
 
-def clean_html(html_content: str | bytes | None) -> str:
+def _unread_counter(value) -> Optional[int]:
+    try:
+        return max(int(value), 0) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def fetch_unread_story_hashes(
+    session: requests.Session, feeds: list[Feed], batch_size: int = UNREAD_HASHES_BATCH_SIZE
+) -> Optional[dict[str, list[str]]]:
+    """Return unread story hashes per feed id, or ``None`` if any request fails."""
+    unread: dict[str, list[str]] = {}
+    for start in range(0, len(feeds), batch_size):
+        params = [("feed_id", feed.id) for feed in feeds[start:start + batch_size]]
+        try:
+            response = session.get(
+                f"{NEWSBLUR_URL}/reader/unread_story_hashes",
+                params=params,
+                timeout=DEFAULT_TIMEOUT,
+            )
+        except requests.exceptions.RequestException as e:
+            logging.error(f"Failed to fetch unread story hashes: {e}")
+            return None
+        if response.status_code != 200:
+            logging.error(f"Failed to fetch unread story hashes: {response.status_code}")
+            return None
+        try:
+            data = response.json()
+        except ValueError:
+            logging.error("Failed to parse unread story hashes response JSON")
+            return None
+        for feed_id, hashes in data.get("unread_feed_story_hashes", {}).items():
+            unread[str(feed_id)] = [h[0] if isinstance(h, list) else h for h in hashes]
+    return unread
+
+
+def select_feeds_to_fetch(
+    session: requests.Session,
+    feeds: list[Feed],
+    checkpoint: Optional[SyncCheckpoint] = None,
+) -> list[Feed]:
+    """Drop feeds with nothing new to summarize.
+
+    Feeds whose unread counters are all zero are skipped. With a
+    ``checkpoint``, one bulk unread-hashes lookup also skips feeds whose
+    unread stories were all delivered by an earlier run.
+    """
+    active = [feed for feed in feeds if feed.unread_count != 0]
+    if checkpoint is not None and active:
+        unread = fetch_unread_story_hashes(session, active)
+        if unread is not None:
+            all_hashes = [h for hashes in unread.values() for h in hashes]
+            processed = checkpoint.processed(all_hashes)
+            active = [
+                feed
+                for feed in active
+                if str(feed.id) not in unread
+                or any(h not in processed for h in unread[str(feed.id)])
+            ]
+    skipped = len(feeds) - len(active)
+    if skipped:
+        logging.info(f"Skipping {skipped} of {len(feeds)} feeds with no new unread stories")
+    return active
+
+
+def drop_processed_stories(feeds: list[Feed], checkpoint: SyncCheckpoint) -> None:
+    hashes = [story.hash for feed in feeds for story in feed.stories or []]
+    processed = checkpoint.processed(hashes)
+    if not processed:
+        return
+    logging.info(f"Dropping {len(processed)} stories already sent in an earlier digest")
+    for feed in feeds:
+        if feed.stories:
+            feed.stories = [s for s in feed.stories if s.hash not in processed]
+
+
+@metrics.timed("clean_html")
+def clean_html(html_content: str | bytes | None, limit: Optional[int] = None) -> str:
+    """Return the visible text of ``html_content``.
+
+    With ``limit`` set, parsing stops once that many characters are produced.
+    """
     if html_content is None:
         return ""
     try:
@@ -84,38 +407,52 @@ def clean_html(html_content: str | bytes | None) -> str:
             if isinstance(html_content, (bytes, bytearray))
             else str(html_content)
         )
-        soup = BeautifulSoup(text, "html.parser")
-        return soup.get_text()
+        return extract_text(text, limit)
     except Exception as e:
         logging.error(f"Failed to clean HTML: {e}")
         return ""
 
 
-def fetch_feed_stories(session: requests.Session, feed: Feed) -> Optional[list[Story]]:
-    stories = []
+@metrics.timed("fetch_feed_stories")
+def fetch_feed_stories(
+    session: requests.Session, feed: Feed, fetch_fallback: bool = True
+) -> Optional[list[Story]]:
+    """Fetch up to ``MAX_STORIES`` unread stories for ``feed``.
+
+    The response is parsed as it streams in and the connection is closed once
+    ``MAX_STORIES`` stories have arrived, so the rest of the payload is never
+    read or decoded.
+
+    With ``fetch_fallback`` disabled, stories with short RSS content are left
+    as-is so ``fetch_fallback_content`` can fetch them in bulk later.
+    """
     try:
         response = session.get(
-            f"https://newsblur.com/reader/feed/{feed.id}",
+            f"{NEWSBLUR_URL}/reader/feed/{feed.id}",
             params={"read_filter": "unread"},
             timeout=DEFAULT_TIMEOUT,
+            stream=True,
         )
     except requests.exceptions.RequestException as e:
         logging.error(
             f"Failed to fetch stories for feed id {feed.id}: {e}"
         )
         return None
-    if response.status_code != 200:
-        logging.error(
-            f"Failed to fetch stories for feed id {feed.id}: {response.status_code}"
-        )
-        return None
-
     try:
-        raw = response.json()
+        if response.status_code != 200:
+            logging.error(
+                f"Failed to fetch stories for feed id {feed.id}: {response.status_code}"
+            )
+            return None
+        raw_stories = read_stories(response, MAX_STORIES)
     except ValueError:
         logging.error(f"Invalid JSON when fetching stories for feed id {feed.id}")
         return None
-    raw_stories = raw.get("stories", [])
+    except requests.exceptions.RequestException as e:
+        logging.error(f"Failed to read stories for feed id {feed.id}: {e}")
+        return None
+    finally:
+        response.close()
 
     if not raw_stories:
         logging.info(f"No stories found for {feed.id} - {feed.title}")
@@ -124,90 +461,731 @@ def fetch_feed_stories(session: requests.Session, feed: Feed) -> Optional[list[S
         logging.info(
             f"{len(raw_stories)} stories found for {feed.id} - {feed.title}")
 
-    for raw_story in raw_stories[:MAX_STORIES]:
-        story_title = raw_story.get("story_title")
-        story_content_html = raw_story.get("story_content")
-        story_permalink = raw_story.get("story_permalink")
-        story_hash = raw_story.get("story_hash")
+    return [parse_story(raw_story, fetch_fallback) for raw_story in raw_stories]
 
-        # Clean the HTML content
-        story_content_text = clean_html(story_content_html)
 
-        # Fetch content directly if RSS is empty or short
-        if len(story_content_text) < 100 and story_permalink:
-            logging.info(
-                f"Story content for {story_hash} may be empty from RSS feed. Fetching directly..."
-            )
-            fetched = fetch_webpage(story_permalink)
-            if fetched:
-                story_content_text = fetched
+def read_stories(response: requests.Response, limit: int) -> list[dict]:
+    """Decode the first ``limit`` entries of the ``stories`` array in ``response``."""
+    raw_stories = []
+    if limit <= 0:
+        return raw_stories
+    def counted_chunks():
+        for chunk in response.iter_content(chunk_size=FETCH_CHUNK_SIZE):
+            metrics.incr("newsblur_bytes", len(chunk))
+            yield chunk
+
+    for raw_story in iter_array_items(decode_chunks(counted_chunks()), "stories"):
+        raw_stories.append(raw_story)
+        if len(raw_stories) >= limit:
+            break
+    return raw_stories
+
 
-        # Truncate content if necessary
-        if len(story_content_text) > MAX_CONTENT_LENGTH:
-            story_content_text = story_content_text[:MAX_CONTENT_LENGTH]
+def parse_story(raw_story: dict, fetch_fallback: bool = True) -> Story:
+    story_title = raw_story.get("story_title")
+    story_content_html = raw_story.get("story_content")
+    story_permalink = raw_story.get("story_permalink")
+    story_hash = raw_story.get("story_hash")
 
-        stories.append(
-            Story(story_hash, story_title, story_content_text, story_permalink)
+    # Clean the HTML content
+    story_content_text = clean_html(story_content_html, limit=MAX_CONTENT_LENGTH)
+
+    # Fetch content directly if RSS is empty or short
+    if fetch_fallback and needs_fallback(story_content_text, story_permalink):
+        logging.info(
+            f"Story content for {story_hash} may be empty from RSS feed. Fetching directly..."
         )
-    return stories
+        fetched = fetch_webpage(story_permalink)
+        if fetched:
+            story_content_text = fetched
 
+    # Truncate content if necessary
+    if len(story_content_text) > MAX_CONTENT_LENGTH:
+        story_content_text = story_content_text[:MAX_CONTENT_LENGTH]
 
-# TODO: implement chunking for stories because NB API only
-# supports up to 5 story_hashes, but fine if MAX_STORIES = 5
-def mark_stories_as_read(session: requests.Session, feeds: list[Feed]) -> None:
-    if not feeds:
+    return Story(story_hash, story_title, story_content_text, story_permalink)
+
+
+def needs_fallback(content_text: str, permalink: str | None) -> bool:
+    return len(content_text) < MIN_CONTENT_LENGTH and bool(permalink)
+
+
+def fetch_all_feed_stories(
+    session: requests.Session,
+    feeds: list[Feed],
+    concurrency: int = FETCH_CONCURRENCY,
+    feed_timeout: float | None = FEED_FETCH_TIMEOUT,
+    fetch_fallback: bool = True,
+) -> list[Optional[list[Story]]]:
+    """Fetch stories for every feed, returning results in feed order.
+
+    Feeds are fetched on a bounded thread pool sharing ``session``. A feed that
+    raises or runs longer than ``feed_timeout`` yields ``None``, like a failed
+    request. The timeout counts from when the feed's fetch starts, not from
+    when earlier feeds finished, and time spent queued for a worker is free.
+    """
+    if concurrency <= 1 or len(feeds) <= 1:
+        return [fetch_feed_stories(session, feed, fetch_fallback) for feed in feeds]
+
+    results: list[Optional[list[Story]]] = [None] * len(feeds)
+    starts: list[Optional[float]] = [None] * len(feeds)
+
+    def fetch(index: int, feed: Feed) -> Optional[list[Story]]:
+        starts[index] = time.monotonic()
+        return fetch_feed_stories(session, feed, fetch_fallback)
+
+    executor = ThreadPoolExecutor(max_workers=min(concurrency, len(feeds)))
+    try:
+        futures = {
+            executor.submit(fetch, index, feed): index for index, feed in enumerate(feeds)
+        }
+        pending = set(futures)
+        while pending:
+            timeout = None
+            if feed_timeout is not None:
+                now = time.monotonic()
+                for future in [f for f in pending if not f.done()]:
+                    index = futures[future]
+                    if starts[index] is not None and now - starts[index] >= feed_timeout:
+                        logging.error(
+                            f"Timed out fetching stories for feed id {feeds[index].id} "
+                            f"after {feed_timeout}s"
+                        )
+                        pending.discard(future)
+                running = [starts[futures[f]] for f in pending if starts[futures[f]] is not None]
+                # A feed that starts after this check has a later deadline than
+                # any of these, so waking up in time for them is early enough
+                timeout = max(0.0, min(running) + feed_timeout - now) if running else feed_timeout
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.discard(future)
+                index = futures[future]
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    logging.error(f"Failed to fetch stories for feed id {feeds[index].id}: {e}")
+    finally:
+        # Don't block on stragglers that already timed out
+        executor.shutdown(wait=False, cancel_futures=True)
+    return results
+
+
+def fetch_river_stories(
+    session: requests.Session,
+    feeds: list[Feed],
+    batch_size: int = RIVER_BATCH_SIZE,
+    max_pages: int = RIVER_MAX_PAGES,
+    fetch_fallback: bool = True,
+) -> list[Optional[list[Story]]]:
+    """Fetch unread stories for many feeds per request via the river endpoint.
+
+    Feed ids are sent in batches of ``batch_size``; each batch is paged until
+    every feed has ``MAX_STORIES`` stories, a page comes back empty, or
+    ``max_pages`` is reached. River pages are offsets into the stories of the
+    requested feed set, so every page asks for the whole batch and stories of
+    feeds that are already full are discarded here. Results are returned in
+    feed order, with ``None`` for every feed in a batch whose request failed.
+    """
+    stories_by_feed: dict[str, Optional[list[Story]]] = {}
+    for start in range(0, len(feeds), batch_size):
+        batch_ids = [str(feed.id) for feed in feeds[start:start + batch_size]]
+        collected: dict[str, list[Story]] = {feed_id: [] for feed_id in batch_ids}
+        failed = False
+        for page in range(1, max_pages + 1):
+            if all(len(stories) >= MAX_STORIES for stories in collected.values()):
+                break
+            raw_stories = _fetch_river_page(session, batch_ids, page)
+            if raw_stories is None:
+                failed = True
+                break
+            if not raw_stories:
+                break
+            for raw_story in raw_stories:
+                feed_id = str(raw_story.get("story_feed_id"))
+                bucket = collected.get(feed_id)
+                if bucket is not None and len(bucket) < MAX_STORIES:
+                    bucket.append(parse_story(raw_story, fetch_fallback))
+        for feed_id in batch_ids:
+            stories_by_feed[feed_id] = None if failed else collected[feed_id]
+
+    results = []
+    for feed in feeds:
+        stories = stories_by_feed[str(feed.id)]
+        if stories:
+            logging.info(f"{len(stories)} stories found for {feed.id} - {feed.title}")
+        results.append(stories)
+    return results
+
+
+def _fetch_river_page(
+    session: requests.Session, feed_ids: list[str], page: int
+) -> Optional[list[dict]]:
+    params = [("feeds", feed_id) for feed_id in feed_ids]
+    params += [("page", page), ("read_filter", "unread"), ("order", "newest")]
+    try:
+        response = session.get(
+            f"{NEWSBLUR_URL}/reader/river_stories",
+            params=params,
+            timeout=DEFAULT_TIMEOUT,
+        )
+    except requests.exceptions.RequestException as e:
+        logging.error(f"Failed to fetch river stories page {page}: {e}")
+        return None
+    if response.status_code != 200:
+        logging.error(
+            f"Failed to fetch river stories page {page}: {response.status_code}"
+        )
+        return None
+    try:
+        raw = response.json()
+    except ValueError:
+        logging.error(f"Invalid JSON when fetching river stories page {page}")
         return None
-    story_hashes = [[story.hash for story in feed.stories] for feed in feeds]
-    for stories in story_hashes:
+    return raw.get("stories", [])
+
+
+def create_web_session(
+    per_host: int = FALLBACK_PER_HOST, host_pools: int = FALLBACK_HOST_POOLS
+) -> requests.Session:
+    """Return a keep-alive session capped at ``per_host`` connections per host."""
+    session = ResilientSession(retry_policy, circuit_breaker, on_event=metrics.incr)
+    adapter = HTTPAdapter(
+        pool_connections=host_pools, pool_maxsize=per_host, pool_block=True
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def fetch_fallback_content(
+    feeds: list[Feed],
+    concurrency: int = FALLBACK_CONCURRENCY,
+    session: Optional[requests.Session] = None,
+) -> int:
+    """Fetch full pages for every story whose RSS content is too short.
+
+    Fetches are gathered across all feeds, de-duplicated by permalink and run
+    in parallel over a pooled session. Returns the number of stories updated.
+    """
+    pending: dict[str, list[Story]] = {}
+    for feed in feeds:
+        for story in feed.stories or []:
+            if needs_fallback(story.content_text, story.permalink):
+                pending.setdefault(story.permalink, []).append(story)
+    if not pending:
+        return 0
+
+    logging.info(f"Fetching {len(pending)} pages for stories with short RSS content")
+    session = session or web_session
+    owns_session = session is None
+    if session is None:
+        session = create_web_session()
+
+    def fetch(url: str) -> Optional[str]:
+        try:
+            return fetch_webpage(url, session=session)
+        except Exception as e:
+            logging.error(f"Failed to fetch content for {url}: {e}")
+            return None
+
+    urls = list(pending)
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(urls)))) as executor:
+            pages = list(executor.map(fetch, urls))
+    finally:
+        if owns_session:
+            session.close()
+
+    updated = 0
+    for url, page_text in zip(urls, pages):
+        if not page_text:
+            continue
+        for story in pending[url]:
+            story.content_text = page_text[:MAX_CONTENT_LENGTH]
+            updated += 1
+    return updated
+
+
+def mark_story_hashes_as_read(
+    session: requests.Session,
+    story_hashes: list[str],
+    concurrency: int = MARK_READ_CONCURRENCY,
+) -> list[str]:
+    """Mark hashes as read in API-sized chunks posted in parallel.
+
+    Returns the hashes whose chunk could not be marked.
+    """
+    chunks = [
+        story_hashes[i:i + MARK_READ_CHUNK_SIZE]
+        for i in range(0, len(story_hashes), MARK_READ_CHUNK_SIZE)
+    ]
+    if not chunks:
+        return []
+
+    def post(chunk: list[str]) -> bool:
         try:
             response = session.post(
-                "https://newsblur.com/reader/mark_story_hashes_as_read",
-                data=[("story_hash", story_hash) for story_hash in stories],
+                f"{NEWSBLUR_URL}/reader/mark_story_hashes_as_read",
+                data=[("story_hash", story_hash) for story_hash in chunk],
                 timeout=DEFAULT_TIMEOUT,
             )
         except requests.exceptions.RequestException as e:
             logging.error(f"Failed to mark stories as read: {e}")
-            continue
+            return False
         if response.status_code != 200:
             logging.error(
                 f"Failed to mark stories as read: {response.status_code}")
-        else:
-            logging.info(f"Marked {len(stories)} stories as read")
+            return False
+        return True
+
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(chunks)))) as executor:
+        results = list(executor.map(post, chunks))
+    failed = [h for chunk, ok in zip(chunks, results) if not ok for h in chunk]
+    logging.info(f"Marked {len(story_hashes) - len(failed)} stories as read")
+    return failed
+
+
+def mark_stories_as_read(
+    session: requests.Session,
+    feeds: list[Feed],
+    journal: Optional[MarkReadJournal] = None,
+    concurrency: int = MARK_READ_CONCURRENCY,
+) -> None:
+    if not feeds:
+        return None
+    # Preserve order while dropping duplicates (a story may sit in two feeds)
+    story_hashes = list(dict.fromkeys(
+        h for feed in feeds for story in feed.stories for h in story.covered_hashes
+    ))
+    failed = mark_story_hashes_as_read(session, story_hashes, concurrency)
+    if failed and journal is not None:
+        journal.add(failed)
+        logging.info(f"Queued {len(failed)} stories to mark as read on the next run")
+
+
+def replay_mark_read_journal(
+    session: requests.Session,
+    journal: MarkReadJournal,
+    concurrency: int = MARK_READ_CONCURRENCY,
+) -> None:
+    """Retry mark-as-read requests that failed in earlier runs."""
+    pending = journal.pending()
+    if not pending:
+        return
+    logging.info(f"Replaying {len(pending)} pending mark-as-read hashes")
+    failed = set(mark_story_hashes_as_read(session, pending, concurrency))
+    journal.remove([h for h in pending if h not in failed])
+
+
+def get_openai_client():
+    global openai
+    if openai is None:
+        from openai import DefaultHttpxClient, OpenAI
+
+        openai = OpenAI(
+            http_client=DefaultHttpxClient(event_hooks={"response": [observe_openai_response]})
+        )
+    return openai
+
+
+def observe_openai_response(response) -> None:
+    # Sees every attempt, including the ones the SDK retries itself
+    if response.status_code == 429:
+        metrics.incr("openai_rate_limited")
+    openai_limiter.observe(response.status_code, response.headers)
+
 
+def request_tokens(messages: list[dict]) -> int:
+    """Tokens a completion for ``messages`` is expected to use, for the rate limiter."""
+    prompt = sum(estimate_tokens(message["content"]) for message in messages)
+    return prompt + (MAX_TOKENS or COMPLETION_TOKEN_ESTIMATE)
 
-def summarize_stories(feeds: list[Feed], model_id: str) -> str | None:
-    content = "Please summarize the following articles.\n\n"
+
+def estimate_tokens(text: str) -> int:
+    # Local tokenizer when available, else ~4 characters per token (see tokens.py)
+    return count_tokens(text)
+
+
+def feed_prompt(feed: Feed) -> str:
+    return "".join([feed_header(feed), *(story_prompt(story) for story in feed.stories)])
+
+
+def feed_header(feed: Feed) -> str:
+    return f"Feed: {feed.title}\n"
+
+
+def story_prompt(story: Story, content: Optional[str] = None) -> str:
+    content = story.content_text if content is None else content
+    also_at = ""
+    if story.duplicates:
+        also_at = f"Also at: {' '.join(d.permalink for d in story.duplicates)}\n"
+    return f"Title: {story.title}\nContent: {content}\nLink: {story.permalink}\n{also_at}\n"
+
+
+def precompress_stories(feeds: list[Feed], budget: int) -> int:
+    """Keep only the most central sentences of story content over ``budget`` tokens.
+
+    All stories of ``feeds`` are ranked as one batch. Returns the number of
+    content tokens saved.
+    """
+    if budget <= 0:
+        return 0
+    stories = [story for feed in feeds for story in feed.stories or []]
+    texts = compress_texts([story.content_text for story in stories], budget)
+    saved = 0
+    for story, text in zip(stories, texts):
+        if text != story.content_text:
+            saved += estimate_tokens(story.content_text) - estimate_tokens(text)
+            if story.source_text is None:
+                story.source_text = story.content_text
+            story.content_text = text
+    if saved:
+        logging.info(f"Pre-compression saved {saved} tokens of story content")
+    metrics.incr("precompressed_tokens_saved", saved)
+    return saved
+
+
+def fit_prompt_budget(feeds: list[Feed], budget: int) -> int:
+    """Trim story content so the prompts for ``feeds`` fit in ``budget`` tokens.
+
+    Feed titles, story titles and links are always kept. The tokens left for
+    content are split max-min fairly, first between feeds and then between
+    the stories of each feed, so the longest content is trimmed first and a
+    feed with many long stories cannot crowd out the others. Returns the
+    number of content tokens removed.
+    """
+    if budget <= 0:
+        return 0
+    fixed = 0
+    demands: list[list[int]] = []
     for feed in feeds:
-        content += f"Feed: {feed.title}\n"
-        for story in feed.stories:
-            content += f"Title: {story.title}\n"
-            content += f"Content: {story.content_text}\n"
-            content += f"Link: {story.permalink}\n\n"
-    messages = [
+        fixed += estimate_tokens(feed_header(feed))
+        fixed += sum(estimate_tokens(story_prompt(story, "")) for story in feed.stories or [])
+        demands.append([estimate_tokens(story.content_text) for story in feed.stories or []])
+    available = max(0, budget - fixed)
+    if sum(map(sum, demands)) <= available:
+        return 0
+
+    removed = 0
+    feed_shares = fair_shares([sum(d) for d in demands], available)
+    for feed, story_demands, feed_share in zip(feeds, demands, feed_shares):
+        story_shares = fair_shares(story_demands, feed_share)
+        for story, demand, share in zip(feed.stories or [], story_demands, story_shares):
+            if share < demand:
+                if story.source_text is None:
+                    story.source_text = story.content_text
+                story.content_text = truncate_tokens(story.content_text, share)
+                removed += demand - share
+    logging.info(f"Trimmed {removed} tokens of story content to fit a {budget}-token budget")
+    metrics.incr("prompt_tokens_trimmed", removed)
+    return removed
+
+
+def chunk_by_tokens(items: list, costs: list[int], budget: int) -> list[list]:
+    """Greedily group ``items`` in order so each chunk's cost stays within budget.
+
+    An item that exceeds ``budget`` on its own gets a chunk to itself.
+    """
+    chunks: list[list] = []
+    current: list = []
+    used = 0
+    for item, cost in zip(items, costs):
+        if current and used + cost > budget:
+            chunks.append(current)
+            current, used = [], 0
+        current.append(item)
+        used += cost
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+@metrics.timed("summarize_stories")
+def summarize_stories(
+    feeds: list[Feed],
+    model_id: str,
+    chunk_tokens: int = SUMMARY_CHUNK_TOKENS,
+    concurrency: int = SUMMARY_CONCURRENCY,
+) -> tuple[list[Feed], str | None]:
+    """Summarize ``feeds`` and return the feeds the digest covers, and the digest.
+
+    Feeds of a map-reduce chunk whose completion failed are not in the
+    digest, so they are left out of the returned feeds as well.
+    """
+    if summary_store is not None:
+        return feeds, summarize_stories_memoized(
+            feeds, model_id, summary_store, chunk_tokens, concurrency
+        )
+    feed_prompts = [feed_prompt(feed) for feed in feeds]
+    costs = [estimate_tokens(p) for p in feed_prompts]
+    if chunk_tokens > 0 and sum(costs) > chunk_tokens:
+        chunks = chunk_by_tokens(list(zip(feeds, feed_prompts)), costs, chunk_tokens)
+        if len(chunks) > 1:
+            return summarize_chunks(chunks, model_id, concurrency)
+    return feeds, summarize_prompt("".join(feed_prompts), model_id)
+
+
+def summarize_chunks(
+    chunks: list[list[tuple[Feed, str]]], model_id: str, concurrency: int
+) -> tuple[list[Feed], str]:
+    """Map: summarize each chunk of (feed, prompt) pairs in parallel. Reduce: merge."""
+    logging.info(f"Summarizing {len(chunks)} chunks with up to {concurrency} in parallel")
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(chunks)))) as executor:
+        partials = list(executor.map(
+            lambda chunk: summarize_chunk([prompt for _, prompt in chunk], model_id), chunks
+        ))
+    return merge_chunk_digests([[feed for feed, _ in chunk] for chunk in chunks], partials)
+
+
+def merge_chunk_digests(
+    chunks: list[list[Feed]], partials: list[Optional[str]]
+) -> tuple[list[Feed], str]:
+    """Merge the digests of the chunks that succeeded and return their feeds with it."""
+    if not any(partials):
+        raise RuntimeError("All summary chunks failed")
+    if len(partials) == 1:
+        return chunks[0], partials[0]
+    failed = sum(len(chunk) for chunk, partial in zip(chunks, partials) if not partial)
+    if failed:
+        logging.error(f"Left {failed} feeds of failed summary chunks out of the digest")
+        metrics.incr("summary_feeds_failed", failed)
+    summarized = [feed for chunk, partial in zip(chunks, partials) if partial for feed in chunk]
+    return summarized, merge_digests([p for p in partials if p])
+
+
+def summarize_chunk(chunk: list[str], model_id: str) -> Optional[str]:
+    try:
+        return summarize_prompt("".join(chunk), model_id)
+    except Exception as e:
+        logging.error(f"Failed to summarize chunk: {e}")
+        return None
+
+
+def merge_digests(partials: list[str]) -> str:
+    """Concatenate partial digests, renumbering top-level feed entries."""
+    feed_number = 0
+    lines = []
+    for partial in partials:
+        for line in partial.strip().splitlines():
+            match = re.match(r"^\d+\.\s", line)
+            if match:
+                feed_number += 1
+                line = f"{feed_number}. {line[match.end():]}"
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def summary_messages(feeds_content: str) -> list[dict]:
+    content = "Please summarize the following articles.\n\n" + feeds_content
+    return [
         {"role": "system", "content": SYSTEM_PROMPT},
         {
             "role": "user",
             "content": content,
         },
     ]
-    response = openai.chat.completions.create(
-        model=model_id,
-        messages=messages,
-        max_completion_tokens=MAX_TOKENS,
-        temperature=TEMPERATURE,
-    )
+
+
+def summarize_prompt(feeds_content: str, model_id: str) -> str | None:
+    messages = summary_messages(feeds_content)
+    with openai_limiter.reserve(request_tokens(messages)) as reservation:
+        response = get_openai_client().chat.completions.create(
+            model=model_id,
+            messages=messages,
+            max_completion_tokens=MAX_TOKENS,
+            temperature=TEMPERATURE,
+        )
+        reservation.used = record_openai_usage(response)
     return response.choices[0].message.content
 
 
-def send_to_slack(summary: str, webhook_url: str | None) -> None:
+def stream_prompt(feeds_content: str, model_id: str) -> Iterator[str]:
+    """Like summarize_prompt, but yield the completion text as it is generated.
+
+    Someone is waiting on the streamed digest, so it is queued ahead of
+    other completions.
+    """
+    messages = summary_messages(feeds_content)
+    with openai_limiter.reserve(request_tokens(messages), priority=0) as reservation:
+        stream = get_openai_client().chat.completions.create(
+            model=model_id,
+            messages=messages,
+            max_completion_tokens=MAX_TOKENS,
+            temperature=TEMPERATURE,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        metrics.incr("openai_requests")
+        for chunk in stream:
+            # The final chunk carries usage and no choices
+            if getattr(chunk, "usage", None) is not None:
+                metrics.incr("openai_prompt_tokens", chunk.usage.prompt_tokens or 0)
+                metrics.incr("openai_completion_tokens", chunk.usage.completion_tokens or 0)
+                reservation.used = (chunk.usage.prompt_tokens or 0) + (
+                    chunk.usage.completion_tokens or 0
+                )
+            for choice in chunk.choices:
+                if choice.delta.content:
+                    yield choice.delta.content
+
+
+def iter_digest_sections(deltas: Iterable[str]) -> Iterator[str]:
+    """Regroup streamed digest text into one section per top-level feed entry.
+
+    A section is yielded as soon as the next feed heading starts, so it can be
+    delivered while the rest of the digest is still being generated.
+    """
+    section: list[str] = []
+    partial = ""
+    # A trailing newline flushes the last line once the stream ends
+    for delta in chain(deltas, ["\n"]):
+        partial += delta
+        *lines, partial = partial.split("\n")
+        for line in lines:
+            if re.match(r"^\d+\.\s", line) and "".join(section).strip():
+                yield "\n".join(section).strip()
+                section = []
+            section.append(line)
+    if "".join(section).strip():
+        yield "\n".join(section).strip()
+
+
+def record_openai_usage(response) -> Optional[int]:
+    """Count the response's token usage in the run metrics and return its total."""
+    metrics.incr("openai_requests")
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return None
+    metrics.incr("openai_prompt_tokens", usage.prompt_tokens or 0)
+    metrics.incr("openai_completion_tokens", usage.completion_tokens or 0)
+    return (usage.prompt_tokens or 0) + (usage.completion_tokens or 0)
+
+
+def summarize_stories_memoized(
+    feeds: list[Feed],
+    model_id: str,
+    store: SummaryStore,
+    chunk_tokens: int = SUMMARY_CHUNK_TOKENS,
+    concurrency: int = SUMMARY_CONCURRENCY,
+) -> str | None:
+    """Summarize stories per story, reusing summaries from ``store``.
+
+    Only stories without a stored summary for their fetched content and
+    ``model_id`` are sent to the model; the digest is then assembled locally.
+    """
+    stories = [story for feed in feeds for story in feed.stories]
+    # Keyed on the fetched content: what compression and trimming keep of a
+    # story depends on the rest of the run, which must not defeat the store
+    keys = [
+        SummaryStore.key(
+            s.hash, s.content_text if s.source_text is None else s.source_text, model_id
+        )
+        for s in stories
+    ]
+    summaries = store.get_many(keys)
+    delta = [(story, key) for story, key in zip(stories, keys) if key not in summaries]
+    metrics.incr("summary_store_hits", len(stories) - len(delta))
+    metrics.incr("summary_store_misses", len(delta))
+    logging.info(
+        f"Summary store: {len(stories) - len(delta)} reused, {len(delta)} to summarize"
+    )
+    if delta:
+        fresh = summarize_story_batches(
+            [story for story, _ in delta], model_id, chunk_tokens, concurrency
+        )
+        new_summaries = {key: text for (_, key), text in zip(delta, fresh) if text}
+        store.put_many(new_summaries)
+        summaries.update(new_summaries)
+    return format_digest(feeds, [summaries.get(key) for key in keys])
+
+
+def summarize_story_batches(
+    stories: list[Story], model_id: str, chunk_tokens: int, concurrency: int
+) -> list[Optional[str]]:
+    """Split stories into token-bounded batches and summarize them in parallel."""
+    if chunk_tokens <= 0:
+        return summarize_story_batch(stories, model_id)
+    costs = [estimate_tokens(story.title + story.content_text) for story in stories]
+    batches = chunk_by_tokens(stories, costs, chunk_tokens)
+    if len(batches) == 1:
+        return summarize_story_batch(stories, model_id)
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(batches)))) as executor:
+        results = executor.map(lambda batch: summarize_story_batch(batch, model_id), batches)
+        return [summary for batch in results for summary in batch]
+
+
+def summarize_story_batch(stories: list[Story], model_id: str) -> list[Optional[str]]:
+    """Ask the model for one summary per story in a single JSON completion."""
+    parts = ["Please summarize the following articles.\n\n"]
+    for n, story in enumerate(stories, start=1):
+        parts.append(f"ID: {n}\nTitle: {story.title}\nContent: {story.content_text}\n\n")
+    messages = [
+        {"role": "system", "content": STORY_SUMMARY_PROMPT},
+        {"role": "user", "content": "".join(parts)},
+    ]
+    with openai_limiter.reserve(request_tokens(messages)) as reservation:
+        response = get_openai_client().chat.completions.create(
+            model=model_id,
+            messages=messages,
+            max_completion_tokens=MAX_TOKENS,
+            temperature=TEMPERATURE,
+            response_format={"type": "json_object"},
+        )
+        reservation.used = record_openai_usage(response)
+    try:
+        data = json.loads(response.choices[0].message.content or "{}")
+    except ValueError:
+        raise ValueError("Story summary response was not valid JSON")
+    results: list[Optional[str]] = []
+    for n, story in enumerate(stories, start=1):
+        text = data.get(str(n))
+        if isinstance(text, str) and text.strip():
+            results.append(text.strip())
+        else:
+            logging.warning(f"No summary returned for story {story.hash}")
+            results.append(None)
+    return results
+
+
+def format_digest(feeds: list[Feed], summaries: list[Optional[str]]) -> str:
+    """Render per-story summaries, given in feed/story order, as in SYSTEM_PROMPT."""
+    remaining = iter(summaries)
+    lines = []
+    for feed_number, feed in enumerate(feeds, start=1):
+        lines.append(f"{feed_number}. *{feed.title}*")
+        for story_number, story in enumerate(feed.stories, start=1):
+            summary = next(remaining, None)
+            text = f" - {summary}" if summary else ""
+            also_at = "".join(
+                f" <{d.permalink}|[{site_name(d.permalink)}]>" for d in story.duplicates
+            )
+            lines.append(
+                f"  {story_number}. *{story.title}*{text} <{story.permalink}|[Read more]>"
+                f"{also_at}"
+            )
+    return "\n".join(lines)
+
+
+def site_name(url: str) -> str:
+    host = urlsplit(url).hostname or url
+    return host[4:] if host.startswith("www.") else host
+
+
+def send_to_slack(summary: str, webhook_url: str | None) -> bool:
+    return post_webhook_message(f"{SLACK_INTRO}{summary}", webhook_url)
+
+
+@metrics.timed("send_to_slack")
+def post_webhook_message(text: str, webhook_url: str | None) -> bool:
     if not webhook_url:
         logging.error("SLACK_WEBHOOK_URL is not set; skipping Slack notification")
-        return
+        return False
     slack_data = {
-        "text": f"Here is the latest summarized news:\n\n{summary}",
+        "text": text,
         "unfurl_links": False,
         "unfurl_media": False,
     }
+    metrics.incr("slack_requests")
     try:
         response = requests.post(
             webhook_url,
@@ -217,7 +1195,7 @@ def send_to_slack(summary: str, webhook_url: str | None) -> None:
         )
     except requests.exceptions.RequestException as e:
         logging.error(f"Failed to send message to Slack: {e}")
-        return
+        return False
     if response.status_code != 200:
         # Avoid logging full response body; include brief tail for diagnostics
         snippet = getattr(response, "text", "")
@@ -225,29 +1203,423 @@ def send_to_slack(summary: str, webhook_url: str | None) -> None:
             snippet = snippet[:200]
         logging.error(
             f"Failed to send message to Slack: {response.status_code} {snippet}")
+        return False
+    return True
 
 
-def fetch_webpage(url: str) -> Optional[str]:
+@metrics.timed("send_to_slack")
+def post_slack_message(
+    text: str, bot_token: str, channel: str, thread_ts: Optional[str] = None
+) -> Optional[str]:
+    """Post ``text`` with chat.postMessage and return the message ``ts``, or None."""
+    slack_data = {
+        "channel": channel,
+        "text": text,
+        "unfurl_links": False,
+        "unfurl_media": False,
+    }
+    if thread_ts:
+        slack_data["thread_ts"] = thread_ts
+    metrics.incr("slack_requests")
     try:
-        response = requests.get(url, timeout=DEFAULT_TIMEOUT)
-    except requests.exceptions.RequestException as e:
-        logging.error(f"Failed to fetch content for {url}: {e}")
+        response = requests.post(
+            f"{SLACK_API_URL}/chat.postMessage",
+            json=slack_data,
+            headers={"Authorization": f"Bearer {bot_token}"},
+            timeout=DEFAULT_TIMEOUT,
+        )
+        response.raise_for_status()
+        data = response.json()
+    except (requests.exceptions.RequestException, ValueError) as e:
+        logging.error(f"Failed to send message to Slack: {e}")
         return None
-    if response.status_code != 200:
-        logging.error(
-            f"Failed to fetch content for {url}: {response.status_code}")
+    if not data.get("ok"):
+        logging.error(f"Failed to send message to Slack: {data.get('error')}")
         return None
-    page_text = clean_html(response.content)
+    return data.get("ts")
+
+
+def stream_summary_to_slack(
+    feeds: list[Feed],
+    model_id: str,
+    webhook_url: str | None,
+    bot_token: Optional[str] = None,
+    channel: Optional[str] = None,
+) -> tuple[str, bool]:
+    """Stream the digest and post each feed's section to Slack as it completes.
+
+    Sections are posted in order. With ``bot_token`` and ``channel`` later
+    sections are threaded under the first message; incoming webhooks cannot
+    reply in threads, so otherwise each section is posted to the webhook as
+    its own message. Returns the digest text and whether every section was
+    delivered.
+    """
+    if summary_store is not None:
+        # Memoized summaries are assembled locally; only delivery is progressive
+        deltas: Iterable[str] = [summarize_stories(feeds, model_id)[1] or ""]
+    else:
+        deltas = stream_prompt("".join(feed_prompt(feed) for feed in feeds), model_id)
+    start = time.perf_counter()
+    sections: list[str] = []
+    thread_ts = None
+    for section in iter_digest_sections(deltas):
+        text = section if sections else f"{SLACK_INTRO}{section}"
+        if bot_token and channel:
+            ts = post_slack_message(text, bot_token, channel, thread_ts)
+            sent = ts is not None
+            thread_ts = thread_ts or ts
+        else:
+            sent = post_webhook_message(text, webhook_url)
+        if not sent:
+            return "\n".join(sections + [section]), False
+        if not sections:
+            metrics.record_stage("slack_first_message", time.perf_counter() - start)
+        sections.append(section)
+    return "\n".join(sections), bool(sections)
+
+
+@metrics.timed("fetch_webpage")
+def fetch_webpage(url: str, session: Optional[requests.Session] = None) -> Optional[str]:
+    """Return the text of the page at ``url``, through the page cache when enabled.
+
+    When the request fails, or the server answers with a 5xx or 429 (after
+    retries), a stale cached copy is served rather than nothing.
+    """
+    cache = page_cache
+    cached = cache.get(url) if cache is not None else None
+    stale = cached.text if cached is not None else None
+    if cached is not None and cache.is_fresh(cached):
+        metrics.incr("page_cache_hits")
+        return cached.text
+    if cache is not None:
+        metrics.incr("page_cache_misses")
+
+    headers = {}
+    if cached is not None:
+        if cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+
+    get = session.get if session is not None else requests.get
+    metrics.incr("page_requests")
+    try:
+        response = get(url, headers=headers or None, timeout=DEFAULT_TIMEOUT, stream=True)
+    except requests.exceptions.RequestException as e:
+        logging.error(f"Failed to fetch content for {url}: {e}")
+        return stale
+    try:
+        if response.status_code == 304 and cached is not None:
+            metrics.incr("page_cache_revalidated")
+            cache.touch(url)
+            return cached.text
+        if response.status_code != 200:
+            logging.error(
+                f"Failed to fetch content for {url}: {response.status_code}")
+            if response.status_code >= 500 or response.status_code == 429:
+                return stale
+            return None
+        content_type, charset = parse_content_type(response.headers.get("Content-Type"))
+        if content_type and content_type not in FETCH_CONTENT_TYPES:
+            logging.info(f"Skipping {url}: unsupported content type {content_type}")
+            return None
+        page_text = read_page_text(response, url, charset)
+    finally:
+        response.close()
+    if page_text is None:
+        # The body could not be read
+        return stale
+    if cache is not None and page_text:
+        cache.put(
+            url,
+            page_text,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
     return page_text
 
 
+def parse_content_type(header: Optional[str]) -> tuple[str, str]:
+    """Split a Content-Type header into its lowercased media type and charset."""
+    if not header:
+        return "", "utf-8"
+    media_type, _, params = header.partition(";")
+    charset = "utf-8"
+    for param in params.split(";"):
+        name, _, value = param.strip().partition("=")
+        if name.lower() == "charset" and value:
+            charset = value.strip("\"' ")
+    return media_type.strip().lower(), charset
+
+
+@metrics.timed("read_page_text")
+def read_page_text(
+    response: requests.Response, url: str, charset: str = "utf-8"
+) -> Optional[str]:
+    """Stream ``response`` into the text extractor, stopping at ``FETCH_MAX_BYTES``.
+
+    With ``MAIN_CONTENT_EXTRACTION`` the capped page is read and reduced to its
+    main article text, falling back to the full page text when no article is
+    found. Otherwise only as much of the body is read as is needed to produce
+    ``MAX_CONTENT_LENGTH`` characters of text.
+    """
+    def capped_chunks():
+        received = 0
+        for chunk in response.iter_content(chunk_size=FETCH_CHUNK_SIZE):
+            if received + len(chunk) >= FETCH_MAX_BYTES:
+                metrics.incr("page_bytes", FETCH_MAX_BYTES - received)
+                yield chunk[:FETCH_MAX_BYTES - received]
+                logging.info(f"Stopped reading {url} at {FETCH_MAX_BYTES} bytes")
+                return
+            received += len(chunk)
+            metrics.incr("page_bytes", len(chunk))
+            yield chunk
+
+    try:
+        if MAIN_CONTENT_EXTRACTION:
+            html = "".join(decode_chunks(capped_chunks(), charset))
+            try:
+                main_text = extract_main_text(html)
+            except Exception as e:
+                logging.error(f"Failed to extract main content for {url}: {e}")
+                main_text = None
+            if main_text:
+                return main_text[:MAX_CONTENT_LENGTH]
+            return extract_text(html, limit=MAX_CONTENT_LENGTH)
+        return extract_text_from_chunks(
+            decode_chunks(capped_chunks(), charset), limit=MAX_CONTENT_LENGTH
+        )
+    except requests.exceptions.RequestException as e:
+        logging.error(f"Failed to read content for {url}: {e}")
+        return None
+    except Exception as e:
+        logging.error(f"Failed to clean HTML: {e}")
+        return ""
+
+
+def run_pipelined(
+    session: requests.Session,
+    feeds: list[Feed],
+    model_id: Optional[str],
+    fetch_workers: int = FETCH_CONCURRENCY,
+    fallback_workers: int = FALLBACK_CONCURRENCY,
+    chunk_tokens: int = SUMMARY_CHUNK_TOKENS,
+    summary_workers: int = SUMMARY_CONCURRENCY,
+    checkpoint: Optional[SyncCheckpoint] = None,
+    queue_size: int = PIPELINE_QUEUE_SIZE,
+    dedupe: bool = True,
+    prompt_budget: int = 0,
+    precompress_tokens: int = 0,
+) -> tuple[list[Feed], Optional[str]]:
+    """Fetch, complete and summarize feeds as overlapping stages.
+
+    Each feed moves on to the page-fallback stage as soon as its stories are
+    fetched, while other feeds are still downloading. Finished feeds are
+    released in their original order, stripped of near-duplicates of stories
+    released before them, and grouped into chunks of up to ``chunk_tokens``;
+    each chunk is summarized as soon as it is full. Released feeds are
+    pre-compressed to ``precompress_tokens`` per story, one feed at a time.
+    With ``prompt_budget``, each feed's content is trimmed to an equal share
+    of it on release, since the feeds still to come are not known yet.
+    Returns the feeds the digest covers and the merged digest; feeds of a
+    chunk whose completion failed are left out of both. Without a digest,
+    because ``model_id`` is None or there is nothing to summarize, every
+    feed with stories is returned with None.
+    """
+    pages = web_session or create_web_session()
+
+    def fetch(feed: Feed) -> Optional[Feed]:
+        stories = fetch_feed_stories(session, feed, fetch_fallback=False)
+        if stories is None:
+            return None
+        feed.stories = stories
+        if checkpoint is not None:
+            drop_processed_stories([feed], checkpoint)
+        return feed if feed.stories else None
+
+    def complete(feed: Feed) -> Feed:
+        fetch_fallback_content([feed], concurrency=1, session=pages)
+        return feed
+
+    stages = [("fetch", fetch, fetch_workers), ("fallback", complete, fallback_workers)]
+    # Memoized summaries are per story, so the store path summarizes at the end
+    overlap_summaries = model_id is not None and summary_store is None
+    duplicates = DuplicateIndex() if dedupe else None
+    feed_budget = max(1, prompt_budget // max(1, len(feeds))) if prompt_budget > 0 else 0
+    feeds_with_stories: list[Feed] = []
+    finished: dict[int, Optional[Feed]] = {}
+    next_index = 0
+    # Prompts are rendered on submit so "Also at" links found meanwhile are kept
+    chunk: list[Feed] = []
+    used = 0
+    chunks: list[list[Feed]] = []
+    futures = []
+
+    def submit(chunk: list[Feed]) -> None:
+        prompts = [feed_prompt(feed) for feed in chunk]
+        chunks.append(chunk)
+        futures.append(executor.submit(summarize_chunk, prompts, model_id))
+
+    executor = ThreadPoolExecutor(max_workers=max(1, summary_workers))
+    try:
+        for index, feed in iter_pipeline(feeds, stages, queue_size):
+            finished[index] = feed
+            while next_index in finished:
+                ready = finished.pop(next_index)
+                next_index += 1
+                if ready is None:
+                    continue
+                if duplicates is not None:
+                    removed = drop_near_duplicates([ready], duplicates)
+                    metrics.incr("near_duplicate_stories", removed)
+                    if not ready.stories:
+                        continue
+                precompress_stories([ready], precompress_tokens)
+                fit_prompt_budget([ready], feed_budget)
+                feeds_with_stories.append(ready)
+                if not overlap_summaries:
+                    continue
+                cost = estimate_tokens(feed_prompt(ready))
+                if chunk and chunk_tokens > 0 and used + cost > chunk_tokens:
+                    submit(chunk)
+                    chunk, used = [], 0
+                chunk.append(ready)
+                used += cost
+        if chunk:
+            submit(chunk)
+        partials = [future.result() for future in futures]
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        if pages is not web_session:
+            pages.close()
+
+    if model_id is None or not feeds_with_stories:
+        return feeds_with_stories, None
+    if not overlap_summaries:
+        return summarize_stories(feeds_with_stories, model_id, chunk_tokens, summary_workers)
+    if len(partials) > 1:
+        logging.info(f"Summarized {len(partials)} chunks while fetching")
+    return merge_chunk_digests(chunks, partials)
+
+
+def emit_run_report(
+    report_path: Optional[str] = None, textfile_path: Optional[str] = None
+) -> dict:
+    """Log the run's metrics as one JSON line and write the optional report files."""
+    report = metrics.report()
+    logging.info(f"Run report: {json.dumps(report, sort_keys=True)}")
+    try:
+        if report_path:
+            write_json_report(report, report_path)
+        if textfile_path:
+            write_prometheus_textfile(report, textfile_path)
+    except OSError as e:
+        logging.error(f"Failed to write run report: {e}")
+    return report
+
+
 def main():
-    NEWSBLUR_USERNAME = os.getenv("NEWSBLUR_USERNAME")
-    NEWSBLUR_PASSWORD = os.getenv("NEWSBLUR_PASSWORD")
-    MODEL_ID = os.getenv("MODEL_ID")
-    WEBHOOK_URL = os.getenv("SLACK_WEBHOOK_URL")
-    MARK_STORIES_AS_READ = os.getenv(
+    run_digest()
+
+
+def run_digest(configure_shared: bool = True) -> dict:
+    """Run one digest (or one batch of them) and emit and return the run report.
+
+    The service calls this with ``configure_shared=False`` after
+    ``keep_state_warm()`` so every run reuses the same sessions and caches.
+    """
+    metrics.reset()
+    try:
+        if os.getenv("BATCH_CONFIG_PATH"):
+            run_batch(os.getenv("BATCH_CONFIG_PATH"), configure_shared)
+        else:
+            run_pipeline(configure_shared=configure_shared)
+    finally:
+        report = emit_run_report(os.getenv("RUN_REPORT_PATH"), os.getenv("METRICS_TEXTFILE_PATH"))
+    return report
+
+
+def keep_state_warm(env: Mapping[str, str] = os.environ) -> None:
+    """Configure shared state once for a long-running process.
+
+    NewsBlur sessions, the connection pools and the caches then stay open
+    between runs. Without PAGE_CACHE_PATH, pages are cached in memory.
+    """
+    global page_cache, newsblur_adapter, web_session, warm_sessions
+    configure_shared_state(env)
+    if page_cache is None:
+        page_cache = PageCache(
+            ":memory:",
+            max_age=env_int("PAGE_CACHE_MAX_AGE", PAGE_CACHE_MAX_AGE, env),
+            max_bytes=env_int("PAGE_CACHE_MAX_BYTES", PAGE_CACHE_MAX_BYTES, env),
+        )
+    newsblur_adapter = create_shared_newsblur_adapter(env)
+    web_session = create_web_session()
+    warm_sessions = {}
+
+
+def configure_shared_state(env: Mapping[str, str] = os.environ) -> None:
+    """Set up the HTTP policy, caches and stores shared by every run in this process."""
+    global page_cache, summary_store, retry_policy, circuit_breaker, newsblur_hedge_delay
+    global openai_limiter
+    PAGE_CACHE_PATH = env.get("PAGE_CACHE_PATH")
+    SUMMARY_STORE_PATH = env.get("SUMMARY_STORE_PATH")
+    retry_policy = RetryPolicy(
+        max_retries=env_int("HTTP_MAX_RETRIES", HTTP_MAX_RETRIES, env),
+        backoff_base=env_float("HTTP_BACKOFF_BASE", HTTP_BACKOFF_BASE, env),
+        backoff_max=env_float("HTTP_BACKOFF_MAX", HTTP_BACKOFF_MAX, env),
+    )
+    circuit_breaker = CircuitBreaker(
+        failure_threshold=env_int("BREAKER_FAILURE_THRESHOLD", BREAKER_FAILURE_THRESHOLD, env),
+        reset_timeout=env_float("BREAKER_RESET_TIMEOUT", BREAKER_RESET_TIMEOUT, env),
+    )
+    newsblur_hedge_delay = env_float("NEWSBLUR_HEDGE_DELAY", NEWSBLUR_HEDGE_DELAY, env) or None
+    openai_limiter = RateLimiter(
+        env_int("OPENAI_RPM_LIMIT", OPENAI_RPM_LIMIT, env),
+        env_int("OPENAI_TPM_LIMIT", OPENAI_TPM_LIMIT, env),
+    )
+    if PAGE_CACHE_PATH:
+        page_cache = PageCache(
+            PAGE_CACHE_PATH,
+            max_age=env_int("PAGE_CACHE_MAX_AGE", PAGE_CACHE_MAX_AGE, env),
+            max_bytes=env_int("PAGE_CACHE_MAX_BYTES", PAGE_CACHE_MAX_BYTES, env),
+        )
+    if SUMMARY_STORE_PATH:
+        summary_store = SummaryStore(
+            SUMMARY_STORE_PATH,
+            max_age=env_int("SUMMARY_STORE_MAX_AGE", SUMMARY_STORE_MAX_AGE, env),
+        )
+
+
+def run_pipeline(env: Mapping[str, str] = os.environ, configure_shared: bool = True) -> bool:
+    """Run one digest with settings from ``env``.
+
+    Returns False when the run failed (configuration, login, summarization
+    or delivery) and True when it finished, including runs that found
+    nothing new to summarize. Batch mode configures the shared state once
+    and passes ``configure_shared=False`` for each account.
+    """
+    NEWSBLUR_USERNAME = env.get("NEWSBLUR_USERNAME")
+    NEWSBLUR_PASSWORD = env.get("NEWSBLUR_PASSWORD")
+    MODEL_ID = env.get("MODEL_ID")
+    WEBHOOK_URL = env.get("SLACK_WEBHOOK_URL")
+    MARK_STORIES_AS_READ = env.get(
         "MARK_STORIES_AS_READ", "false").lower() == "true"
+    FETCH_WORKERS = env_int("FETCH_CONCURRENCY", FETCH_CONCURRENCY, env)
+    FALLBACK_WORKERS = env_int("FALLBACK_CONCURRENCY", FALLBACK_CONCURRENCY, env)
+    FETCH_MODE = env.get("FETCH_MODE", "feed").lower()
+    SYNC_CHECKPOINT_PATH = env.get("SYNC_CHECKPOINT_PATH")
+    MARK_READ_JOURNAL_PATH = env.get("MARK_READ_JOURNAL_PATH")
+    NEWSBLUR_SESSION_PATH = env.get("NEWSBLUR_SESSION_PATH")
+    CHUNK_TOKENS = env_int("SUMMARY_CHUNK_TOKENS", SUMMARY_CHUNK_TOKENS, env)
+    SUMMARY_WORKERS = env_int("SUMMARY_CONCURRENCY", SUMMARY_CONCURRENCY, env)
+    SLACK_STREAMING = env.get("SLACK_STREAMING", "false").lower() == "true"
+    SLACK_BOT_TOKEN = env.get("SLACK_BOT_TOKEN")
+    SLACK_CHANNEL = env.get("SLACK_CHANNEL")
+    PIPELINED = env.get("PIPELINED", "false").lower() == "true"
+    DEDUPE_STORIES = env.get("DEDUPE_STORIES", "true").lower() == "true"
+    PROMPT_BUDGET = env_int("PROMPT_TOKEN_BUDGET", PROMPT_TOKEN_BUDGET, env)
+    PRECOMPRESS = env_int("PRECOMPRESS_TOKENS", PRECOMPRESS_TOKENS, env)
 
     # Validate required configuration
     missing = []
@@ -257,47 +1629,190 @@ def main():
         missing.append("NEWSBLUR_PASSWORD")
     if not MODEL_ID:
         missing.append("MODEL_ID")
-    if not WEBHOOK_URL:
+    if not WEBHOOK_URL and not (SLACK_STREAMING and SLACK_BOT_TOKEN and SLACK_CHANNEL):
         missing.append("SLACK_WEBHOOK_URL")
     if missing:
         logging.error(f"Missing required environment variables: {', '.join(missing)}")
-        return
+        return False
+    if FETCH_MODE not in ("feed", "river"):
+        logging.error(f"Invalid FETCH_MODE {FETCH_MODE!r}; expected 'feed' or 'river'")
+        return False
 
-    session = authenticate_newsblur(NEWSBLUR_USERNAME, NEWSBLUR_PASSWORD)
+    if configure_shared:
+        configure_shared_state(env)
+
+    cookie_store = CookieStore(NEWSBLUR_SESSION_PATH) if NEWSBLUR_SESSION_PATH else None
+    session, feeds = connect_newsblur(NEWSBLUR_USERNAME, NEWSBLUR_PASSWORD, cookie_store)
     if not session:
         logging.info("No session")
-        return
+        return False
 
-    feeds = fetch_feeds(session)
+    journal = MarkReadJournal(MARK_READ_JOURNAL_PATH) if MARK_READ_JOURNAL_PATH else None
+    if journal is not None:
+        # Replay before fetching stories so they are not summarized again
+        replay_mark_read_journal(session, journal)
+
+    if feeds is None:
+        logging.error("Failed to fetch the feed list")
+        return False
     if not feeds:
         logging.info("No feeds")
-        return
+        return True
 
-    for feed in feeds:
-        feed.stories = fetch_feed_stories(session, feed)
+    checkpoint = SyncCheckpoint(SYNC_CHECKPOINT_PATH) if SYNC_CHECKPOINT_PATH else None
+    feeds = select_feeds_to_fetch(session, feeds, checkpoint)
+    if not feeds:
+        logging.info("No feeds with unread stories")
+        return True
+
+    # River mode fetches many feeds per request, so only feed mode pipelines
+    pipelined = PIPELINED and FETCH_MODE == "feed"
+    # Streamed digests are generated after fetching, as a single completion
+    summarized = pipelined and not SLACK_STREAMING
+    summary = None
+    if pipelined:
+        try:
+            with metrics.stage("phase.pipeline"):
+                feeds_with_stories, summary = run_pipelined(
+                    session,
+                    feeds,
+                    MODEL_ID if summarized else None,
+                    fetch_workers=FETCH_WORKERS,
+                    fallback_workers=FALLBACK_WORKERS,
+                    chunk_tokens=CHUNK_TOKENS,
+                    summary_workers=SUMMARY_WORKERS,
+                    checkpoint=checkpoint,
+                    dedupe=DEDUPE_STORIES,
+                    prompt_budget=PROMPT_BUDGET,
+                    precompress_tokens=PRECOMPRESS,
+                )
+        except Exception as e:
+            logging.error(f"Failed to summarize stories: {e}")
+            return False
+    else:
+        with metrics.stage("phase.fetch_stories"):
+            if FETCH_MODE == "river":
+                results = fetch_river_stories(session, feeds, fetch_fallback=False)
+            else:
+                results = fetch_all_feed_stories(
+                    session, feeds, concurrency=FETCH_WORKERS, fetch_fallback=False
+                )
+        for feed, stories in zip(feeds, results):
+            feed.stories = stories
+        if checkpoint is not None:
+            drop_processed_stories(feeds, checkpoint)
+
+        with metrics.stage("phase.fetch_fallback"):
+            fetch_fallback_content(feeds, concurrency=FALLBACK_WORKERS)
 
-    feeds_with_stories = [feed for feed in feeds if feed.stories]
+        if DEDUPE_STORIES:
+            with metrics.stage("phase.dedupe"):
+                removed = drop_near_duplicates(feeds)
+            metrics.incr("near_duplicate_stories", removed)
+            if removed:
+                logging.info(f"Folded {removed} near-duplicate stories into earlier ones")
+
+        feeds_with_stories = [feed for feed in feeds if feed.stories]
+        if PRECOMPRESS > 0:
+            with metrics.stage("phase.precompress"):
+                precompress_stories(feeds_with_stories, PRECOMPRESS)
+        with metrics.stage("phase.prompt_budget"):
+            fit_prompt_budget(feeds_with_stories, PROMPT_BUDGET)
     if not feeds_with_stories:
         logging.info("No feed stories")
-        return
+        return True
 
-    try:
-        summary = summarize_stories(feeds_with_stories, MODEL_ID)
-    except Exception as e:
-        logging.error(f"Failed to summarize stories: {e}")
-        return
+    sent = None
+    if not summarized:
+        try:
+            if SLACK_STREAMING:
+                # Sections are posted while the completion is still streaming
+                summary, sent = stream_summary_to_slack(
+                    feeds_with_stories,
+                    MODEL_ID,
+                    WEBHOOK_URL,
+                    bot_token=SLACK_BOT_TOKEN,
+                    channel=SLACK_CHANNEL,
+                )
+            else:
+                feeds_with_stories, summary = summarize_stories(
+                    feeds_with_stories,
+                    MODEL_ID,
+                    chunk_tokens=CHUNK_TOKENS,
+                    concurrency=SUMMARY_WORKERS,
+                )
+        except Exception as e:
+            logging.error(f"Failed to summarize stories: {e}")
+            return False
 
     if not summary:
         logging.error("Summarization returned no content; skipping Slack notification")
-        return
+        return False
 
     # Log only a snippet to avoid large logs
     logging.info(f"Summary (first 500 chars):\n\n{summary[:500]}")
 
-    send_to_slack(summary, WEBHOOK_URL)
+    if sent is None:
+        sent = send_to_slack(summary, WEBHOOK_URL)
+    if sent and checkpoint is not None:
+        checkpoint.mark_processed([
+            h for feed in feeds_with_stories for story in feed.stories
+            for h in story.covered_hashes
+        ])
 
     if MARK_STORIES_AS_READ:
-        mark_stories_as_read(session, feeds_with_stories)
+        mark_stories_as_read(session, feeds_with_stories, journal=journal)
+    return bool(sent)
+
+
+def run_batch(config_path: str, configure_shared: bool = True) -> list[AccountResult]:
+    """Run the digest for every account in the batch config at ``config_path``.
+
+    Accounts share the HTTP policy, page cache, summary store, OpenAI client
+    and connection pools. At most ``BATCH_CONCURRENCY`` accounts run at once,
+    and the shared NewsBlur pool blocks once ``BATCH_NEWSBLUR_CONNECTIONS``
+    requests are in flight, capping the load on NewsBlur across all accounts.
+    With ``BATCH_SHARD_COUNT`` above 1 only this worker's
+    ``BATCH_SHARD_INDEX`` share of the accounts runs. With
+    ``configure_shared=False`` the pools already set up by
+    ``keep_state_warm()`` are used and left open.
+    """
+    global newsblur_adapter, web_session
+    try:
+        accounts = shard_accounts(
+            load_batch_config(config_path),
+            env_int("BATCH_SHARD_INDEX", 0),
+            env_int("BATCH_SHARD_COUNT", 1),
+        )
+    except (OSError, ValueError) as e:
+        logging.error(f"Failed to load batch config: {e}")
+        return []
+    logging.info(f"Running digests for {len(accounts)} accounts from {config_path}")
+
+    if configure_shared:
+        configure_shared_state()
+        newsblur_adapter = create_shared_newsblur_adapter()
+        web_session = create_web_session()
+    try:
+        results = run_accounts(
+            accounts,
+            lambda account: run_pipeline(
+                ChainMap(account.settings, os.environ), configure_shared=False
+            ),
+            env_int("BATCH_CONCURRENCY", BATCH_CONCURRENCY),
+        )
+    finally:
+        if configure_shared:
+            web_session.close()
+            newsblur_adapter.close()
+            newsblur_adapter = web_session = None
+
+    failed = [result.name for result in results if not result.ok]
+    metrics.incr("batch_accounts", len(results))
+    metrics.incr("batch_failed_accounts", len(failed))
+    if failed:
+        logging.error(f"Digests failed for accounts: {', '.join(failed)}")
+    return results
 
 
 if __name__ == "__main__":
@@ -0,0 +1,120 @@
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+
+def peak_rss_bytes() -> Optional[int]:
+    if resource is None:
+        return None
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class RunMetrics:
+    """Thread-safe per-run stage timings and counters.
+
+    Stages record call counts and cumulative wall time; counters hold request
+    counts, bytes, cache hits and token usage. ``report()`` returns the run
+    as a JSON-serializable dict.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.started_at = time.time()
+            self._start = time.perf_counter()
+            self.stages: dict[str, dict[str, float]] = {}
+            self.counters: dict[str, int] = {}
+
+    def record_stage(self, name: str, seconds: float) -> None:
+        with self._lock:
+            stage = self.stages.setdefault(name, {"calls": 0, "seconds": 0.0})
+            stage["calls"] += 1
+            stage["seconds"] += seconds
+
+    def incr(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_stage(name, time.perf_counter() - start)
+
+    def timed(self, name: str):
+        """Decorator recording every call of the wrapped function as stage ``name``."""
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.stage(name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def report(self) -> dict:
+        with self._lock:
+            return {
+                "started_at": self.started_at,
+                "duration_seconds": round(time.perf_counter() - self._start, 6),
+                "peak_rss_bytes": peak_rss_bytes(),
+                "stages": {
+                    name: {"calls": int(s["calls"]), "seconds": round(s["seconds"], 6)}
+                    for name, s in self.stages.items()
+                },
+                "counters": dict(self.counters),
+            }
+
+
+def write_json_report(report: dict, path: str) -> None:
+    _write_atomic(path, json.dumps(report, indent=2, sort_keys=True) + "\n")
+
+
+def write_prometheus_textfile(report: dict, path: str, prefix: str = "newsblur_digest") -> None:
+    """Write ``report`` in the Prometheus text format for node_exporter's textfile collector."""
+    lines = [
+        f"# TYPE {prefix}_run_duration_seconds gauge",
+        f"{prefix}_run_duration_seconds {report['duration_seconds']}",
+        f"# TYPE {prefix}_last_run_timestamp_seconds gauge",
+        f"{prefix}_last_run_timestamp_seconds {report['started_at']:.3f}",
+    ]
+    if report.get("peak_rss_bytes") is not None:
+        lines += [
+            f"# TYPE {prefix}_peak_rss_bytes gauge",
+            f"{prefix}_peak_rss_bytes {report['peak_rss_bytes']}",
+        ]
+    if report["stages"]:
+        lines.append(f"# TYPE {prefix}_stage_seconds gauge")
+        lines += [
+            f'{prefix}_stage_seconds{{stage="{name}"}} {stage["seconds"]}'
+            for name, stage in sorted(report["stages"].items())
+        ]
+        lines.append(f"# TYPE {prefix}_stage_calls gauge")
+        lines += [
+            f'{prefix}_stage_calls{{stage="{name}"}} {stage["calls"]}'
+            for name, stage in sorted(report["stages"].items())
+        ]
+    for name, value in sorted(report["counters"].items()):
+        lines += [f"# TYPE {prefix}_{name} gauge", f"{prefix}_{name} {value}"]
+    _write_atomic(path, "\n".join(lines) + "\n")
+
+
+def _write_atomic(path: str, content: str) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
@@ -1,14 +1,37 @@
 from dataclasses import dataclass, field
+from typing import Optional
 
-@dataclass
+# Slotted: a run holds many stories, and slots drop the per-instance __dict__
+@dataclass(slots=True)
 class Story:
     hash: str
     title: str
     content_text: str
     permalink: str
+    # Near-duplicates from other feeds that this story stands in for
+    duplicates: list["Story"] = field(default_factory=list)
+    # content_text as fetched, once pre-compression or the prompt budget has
+    # shortened it; how much is cut depends on the other stories of the run
+    source_text: Optional[str] = None
 
-@dataclass
+    @property
+    def covered_hashes(self) -> list[str]:
+        """Hashes of this story and of every near-duplicate it stands in for."""
+        return [self.hash] + [duplicate.hash for duplicate in self.duplicates]
+
+@dataclass(slots=True)
 class Feed:
     id: str
     title: str
-    stories: list[Story] = field(default_factory=list)
\ No newline at end of file
+    stories: list[Story] = field(default_factory=list)
+    # Unread counters from /reader/feeds (ps/nt/ng); None when not reported
+    unread_positive: Optional[int] = None
+    unread_neutral: Optional[int] = None
+    unread_negative: Optional[int] = None
+
+    @property
+    def unread_count(self) -> Optional[int]:
+        counts = (self.unread_positive, self.unread_neutral, self.unread_negative)
+        if all(count is None for count in counts):
+            return None
+        return sum(count or 0 for count in counts)
@@ -0,0 +1,98 @@
+"""Bounded-queue stages for running the digest's phases concurrently.
+
+Items flow through a chain of stages, each served by its own worker threads.
+The queues between stages are bounded, so a slow stage blocks the stages that
+feed it instead of letting finished work pile up in memory.
+"""
+import logging
+import queue
+import threading
+from typing import Any, Callable, Iterable, Iterator
+
+_DONE = object()
+_POLL_INTERVAL = 0.1  # Seconds between stop checks while blocked on a queue
+
+
+def iter_pipeline(
+    items: Iterable,
+    stages: list[tuple[str, Callable[[Any], Any], int]],
+    queue_size: int = 8,
+) -> Iterator[tuple[int, Any]]:
+    """Run ``items`` through ``stages`` and yield ``(index, result)`` as each finishes.
+
+    Each stage is ``(name, fn, workers)``; ``fn`` maps an item to the value
+    handed to the next stage. An item whose stage function raises or returns
+    ``None`` leaves the pipeline early and is yielded as ``(index, None)``, so
+    every input is accounted for. Results arrive in completion order.
+    """
+    queues = [queue.Queue(maxsize=max(1, queue_size)) for _ in range(len(stages) + 1)]
+    # Stop markers each queue must carry: one per worker reading from it
+    readers = [max(1, workers) for _, _, workers in stages] + [1]
+    stopped = threading.Event()
+    lock = threading.Lock()
+
+    def put(q: queue.Queue, item) -> bool:
+        while not stopped.is_set():
+            try:
+                q.put(item, timeout=_POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get(q: queue.Queue):
+        while not stopped.is_set():
+            try:
+                return q.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def feed() -> None:
+        for entry in enumerate(items):
+            if not put(queues[0], entry):
+                return
+        for _ in range(readers[0]):
+            put(queues[0], _DONE)
+
+    def serve(position: int, name: str, fn: Callable, remaining: list[int]) -> None:
+        inbox, outbox = queues[position], queues[position + 1]
+        while True:
+            entry = get(inbox)
+            if entry is _DONE:
+                break
+            index, item = entry
+            try:
+                result = fn(item)
+            except Exception as e:
+                logging.error(f"Pipeline stage {name} failed for item {index}: {e}")
+                result = None
+            target = outbox if result is not None else queues[-1]
+            if not put(target, (index, result)):
+                return
+        with lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last:
+            for _ in range(readers[position + 1]):
+                put(outbox, _DONE)
+
+    threads = [threading.Thread(target=feed, daemon=True)]
+    for position, (name, fn, _) in enumerate(stages):
+        remaining = [readers[position]]
+        threads += [
+            threading.Thread(target=serve, args=(position, name, fn, remaining), daemon=True)
+            for _ in range(readers[position])
+        ]
+    for thread in threads:
+        thread.start()
+
+    try:
+        while True:
+            entry = queues[-1].get()
+            if entry is _DONE:
+                break
+            yield entry
+    finally:
+        # Unblock workers if the consumer stops early
+        stopped.set()
@@ -0,0 +1,182 @@
+"""Client-side rate limiting for OpenAI requests.
+
+OpenAI limits requests and tokens per minute and reports both limits on every
+response in ``x-ratelimit-*`` headers. ``RateLimiter`` mirrors them as two
+token buckets shared by every caller in the process, so concurrent
+completions (map-reduce chunks, batch accounts, service runs) queue locally
+instead of running into 429s.
+"""
+import heapq
+import itertools
+import re
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator, Mapping, Optional
+
+from resilience import parse_retry_after
+
+DEFAULT_PRIORITY = 1  # Lower priorities are served first
+THROTTLE_PAUSE = 1.0  # Seconds to hold requests after a 429 that names no reset time
+
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_reset(value: Optional[str]) -> Optional[float]:
+    """Seconds in an ``x-ratelimit-reset-*`` value such as ``"6m0s"`` or ``"20ms"``."""
+    if not value:
+        return None
+    parts = _DURATION.findall(value)
+    if not parts or _DURATION.sub("", value).strip():
+        return None
+    return sum(float(number) * _UNITS[unit] for number, unit in parts)
+
+
+def _header_int(headers: Mapping[str, str], name: str) -> Optional[int]:
+    try:
+        return int(float(headers.get(name)))
+    except (TypeError, ValueError):
+        return None
+
+
+class _Bucket:
+    """A token bucket; a limit of 0 means unknown, and nothing is held back."""
+
+    def __init__(self, per_minute: int):
+        self.limit = per_minute
+        self.rate = per_minute / 60.0
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        if self.limit:
+            self.level = min(self.limit, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        if not self.limit:
+            return 0.0
+        # A request larger than the whole bucket goes once the bucket is full
+        amount = min(amount, self.limit)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def sync(self, limit: Optional[int], remaining: Optional[int], reset: Optional[float], now: float) -> None:
+        self.refill(now)
+        if limit:
+            if not self.limit:
+                self.level = float(limit)
+                self.rate = limit / 60.0
+            self.limit = limit
+            if remaining is not None and remaining < limit and reset:
+                # The server refills what has been used in ``reset`` seconds
+                self.rate = (limit - remaining) / reset
+        if remaining is not None:
+            self.level = min(self.level, float(remaining))
+
+
+@dataclass
+class Reservation:
+    tokens: int
+    used: Optional[int] = None  # Actual tokens, once known, to settle the estimate
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute buckets shared by all callers.
+
+    Limits start at the given values, or unknown (0), and follow the
+    ``x-ratelimit-*`` headers passed to ``observe``. While a limit is unknown
+    nothing is held back on its account; the first responses fill it in, and
+    a 429 in the meantime still holds every request until the server's reset
+    time. Waiting callers are served in ``priority`` order, then in arrival
+    order.
+    """
+
+    def __init__(self, requests_per_minute: int = 0, tokens_per_minute: int = 0):
+        self._cond = threading.Condition()
+        self._requests = _Bucket(requests_per_minute)
+        self._tokens = _Bucket(tokens_per_minute)
+        self._queue: list[tuple[int, int]] = []
+        self._arrivals = itertools.count()
+        self._paused_until = 0.0
+        self.waited = 0.0  # Seconds callers have spent queued, in total
+
+    @contextmanager
+    def reserve(self, tokens: int, priority: int = DEFAULT_PRIORITY) -> Iterator[Reservation]:
+        """Wait until a request estimated at ``tokens`` may be sent, then send it in the block.
+
+        Set ``used`` on the yielded reservation to the request's actual token
+        usage so the difference from the estimate is refunded or charged.
+        """
+        ticket = (priority, next(self._arrivals))
+        start = time.monotonic()
+        with self._cond:
+            heapq.heappush(self._queue, ticket)
+            try:
+                while True:
+                    delay = self._delay(ticket, tokens)
+                    if delay == 0:
+                        break
+                    self._cond.wait(delay)
+            finally:
+                self._queue.remove(ticket)
+                heapq.heapify(self._queue)
+            self._requests.level -= 1
+            self._tokens.level -= tokens
+            self.waited += time.monotonic() - start
+            self._cond.notify_all()
+        reservation = Reservation(tokens)
+        try:
+            yield reservation
+        finally:
+            with self._cond:
+                if reservation.used is not None and self._tokens.limit:
+                    self._tokens.level += tokens - reservation.used
+                self._cond.notify_all()
+
+    def _delay(self, ticket: tuple[int, int], tokens: int) -> Optional[float]:
+        """Seconds until ``ticket`` may go, 0 to go now, or None to wait for a change."""
+        if self._queue[0] != ticket:
+            return None
+        now = time.monotonic()
+        if now < self._paused_until:
+            return self._paused_until - now
+        self._requests.refill(now)
+        self._tokens.refill(now)
+        return max(self._requests.wait_time(1), self._tokens.wait_time(tokens))
+
+    def observe(self, status_code: int, headers: Mapping[str, str]) -> None:
+        """Update the buckets from a response's rate limit headers."""
+        now = time.monotonic()
+        request_reset = parse_reset(headers.get("x-ratelimit-reset-requests"))
+        token_reset = parse_reset(headers.get("x-ratelimit-reset-tokens"))
+        request_limit = _header_int(headers, "x-ratelimit-limit-requests")
+        token_limit = _header_int(headers, "x-ratelimit-limit-tokens")
+        with self._cond:
+            self._requests.sync(
+                request_limit,
+                _header_int(headers, "x-ratelimit-remaining-requests"),
+                request_reset,
+                now,
+            )
+            self._tokens.sync(
+                token_limit,
+                _header_int(headers, "x-ratelimit-remaining-tokens"),
+                token_reset,
+                now,
+            )
+            if status_code == 429:
+                pause = parse_retry_after(headers.get("retry-after"))
+                if pause is None:
+                    pause = max(request_reset or 0.0, token_reset or 0.0) or THROTTLE_PAUSE
+                self._paused_until = max(self._paused_until, now + pause)
+            self._cond.notify_all()
+
+    @property
+    def limits(self) -> tuple[int, int]:
+        """The requests-per-minute and tokens-per-minute limits currently applied."""
+        with self._cond:
+            return self._requests.limit, self._tokens.limit
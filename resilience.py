@@ -0,0 +1,224 @@
+"""Retries, per-host circuit breakers and hedged requests for HTTP sessions.
+
+``ResilientSession`` is a drop-in ``requests.Session``: failures surface as
+the usual ``requests`` exceptions and responses, so callers keep their
+existing error handling.
+"""
+import logging
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, Optional
+from urllib.parse import urlsplit
+
+import requests
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+# Failures worth retrying; anything else (bad URL, redirect loop) is raised at once
+TRANSIENT_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+HEDGE_WORKERS = 16
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised instead of contacting a host whose circuit is open."""
+
+
+@dataclass
+class RetryPolicy:
+    max_retries: int = 2
+    backoff_base: float = 0.5  # Seconds; the backoff ceiling doubles per retry
+    backoff_max: float = 8.0
+    retry_statuses: frozenset = RETRY_STATUSES
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Seconds to wait before retry number ``attempt`` (counting from 1).
+
+        Uses full jitter: a uniform draw below the exponential ceiling, so
+        clients that failed together do not retry together. A server's
+        ``Retry-After`` takes precedence, capped at ``backoff_max``.
+        """
+        if retry_after is not None:
+            return min(max(retry_after, 0.0), self.backoff_max)
+        ceiling = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+        return random.uniform(0, ceiling)
+
+
+class CircuitBreaker:
+    """Thread-safe circuit breakers keyed by host.
+
+    After ``failure_threshold`` consecutive failures a host's circuit opens
+    and requests to it fail fast for ``reset_timeout`` seconds. A single
+    trial request is then let through: success closes the circuit, failure
+    opens it again. A threshold of 0 disables the breaker.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures: dict[str, int] = {}
+        self._opened_at: dict[str, float] = {}
+        self._trials: set[str] = set()
+
+    def allow(self, host: str) -> bool:
+        with self._lock:
+            opened_at = self._opened_at.get(host)
+            if opened_at is None:
+                return True
+            if host in self._trials or time.monotonic() - opened_at < self.reset_timeout:
+                return False
+            self._trials.add(host)
+            return True
+
+    def is_open(self, host: str) -> bool:
+        with self._lock:
+            return host in self._opened_at
+
+    def record_success(self, host: str) -> None:
+        with self._lock:
+            if host in self._opened_at:
+                logging.info(f"Circuit closed for {host}")
+            self._failures.pop(host, None)
+            self._opened_at.pop(host, None)
+            self._trials.discard(host)
+
+    def record_failure(self, host: str) -> None:
+        if self.failure_threshold <= 0:
+            return
+        with self._lock:
+            self._trials.discard(host)
+            failures = self._failures.get(host, 0) + 1
+            self._failures[host] = failures
+            if failures >= self.failure_threshold:
+                if host not in self._opened_at:
+                    logging.warning(f"Circuit opened for {host} after {failures} failures")
+                self._opened_at[host] = time.monotonic()
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    # Only the delta-seconds form; HTTP dates fall back to normal backoff
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+class ResilientSession(requests.Session):
+    """A Session that retries, circuit-breaks and optionally hedges requests.
+
+    Connection errors, timeouts and ``policy.retry_statuses`` are retried with
+    jittered exponential backoff. Non-idempotent requests are only retried
+    when they cannot have been processed: a connect timeout or a 429. When
+    the last attempt still gets a retryable status, that response is returned.
+
+    With ``hedge_after`` set, an idempotent request still waiting after that
+    many seconds is raced against an identical second request and the first
+    to finish wins. Streamed requests race only until their headers arrive.
+
+    ``on_event`` is called with ``"http_retries"``, ``"http_hedges"`` or
+    ``"http_circuit_rejections"`` for run metrics.
+    """
+
+    def __init__(
+        self,
+        policy: Optional[RetryPolicy] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        hedge_after: Optional[float] = None,
+        on_event: Optional[Callable[[str], None]] = None,
+    ):
+        super().__init__()
+        self.policy = policy or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        self.hedge_after = hedge_after
+        self.on_event = on_event
+        self._hedge_pool: Optional[ThreadPoolExecutor] = None
+        self._hedge_lock = threading.Lock()
+
+    def request(self, method, url, *args, **kwargs):
+        host = urlsplit(url).netloc
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            if not self.breaker.allow(host):
+                self._event("http_circuit_rejections")
+                raise CircuitOpenError(f"Circuit open for {host}; not contacting it")
+            retry_after = None
+            try:
+                response = self._attempt(method, url, idempotent, args, kwargs)
+            except TRANSIENT_ERRORS as e:
+                self.breaker.record_failure(host)
+                retryable = idempotent or isinstance(e, requests.exceptions.ConnectTimeout)
+                if attempt >= self.policy.max_retries or not retryable:
+                    raise
+                reason = type(e).__name__
+            else:
+                status = response.status_code
+                if status >= 500:
+                    self.breaker.record_failure(host)
+                else:
+                    # Includes 429: the host is up, just asking us to slow down
+                    self.breaker.record_success(host)
+                retryable = idempotent or status == 429
+                if (
+                    status not in self.policy.retry_statuses
+                    or attempt >= self.policy.max_retries
+                    or not retryable
+                ):
+                    return response
+                reason = str(status)
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                response.close()
+            attempt += 1
+            delay = self.policy.delay(attempt, retry_after)
+            path = urlsplit(url).path
+            logging.warning(
+                f"Retrying {method} {host}{path} after {reason} in {delay:.2f}s "
+                f"(retry {attempt} of {self.policy.max_retries})"
+            )
+            self._event("http_retries")
+            time.sleep(delay)
+
+    def _attempt(self, method, url, idempotent, args, kwargs) -> requests.Response:
+        send = super().request
+        if not self.hedge_after or not idempotent:
+            return send(method, url, *args, **kwargs)
+        pool = self._get_hedge_pool()
+        first = pool.submit(send, method, url, *args, **kwargs)
+        done, _ = wait([first], timeout=self.hedge_after)
+        if done:
+            return first.result()
+        self._event("http_hedges")
+        second = pool.submit(send, method, url, *args, **kwargs)
+        done, pending = wait([first, second], return_when=FIRST_COMPLETED)
+        winner = done.pop()
+        if winner.exception() is not None and pending:
+            # The first to finish failed; the other request may still succeed
+            winner, pending = pending.pop(), set()
+        for loser in pending:
+            loser.add_done_callback(_close_response)
+        return winner.result()
+
+    def _get_hedge_pool(self) -> ThreadPoolExecutor:
+        with self._hedge_lock:
+            if self._hedge_pool is None:
+                self._hedge_pool = ThreadPoolExecutor(
+                    max_workers=HEDGE_WORKERS, thread_name_prefix="hedge"
+                )
+            return self._hedge_pool
+
+    def _event(self, name: str) -> None:
+        if self.on_event is not None:
+            self.on_event(name)
+
+    def close(self) -> None:
+        if self._hedge_pool is not None:
+            self._hedge_pool.shutdown(wait=False)
+        super().close()
+
+
+def _close_response(future) -> None:
+    if future.exception() is None:
+        future.result().close()
@@ -0,0 +1,193 @@
+"""Long-running service mode: digests on demand and on a schedule.
+
+Run ``python service.py`` instead of ``python main.py``. The process keeps
+NewsBlur sessions, connection pools and caches warm between runs (see
+``main.keep_state_warm``), so only the first digest pays for imports,
+logins and TLS handshakes.
+
+Endpoints:
+
+- ``POST /run`` starts a digest in the background: 202, or 409 while one is
+  already running.
+- ``GET /status`` returns the state and timings of the latest run.
+- ``GET /healthz`` returns 200 once the service is up.
+
+When ``SERVICE_TOKEN`` is set, ``POST /run`` requires
+``Authorization: Bearer <token>``. Without it anyone who can reach the port
+could start digests, so the service only listens on 127.0.0.1, whatever
+``SERVICE_HOST`` says. With ``SERVICE_INTERVAL`` above 0, a
+digest is also started every that many seconds. A scheduled run that would
+overlap a running one is skipped.
+"""
+import hmac
+import json
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+
+import main
+
+SERVICE_HOST = "0.0.0.0"  # Used only with SERVICE_TOKEN; otherwise LOOPBACK_HOST
+SERVICE_PORT = 8080
+LOOPBACK_HOST = "127.0.0.1"
+SERVICE_INTERVAL = 0  # Seconds between scheduled runs; 0 runs only on request
+
+
+class DigestService:
+    """Runs ``run`` at most once at a time, on request or every ``interval`` seconds."""
+
+    def __init__(self, run: Callable[[], Optional[dict]], interval: float = 0):
+        self.run = run
+        self.interval = interval
+        self._running = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.runs = 0
+        self.rejected = 0
+        self.last_run: Optional[dict] = None
+
+    @property
+    def running(self) -> bool:
+        return self._running.locked()
+
+    def trigger(self) -> bool:
+        """Start a run in the background; False if one is already running."""
+        if not self._running.acquire(blocking=False):
+            self.rejected += 1
+            return False
+        threading.Thread(target=self._run_locked, name="digest", daemon=True).start()
+        return True
+
+    def run_now(self) -> bool:
+        """Run a digest in the calling thread; False if one is already running."""
+        if not self._running.acquire(blocking=False):
+            self.rejected += 1
+            return False
+        self._run_locked()
+        return True
+
+    def _run_locked(self) -> None:
+        started_at = time.time()
+        start = time.perf_counter()
+        error = None
+        report = None
+        try:
+            report = self.run()
+        except Exception as e:
+            logging.error(f"Digest run failed: {e}")
+            error = str(e)
+        finally:
+            self.runs += 1
+            self.last_run = {
+                "started_at": started_at,
+                "duration_seconds": round(time.perf_counter() - start, 6),
+                "error": error,
+                "counters": (report or {}).get("counters", {}),
+            }
+            self._running.release()
+
+    def status(self) -> dict:
+        return {
+            "running": self.running,
+            "runs": self.runs,
+            "rejected": self.rejected,
+            "interval_seconds": self.interval,
+            "last_run": self.last_run,
+        }
+
+    def start_scheduler(self) -> None:
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._schedule, name="scheduler", daemon=True)
+        self._thread.start()
+
+    def _schedule(self) -> None:
+        while not self._stopped.wait(self.interval):
+            if not self.trigger():
+                logging.warning("Skipping scheduled digest; the previous run is still going")
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+
+def create_server(
+    service: DigestService, host: str, port: int, token: Optional[str] = None
+) -> ThreadingHTTPServer:
+    """Return an HTTP server exposing ``service``; call ``serve_forever()`` to run it."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            logging.debug(f"{self.address_string()} {format % args}")
+
+        def send_json(self, status: int, body: dict) -> None:
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/healthz":
+                return self.send_json(200, {"status": "ok"})
+            if self.path == "/status":
+                return self.send_json(200, service.status())
+            self.send_json(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/run":
+                return self.send_json(404, {"error": "not found"})
+            if token and not hmac.compare_digest(
+                self.headers.get("Authorization", ""), f"Bearer {token}"
+            ):
+                return self.send_json(401, {"error": "unauthorized"})
+            if not service.trigger():
+                return self.send_json(409, {"status": "already running"})
+            self.send_json(202, {"status": "started"})
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
+
+
+def listen_host(host: str, token: Optional[str]) -> str:
+    """Return ``host``, or loopback when ``POST /run`` would be unauthenticated."""
+    if token or host in (LOOPBACK_HOST, "localhost", "::1"):
+        return host
+    logging.warning(
+        f"SERVICE_TOKEN is not set; listening on {LOOPBACK_HOST} instead of {host} "
+        f"so only local clients can start digests"
+    )
+    return LOOPBACK_HOST
+
+
+def serve() -> None:
+    main.keep_state_warm()
+    service = DigestService(
+        lambda: main.run_digest(configure_shared=False),
+        interval=main.env_float("SERVICE_INTERVAL", SERVICE_INTERVAL),
+    )
+    token = os.getenv("SERVICE_TOKEN")
+    server = create_server(
+        service,
+        listen_host(os.getenv("SERVICE_HOST", SERVICE_HOST), token),
+        main.env_int("SERVICE_PORT", SERVICE_PORT),
+        token,
+    )
+    service.start_scheduler()
+    host, port = server.server_address[:2]
+    logging.info(f"Digest service listening on {host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stop()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    serve()
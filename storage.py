@@ -0,0 +1,317 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from http.cookiejar import Cookie
+from typing import Iterable, Optional
+
+
+@dataclass
+class CachedPage:
+    url: str
+    text: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+
+    def age(self, now: Optional[float] = None) -> float:
+        return (now if now is not None else time.time()) - self.fetched_at
+
+
+class PageCache:
+    """On-disk cache of cleaned page text keyed by URL.
+
+    Entries keep the ETag/Last-Modified validators of the response they came
+    from so stale pages can be revalidated with a conditional GET. The cache
+    is bounded to ``max_bytes`` of text and evicts least recently used pages.
+    """
+
+    def __init__(self, path: str, max_age: float = 86400, max_bytes: int = 50_000_000):
+        self.path = path
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                text TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS pages_accessed_at ON pages (accessed_at)"
+        )
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT text, etag, last_modified, fetched_at FROM pages WHERE url = ?",
+                (url,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE pages SET accessed_at = ? WHERE url = ?", (time.time(), url)
+            )
+        return CachedPage(url, row[0], row[1], row[2], row[3])
+
+    def is_fresh(self, page: CachedPage) -> bool:
+        return page.age() < self.max_age
+
+    def put(
+        self,
+        url: str,
+        text: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> None:
+        now = time.time()
+        size = len(text.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, text, etag, last_modified, now, now, size),
+            )
+            self._evict()
+
+    def touch(self, url: str) -> None:
+        """Mark a cached page as revalidated (e.g. after a 304 response)."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE pages SET fetched_at = ?, accessed_at = ? WHERE url = ?",
+                (now, now, url),
+            )
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+
+    def _evict(self) -> None:
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute(
+            "SELECT url, size FROM pages ORDER BY accessed_at ASC, rowid ASC"
+        ).fetchall()
+        evicted = []
+        for url, size in rows:
+            if total <= self.max_bytes:
+                break
+            evicted.append((url,))
+            total -= size
+        self._conn.executemany("DELETE FROM pages WHERE url = ?", evicted)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class SummaryStore:
+    """Persistent per-story summaries keyed by story hash, content digest and model.
+
+    A story whose content changes, or that is summarized with a different
+    model, gets a new key and is summarized again.
+    """
+
+    def __init__(self, path: str, max_age: float = 7 * 86400):
+        self.path = path
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS summaries (
+                key TEXT PRIMARY KEY,
+                summary TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self.prune()
+
+    @staticmethod
+    def key(story_hash: str, content_text: str, model_id: str) -> str:
+        digest = hashlib.sha256((content_text or "").encode("utf-8")).hexdigest()
+        return f"{model_id}:{story_hash}:{digest}"
+
+    def get_many(self, keys: list[str]) -> dict[str, str]:
+        found: dict[str, str] = {}
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, summary FROM summaries WHERE key IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+                found.update(rows)
+        return found
+
+    def put_many(self, summaries: dict[str, str]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO summaries VALUES (?, ?, ?)",
+                [(key, summary, now) for key, summary in summaries.items()],
+            )
+
+    def prune(self) -> None:
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM summaries WHERE created_at < ?", (time.time() - self.max_age,)
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class SyncCheckpoint:
+    """Story hashes already delivered in a digest, persisted between runs."""
+
+    def __init__(self, path: str, max_age: float = 30 * 86400):
+        self.path = path
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS processed_stories (
+                story_hash TEXT PRIMARY KEY,
+                processed_at REAL NOT NULL
+            )
+            """
+        )
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM processed_stories WHERE processed_at < ?",
+                (time.time() - self.max_age,),
+            )
+
+    def processed(self, story_hashes: list[str]) -> set[str]:
+        """Return the subset of ``story_hashes`` already processed."""
+        found: set[str] = set()
+        with self._lock:
+            for start in range(0, len(story_hashes), 500):
+                chunk = story_hashes[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT story_hash FROM processed_stories WHERE story_hash IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+                found.update(row[0] for row in rows)
+        return found
+
+    def mark_processed(self, story_hashes: list[str]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO processed_stories VALUES (?, ?)",
+                [(story_hash, now) for story_hash in story_hashes],
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class MarkReadJournal:
+    """Story hashes whose mark-as-read request failed, replayed on the next run."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pending_mark_read (
+                story_hash TEXT PRIMARY KEY,
+                queued_at REAL NOT NULL
+            )
+            """
+        )
+
+    def add(self, story_hashes: list[str]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO pending_mark_read VALUES (?, ?)",
+                [(story_hash, now) for story_hash in story_hashes],
+            )
+
+    def pending(self) -> list[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT story_hash FROM pending_mark_read ORDER BY queued_at, rowid"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def remove(self, story_hashes: list[str]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM pending_mark_read WHERE story_hash = ?",
+                [(story_hash,) for story_hash in story_hashes],
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class CookieStore:
+    """JSON file holding session cookies, readable only by the current user."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self) -> list[dict]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                cookies = json.load(f)
+        except (OSError, ValueError):
+            return []
+        if not isinstance(cookies, list):
+            return []
+        now = time.time()
+        return [
+            c for c in cookies
+            if isinstance(c, dict) and c.get("name") and (c.get("expires") or now + 1) > now
+        ]
+
+    def save(self, cookies: Iterable[Cookie]) -> None:
+        data = [
+            {
+                "name": c.name,
+                "value": c.value,
+                "domain": c.domain,
+                "path": c.path,
+                "secure": c.secure,
+                "expires": c.expires,
+            }
+            for c in cookies
+        ]
+        tmp_path = f"{self.path}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def clear(self) -> None:
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
@@ -1,6 +1,8 @@
 import os
 import sys
 
+import pytest
+
 
 # Ensure project root is on sys.path so tests can import `main` and `models`
 PROJECT_ROOT = os.path.dirname(os.path.dirname(__file__))
@@ -10,3 +12,50 @@ if PROJECT_ROOT not in sys.path:
 # Provide a harmless default API key for OpenAI so importing modules
 # that instantiate the client doesn't fail in CI.
 os.environ.setdefault("OPENAI_API_KEY", "test")
+
+
+@pytest.fixture
+def make_standin(monkeypatch):
+    """Factory that starts a stand-in server and points the pipeline at it.
+
+    Call it with a ``StandInConfig`` and environment overrides as keyword
+    arguments; an override of None removes the variable. Every run starts
+    without an OpenAI client, page cache or summary store, with default HTTP
+    policy and a fresh OpenAI rate limiter, and whatever a run sets up in
+    ``main`` is put back when the test ends. Servers stop with the test.
+    """
+    import main
+    from ratelimit import RateLimiter
+    from resilience import CircuitBreaker, RetryPolicy
+    from standins import StandInServer
+
+    servers = []
+
+    def start(config=None, **env):
+        server = StandInServer(config).__enter__()
+        servers.append(server)
+        for name, value in {**server.env(), **env}.items():
+            if value is None:
+                monkeypatch.delenv(name, raising=False)
+            else:
+                monkeypatch.setenv(name, value)
+        monkeypatch.setattr(main, "NEWSBLUR_URL", server.url)
+        monkeypatch.setattr(main, "SLACK_API_URL", f"{server.url}/slack-api")
+        for name, value in {
+            "openai": None,
+            "page_cache": None,
+            "summary_store": None,
+            "retry_policy": RetryPolicy(),
+            "circuit_breaker": CircuitBreaker(),
+            "newsblur_hedge_delay": None,
+            "newsblur_adapter": None,
+            "web_session": None,
+            "warm_sessions": None,
+            "openai_limiter": RateLimiter(),
+        }.items():
+            monkeypatch.setattr(main, name, value)
+        return server
+
+    yield start
+    for server in servers:
+        server.__exit__(None, None, None)
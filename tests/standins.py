@@ -0,0 +1,424 @@
+"""Local stand-ins for the NewsBlur API, publisher pages, OpenAI and Slack.
+
+One threaded HTTP server plays every role, routed by path, so the real
+pipeline can run end to end against it by pointing ``NEWSBLUR_URL``,
+``OPENAI_BASE_URL`` and ``SLACK_WEBHOOK_URL`` at ``server.url``. Streamed
+completions and Slack's chat.postMessage (under ``/slack-api``) are supported
+for the progressive delivery mode. OpenAI's per-account rate limits can be
+enforced, with the x-ratelimit-* headers and 429s the real API sends. Faults (error statuses, dropped
+connections, stalls) can be queued per path with ``inject``. Latency and
+payload sizes are configurable per service. Used by the end-to-end tests and
+by benchmarks/bench_e2e.py.
+"""
+import json
+import random
+import re
+import socket
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+@dataclass
+class StandInConfig:
+    feeds: int = 10
+    stories_per_feed: int = 5
+    content_chars: int = 1500  # Length of full RSS story bodies
+    short_content_ratio: float = 0.2  # Share of excerpt-only stories (page fallback)
+    page_bytes: int = 20_000  # Approximate size of fallback pages
+    syndicated_stories: int = 0  # Leading stories per feed shared by every feed
+    river_page_size: int = 12
+    newsblur_latency: float = 0.0  # Seconds added to every NewsBlur response
+    login_latency: float = 0.0  # Extra seconds for /api/login
+    page_latency: float = 0.0
+    openai_latency: float = 0.0
+    openai_line_delay: float = 0.0  # Seconds between streamed completion lines
+    openai_rpm_limit: int = 0  # Completions allowed per window; 0 is unlimited
+    openai_tpm_limit: int = 0  # Prompt tokens allowed per window; 0 is unlimited
+    openai_limit_window: float = 60.0  # Seconds in which a used-up limit refills
+    slack_latency: float = 0.0
+
+
+WORDS = (
+    "the committee met on tuesday to review proposal and members said plan would reduce "
+    "costs improve service take effect next year city council budget vote delayed after "
+    "residents raised concerns about traffic schools water prices officials expect report "
+    "within weeks while analysts warned markets could react sharply investors remained "
+    "cautious ahead of quarterly earnings researchers published new findings on climate"
+).split()
+
+
+def paragraph(seed: str, chars: int) -> str:
+    """Deterministic filler sentences, distinct per ``seed`` so stories are not near-duplicates."""
+    rng = random.Random(seed)
+    sentences: list[str] = []
+    length = 0
+    while length < chars:
+        words = [rng.choice(WORDS) for _ in range(rng.randint(6, 18))]
+        sentences.append(" ".join(words).capitalize() + ".")
+        length += len(sentences[-1]) + 1
+    return " ".join(sentences)[:chars]
+
+
+BOILERPLATE = "<nav>" + "".join(f"<a href='/s{i}'>Section {i}</a>" for i in range(30)) + "</nav>"
+
+
+class _QuietServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # Clients that stop reading a response early reset the connection
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+
+class StandInServer:
+    def __init__(self, config: StandInConfig | None = None):
+        self.config = config or StandInConfig()
+        self.lock = threading.Lock()
+        self.requests: dict[str, int] = {}
+        self.slack_messages: list[dict] = []
+        self.slack_received_at: list[float] = []  # time.monotonic() per message
+        self.slack_webhooks: list[str] = []  # Webhook path per message
+        self.logins: list[str] = []
+        self.completions: list[dict] = []
+        self.marked: set[str] = set()
+        self.stream_finished_at: float | None = None
+        self.faults: dict[str, list] = {}
+        self.rate_buckets: dict[str, tuple[float, float]] = {}  # Name -> (level, updated)
+        self._server = _QuietServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def env(self) -> dict[str, str]:
+        """Environment pointing the pipeline at this server."""
+        return {
+            "NEWSBLUR_URL": self.url,
+            "NEWSBLUR_USERNAME": "bench",
+            "NEWSBLUR_PASSWORD": "bench",
+            "OPENAI_BASE_URL": f"{self.url}/v1",
+            "OPENAI_API_KEY": "bench",
+            "MODEL_ID": "bench-model",
+            "SLACK_WEBHOOK_URL": f"{self.url}/slack",
+        }
+
+    def count(self, route: str) -> None:
+        with self.lock:
+            self.requests[route] = self.requests.get(route, 0) + 1
+
+    def inject(self, path_prefix: str, *faults) -> None:
+        """Queue faults for the next requests whose path starts with ``path_prefix``.
+
+        Each request consumes one fault: an int is returned as that HTTP status,
+        ``"reset"`` closes the connection without a response and a float stalls
+        the request for that many seconds before it is served normally.
+        """
+        with self.lock:
+            self.faults.setdefault(path_prefix, []).extend(faults)
+
+    def next_fault(self, path: str):
+        with self.lock:
+            for prefix, faults in self.faults.items():
+                if path.startswith(prefix) and faults:
+                    return faults.pop(0)
+        return None
+
+    def charge_rate_limits(self, prompt_tokens: int) -> tuple[bool, dict[str, str]]:
+        """Take a completion from the OpenAI limits; False (and no charge) if over them."""
+        limits = {"requests": (self.config.openai_rpm_limit, 1),
+                  "tokens": (self.config.openai_tpm_limit, prompt_tokens)}
+        now = time.monotonic()
+        with self.lock:
+            levels = {}
+            for name, (limit, _) in limits.items():
+                if limit:
+                    level, updated = self.rate_buckets.get(name, (limit, now))
+                    rate = limit / self.config.openai_limit_window
+                    levels[name] = min(limit, level + (now - updated) * rate)
+            allowed = all(levels[name] >= limits[name][1] for name in levels)
+            headers = {}
+            for name, level in levels.items():
+                limit, cost = limits[name]
+                if allowed:
+                    level -= cost
+                self.rate_buckets[name] = (level, now)
+                rate = limit / self.config.openai_limit_window
+                headers[f"x-ratelimit-limit-{name}"] = str(limit)
+                headers[f"x-ratelimit-remaining-{name}"] = str(max(0, int(level)))
+                headers[f"x-ratelimit-reset-{name}"] = f"{(limit - level) / rate:.3f}s"
+        return allowed, headers
+
+    # Fake data ---------------------------------------------------------
+
+    def is_short(self, feed: int, n: int) -> bool:
+        ratio = self.config.short_content_ratio
+        if ratio <= 0:
+            return False
+        return (feed * self.config.stories_per_feed + n) % max(1, round(1 / ratio)) == 0
+
+    def article_seed(self, feed: int, n: int) -> str:
+        # The first ``syndicated_stories`` of every feed carry the same wire article
+        if n < self.config.syndicated_stories:
+            return f"wire/{n}"
+        return f"{feed}/{n}"
+
+    def story(self, feed: int, n: int) -> dict:
+        if self.is_short(feed, n):
+            content = "<p>Read the full story on our site.</p>"
+        else:
+            content = f"<p>{paragraph(self.article_seed(feed, n), self.config.content_chars)}</p>"
+        return {
+            "story_feed_id": feed,
+            "story_hash": f"{feed}:{n}",
+            "story_title": f"Story {n} of feed {feed}",
+            "story_content": content,
+            "story_permalink": f"{self.url}/page/{feed}/{n}",
+        }
+
+    def unread(self, feed: int) -> list[dict]:
+        stories = [self.story(feed, n) for n in range(self.config.stories_per_feed)]
+        with self.lock:
+            return [s for s in stories if s["story_hash"] not in self.marked]
+
+    def page(self, feed: int, n: int) -> bytes:
+        chars = max(200, self.config.page_bytes - 2 * len(BOILERPLATE))
+        seed = self.article_seed(feed, n)
+        article = "".join(
+            f"<p>{paragraph(f'{seed}/{i}', 150)}</p>" for i in range(max(1, chars // 157))
+        )
+        html = (
+            f"<html><head><title>Story {n}</title><script>var x = 1;</script></head><body>"
+            f"{BOILERPLATE}<article><h1>Story {n} of feed {feed}</h1>{article}</article>"
+            f"<footer>{BOILERPLATE}</footer></body></html>"
+        )
+        return html.encode("utf-8")
+
+    def chat_completion(self, body: dict) -> dict:
+        prompt = body["messages"][-1]["content"]
+        if (body.get("response_format") or {}).get("type") == "json_object":
+            ids = re.findall(r"^ID: (\d+)$", prompt, re.M)
+            content = json.dumps({i: f"Summary of article {i}." for i in ids})
+        else:
+            lines, feed_n, story_n = [], 0, 0
+            for line in prompt.splitlines():
+                if line.startswith("Feed: "):
+                    feed_n, story_n = feed_n + 1, 0
+                    lines.append(f"{feed_n}. *{line[6:]}*")
+                elif line.startswith("Title: "):
+                    story_n += 1
+                    title = line[7:]
+                elif line.startswith("Link: "):
+                    lines.append(f"  {story_n}. *{title}* - A short summary. <{line[6:]}|[Read more]>")
+            content = "\n".join(lines)
+        prompt_tokens = sum(len(m["content"]) for m in body["messages"]) // 4
+        if body.get("stream"):
+            return {"content": content, "prompt_tokens": prompt_tokens}
+        return {
+            "id": "chatcmpl-standin",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", ""),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": len(content) // 4,
+                "total_tokens": prompt_tokens + len(content) // 4,
+            },
+        }
+
+    def stream_events(self, body: dict, completion: dict):
+        """Yield server-sent events for a streamed completion, one line per chunk."""
+        base = {
+            "id": "chatcmpl-standin",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": body.get("model", ""),
+        }
+        content = completion["content"]
+        for line in content.splitlines(keepends=True):
+            time.sleep(self.config.openai_line_delay)
+            delta = {"index": 0, "delta": {"content": line}, "finish_reason": None}
+            yield {**base, "choices": [delta]}
+        yield {**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+        if (body.get("stream_options") or {}).get("include_usage"):
+            usage = {
+                "prompt_tokens": completion["prompt_tokens"],
+                "completion_tokens": len(content) // 4,
+                "total_tokens": completion["prompt_tokens"] + len(content) // 4,
+            }
+            yield {**base, "choices": [], "usage": usage}
+
+    # HTTP --------------------------------------------------------------
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def send(self, status, body=b"", content_type="application/json", headers=None):
+                if isinstance(body, (dict, list)):
+                    body = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def send_stream(self, events, headers=None):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.close_connection = True
+                for event in events:
+                    self.wfile.write(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+                server.stream_finished_at = time.monotonic()
+
+            def apply_fault(self, path: str) -> bool:
+                """Act out the next injected fault; True if the request was answered."""
+                fault = server.next_fault(path)
+                if fault is None:
+                    return False
+                server.count("fault")
+                if isinstance(fault, float):
+                    time.sleep(fault)
+                    return False
+                if fault == "reset":
+                    self.close_connection = True
+                    self.connection.shutdown(socket.SHUT_RDWR)
+                    return True
+                self.send(fault, {"error": "injected"}, headers={"Retry-After": "0"})
+                return True
+
+            def read_body(self) -> bytes:
+                length = int(self.headers.get("Content-Length") or 0)
+                return self.rfile.read(length) if length else b""
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                query = parse_qs(parts.query)
+                path = parts.path
+                if self.apply_fault(path):
+                    return
+                if path.startswith("/page/"):
+                    server.count("page")
+                    time.sleep(server.config.page_latency)
+                    _, _, feed, n = path.split("/")
+                    return self.send(200, server.page(int(feed), int(n)), "text/html; charset=utf-8")
+                time.sleep(server.config.newsblur_latency)
+                if path == "/reader/feeds":
+                    server.count("feeds")
+                    feeds = {
+                        str(f): {"feed_title": f"Feed {f}", "ps": 0, "nt": len(server.unread(f)), "ng": 0}
+                        for f in range(server.config.feeds)
+                    }
+                    return self.send(200, {"authenticated": True, "feeds": feeds})
+                if path.startswith("/reader/feed/"):
+                    server.count("feed")
+                    return self.send(200, {"stories": server.unread(int(path.rsplit("/", 1)[1]))})
+                if path == "/reader/river_stories":
+                    server.count("river")
+                    page = int(query.get("page", ["1"])[0])
+                    stories = [s for f in query.get("feeds", []) for s in server.unread(int(f))]
+                    size = server.config.river_page_size
+                    return self.send(200, {"stories": stories[(page - 1) * size: page * size]})
+                if path == "/reader/unread_story_hashes":
+                    server.count("unread_hashes")
+                    hashes = {
+                        f: [s["story_hash"] for s in server.unread(int(f))]
+                        for f in query.get("feed_id", [])
+                    }
+                    return self.send(200, {"unread_feed_story_hashes": hashes})
+                self.send(404, {"error": "not found"})
+
+            def do_POST(self):
+                path = urlsplit(self.path).path
+                body = self.read_body()
+                if self.apply_fault(path):
+                    return
+                if path == "/v1/chat/completions":
+                    server.count("openai")
+                    time.sleep(server.config.openai_latency)
+                    request = json.loads(body)
+                    prompt_tokens = sum(len(m["content"]) for m in request["messages"]) // 4
+                    allowed, limit_headers = server.charge_rate_limits(prompt_tokens)
+                    if not allowed:
+                        server.count("openai_429")
+                        error = {"error": {"message": "Rate limit reached", "type": "requests"}}
+                        return self.send(429, error, headers=limit_headers)
+                    with server.lock:
+                        server.completions.append(request)
+                    completion = server.chat_completion(request)
+                    if request.get("stream"):
+                        return self.send_stream(
+                            server.stream_events(request, completion), limit_headers
+                        )
+                    return self.send(200, completion, headers=limit_headers)
+                if path == "/slack" or path.startswith("/slack/"):
+                    server.count("slack")
+                    time.sleep(server.config.slack_latency)
+                    with server.lock:
+                        server.slack_messages.append(json.loads(body))
+                        server.slack_webhooks.append(path)
+                        server.slack_received_at.append(time.monotonic())
+                    return self.send(200, b"ok", "text/plain")
+                if path == "/slack-api/chat.postMessage":
+                    server.count("slack")
+                    time.sleep(server.config.slack_latency)
+                    message = json.loads(body)
+                    message["authorization"] = self.headers.get("Authorization")
+                    with server.lock:
+                        server.slack_messages.append(message)
+                        server.slack_received_at.append(time.monotonic())
+                        ts = f"1700000000.{len(server.slack_messages):06d}"
+                    return self.send(200, {"ok": True, "channel": message["channel"], "ts": ts})
+                time.sleep(server.config.newsblur_latency)
+                if path == "/api/login":
+                    server.count("login")
+                    time.sleep(server.config.login_latency)
+                    with server.lock:
+                        server.logins.extend(parse_qs(body.decode("utf-8")).get("username", []))
+                    return self.send(
+                        200,
+                        {"authenticated": True},
+                        headers={"Set-Cookie": "newsblur_sessionid=standin; Path=/"},
+                    )
+                if path == "/reader/mark_story_hashes_as_read":
+                    server.count("mark_read")
+                    hashes = parse_qs(body.decode("utf-8")).get("story_hash", [])
+                    with server.lock:
+                        server.marked.update(hashes)
+                    return self.send(200, {"result": "ok"})
+                self.send(404, {"error": "not found"})
+
+        return Handler
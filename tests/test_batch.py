@@ -0,0 +1,186 @@
+import json
+import threading
+import time
+
+import pytest
+
+import main
+from batch import Account, load_batch_config, run_accounts, shard_accounts
+from standins import StandInConfig
+
+
+def write_config(tmp_path, config):
+    path = tmp_path / "batch.json"
+    path.write_text(json.dumps(config))
+    return str(path)
+
+
+def test_load_batch_config_merges_defaults_and_expands(tmp_path, monkeypatch):
+    monkeypatch.setenv("TEAM_A_PASSWORD", "secret")
+    path = write_config(tmp_path, {
+        "defaults": {
+            "MODEL_ID": "m", "SYNC_CHECKPOINT_PATH": "/data/{account}.db", "PIPELINED": True
+        },
+        "accounts": [
+            {"name": "a", "NEWSBLUR_PASSWORD": "${TEAM_A_PASSWORD}"},
+            {"name": "b", "MODEL_ID": "other", "FETCH_CONCURRENCY": 2},
+        ],
+    })
+    a, b = load_batch_config(path)
+    assert a == Account("a", {
+        "MODEL_ID": "m",
+        "SYNC_CHECKPOINT_PATH": "/data/a.db",
+        "PIPELINED": "true",
+        "NEWSBLUR_PASSWORD": "secret",
+    })
+    assert b.settings["MODEL_ID"] == "other"
+    assert b.settings["FETCH_CONCURRENCY"] == "2"
+
+
+@pytest.mark.parametrize("config, message", [
+    ({"accounts": []}, "no accounts"),
+    ({"accounts": [{"NEWSBLUR_USERNAME": "x"}]}, "needs a name"),
+    ({"accounts": [{"name": "a"}, {"name": "a"}]}, "Duplicate"),
+    ([{"name": "a"}], "must be a JSON object"),
+    ({"defaults": ["x"], "accounts": [{"name": "a"}]}, "defaults must be an object"),
+    ({"accounts": {"name": "a"}}, "accounts must be a list"),
+    ({"accounts": ["a"]}, "must be an object"),
+    ({"accounts": [{"name": 3}]}, "needs a name"),
+])
+def test_load_batch_config_rejects_invalid_configs(tmp_path, config, message):
+    with pytest.raises(ValueError, match=message):
+        load_batch_config(write_config(tmp_path, config))
+    (tmp_path / "bad.json").write_text("{")
+    with pytest.raises(ValueError, match="not valid JSON"):
+        load_batch_config(str(tmp_path / "bad.json"))
+
+
+def test_shards_split_accounts_stably_and_completely():
+    accounts = [Account(f"team-{i}", {}) for i in range(50)]
+    shards = [shard_accounts(accounts, i, 3) for i in range(3)]
+    names = [a.name for shard in shards for a in shard]
+    assert sorted(names) == sorted(a.name for a in accounts)
+    assert all(shards)
+    # Adding an account does not move existing ones
+    grown = shard_accounts(accounts + [Account("new", {})], 1, 3)
+    assert [a for a in grown if a.name != "new"] == shards[1]
+    assert shard_accounts(accounts, 0, 1) == accounts
+    with pytest.raises(ValueError):
+        shard_accounts(accounts, 3, 3)
+
+
+def test_run_accounts_caps_concurrency_and_isolates_failures():
+    active = {"now": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def run(account):
+        with lock:
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+        time.sleep(0.03)
+        with lock:
+            active["now"] -= 1
+        if account.name == "bad":
+            raise RuntimeError("boom")
+        return account.name != "d"
+
+    accounts = [Account(name, {}) for name in ["a", "bad", "c", "d", "e", "f"]]
+    results = run_accounts(accounts, run, concurrency=2)
+    assert active["peak"] == 2
+    assert [(r.name, r.ok) for r in results] == [
+        ("a", True), ("bad", False), ("c", True), ("d", False), ("e", True), ("f", True)
+    ]
+    assert run_accounts([], run, 2) == []
+
+
+@pytest.fixture
+def standin(make_standin):
+    # Credentials and webhooks come from each account in the batch config
+    config = StandInConfig(feeds=3, stories_per_feed=2, newsblur_latency=0.02)
+    return make_standin(
+        config, NEWSBLUR_USERNAME=None, NEWSBLUR_PASSWORD=None, SLACK_WEBHOOK_URL=None
+    )
+
+
+def test_batch_mode_runs_every_account_over_shared_pools(standin, monkeypatch, tmp_path):
+    accounts = [
+        {
+            "name": f"team-{i}",
+            "NEWSBLUR_USERNAME": f"user-{i}",
+            "NEWSBLUR_PASSWORD": "pw",
+            "SLACK_WEBHOOK_URL": f"{standin.url}/slack/{i}",
+        }
+        for i in range(5)
+    ]
+    config = write_config(tmp_path, {
+        "defaults": {"SYNC_CHECKPOINT_PATH": str(tmp_path / "{account}.db")},
+        "accounts": accounts,
+    })
+    monkeypatch.setenv("BATCH_CONFIG_PATH", config)
+    monkeypatch.setenv("BATCH_CONCURRENCY", "3")
+    monkeypatch.setenv("BATCH_NEWSBLUR_CONNECTIONS", "2")
+    monkeypatch.setenv("PAGE_CACHE_PATH", str(tmp_path / "pages.db"))
+    sessions = []
+    create = main.create_newsblur_session
+
+    def tracking_create(*args):
+        sessions.append(create(*args))
+        return sessions[-1]
+
+    monkeypatch.setattr(main, "create_newsblur_session", tracking_create)
+    main.main()
+
+    assert sorted(standin.logins) == [f"user-{i}" for i in range(5)]
+    assert sorted(standin.slack_webhooks) == [f"/slack/{i}" for i in range(5)]
+    assert len({id(session.get_adapter(standin.url)) for session in sessions}) == 1
+    assert sorted(p.name for p in tmp_path.glob("team-*.db")) == [f"team-{i}.db" for i in range(5)]
+    # Pages are shared through one cache: only accounts running at the same
+    # time can miss it together, so no page is fetched more than 3 times
+    pages = sum(standin.is_short(f, n) for f in range(3) for n in range(2))
+    assert pages <= standin.requests["page"] <= 3 * pages
+    assert main.newsblur_adapter is None and main.web_session is None
+    assert main.metrics.counters["batch_accounts"] == 5
+    main.page_cache.close()
+
+
+def test_batch_mode_runs_only_its_shard(standin, monkeypatch, tmp_path):
+    accounts = [
+        {"name": f"team-{i}", "NEWSBLUR_USERNAME": f"user-{i}", "NEWSBLUR_PASSWORD": "pw",
+         "SLACK_WEBHOOK_URL": f"{standin.url}/slack/{i}"}
+        for i in range(6)
+    ]
+    config = write_config(tmp_path, {"accounts": accounts})
+    monkeypatch.setenv("BATCH_SHARD_COUNT", "2")
+    logins = []
+    for index in ("0", "1"):
+        monkeypatch.setenv("BATCH_SHARD_INDEX", index)
+        results = main.run_batch(config)
+        logins.append(sorted(standin.logins))
+        standin.logins.clear()
+        assert [r.name for r in results] == [
+            a.name for a in shard_accounts(load_batch_config(config), int(index), 2)
+        ]
+    assert sorted(logins[0] + logins[1]) == [f"user-{i}" for i in range(6)]
+    assert not set(logins[0]) & set(logins[1])
+
+
+def test_batch_mode_reports_accounts_whose_run_failed(standin, monkeypatch, tmp_path, caplog):
+    accounts = [
+        {"name": name, "NEWSBLUR_USERNAME": name, "NEWSBLUR_PASSWORD": "pw",
+         "SLACK_WEBHOOK_URL": f"{standin.url}/slack/{name}"}
+        for name in ("locked-out", "ok")
+    ]
+    monkeypatch.setenv("BATCH_CONCURRENCY", "1")
+    standin.inject("/api/login", 401)
+    main.metrics.reset()
+    results = main.run_batch(write_config(tmp_path, {"accounts": accounts}))
+
+    assert [(r.name, r.ok) for r in results] == [("locked-out", False), ("ok", True)]
+    assert standin.slack_webhooks == ["/slack/ok"]
+    assert main.metrics.counters["batch_failed_accounts"] == 1
+    assert "Digests failed for accounts: locked-out" in caplog.text
+
+
+def test_batch_mode_reports_unreadable_config(tmp_path, caplog):
+    assert main.run_batch(str(tmp_path / "missing.json")) == []
+    assert "Failed to load batch config" in caplog.text
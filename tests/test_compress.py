@@ -0,0 +1,97 @@
+import pytest
+
+import main
+import tokens
+from compress import compress_texts, split_sentences
+from models import Feed, Story
+from standins import StandInConfig
+
+ARTICLE = (
+    "The city council approved the new transit budget on Tuesday. "
+    "The transit budget adds bus routes and cuts fares for students. "
+    "Council members said the budget for transit would take effect next year. "
+    "A local bakery won a prize for its sourdough bread. "
+    "Critics of the transit budget warned that fares could rise again later. "
+    "The mayor is expected to sign the transit bud"
+)
+
+
+@pytest.fixture(autouse=True)
+def heuristic_tokens(monkeypatch):
+    monkeypatch.setattr(tokens, "_loaded", True)
+    monkeypatch.setattr(tokens, "_encoding", None)
+
+
+def test_split_sentences_keeps_abbreviations_and_quotes_together():
+    assert split_sentences('Mr. Smith met U.S. officials. "It went well," he said! Did it? no') == [
+        "Mr. Smith met U.S. officials.",
+        '"It went well," he said!',
+        "Did it? no",
+    ]
+    assert split_sentences("") == []
+
+
+def test_compress_keeps_central_sentences_in_order():
+    [compressed] = compress_texts([ARTICLE], 45)
+
+    assert tokens.count_tokens(compressed) <= 45
+    assert "bakery" not in compressed  # Off-topic
+    assert "The mayor" not in compressed  # Fragment left by a character cut
+    sentences = split_sentences(compressed)
+    assert len(sentences) >= 2
+    assert all(sentence in ARTICLE for sentence in sentences)
+    assert sorted(sentences, key=ARTICLE.index) == sentences
+
+
+def test_compress_leaves_short_texts_and_falls_back_to_truncation():
+    texts = ["Short story.", "word " * 200]
+    short, unbroken = compress_texts(texts, 20)
+    assert short == "Short story."
+    assert unbroken == tokens.truncate_tokens(texts[1], 20)
+    assert compress_texts(texts, 0) == texts
+
+
+def test_precompress_stories_counts_saved_tokens():
+    feed = Feed(id="1", title="T")
+    feed.stories = [Story("h1", "t", ARTICLE, "http://x/1"), Story("h2", "t", "Brief.", "http://x/2")]
+    saved = main.precompress_stories([feed], 45)
+    assert saved > 0
+    assert feed.stories[1].content_text == "Brief."
+    assert feed.stories[0].source_text == ARTICLE
+    assert feed.stories[1].source_text is None
+    assert main.precompress_stories([feed], 0) == 0
+
+
+@pytest.fixture
+def standin(make_standin):
+    config = StandInConfig(feeds=3, stories_per_feed=3, content_chars=3000, short_content_ratio=0)
+    return make_standin(config, PRECOMPRESS_TOKENS="150")
+
+
+@pytest.mark.parametrize("pipelined", ["false", "true"])
+def test_run_sends_precompressed_content(standin, monkeypatch, pipelined):
+    monkeypatch.setenv("PIPELINED", pipelined)
+    main.main()
+
+    [completion] = standin.completions
+    prompt = completion["messages"][-1]["content"]
+    contents = [line[9:] for line in prompt.splitlines() if line.startswith("Content: ")]
+    assert len(contents) == 9
+    assert all(tokens.count_tokens(content) <= 150 for content in contents)
+    assert all(content.endswith(".") for content in contents)
+    assert main.metrics.counters["precompressed_tokens_saved"] > 9 * 500
+    assert len(standin.slack_messages) == 1
+
+
+def test_summary_store_reuses_precompressed_stories_across_batches(standin, monkeypatch, tmp_path):
+    monkeypatch.setenv("SUMMARY_STORE_PATH", str(tmp_path / "summaries.db"))
+    main.main()
+    assert len(standin.completions) == 1
+
+    # A different batch ranks the remaining stories' sentences differently
+    standin.marked.update(s["story_hash"] for s in standin.unread(2))
+    main.main()
+
+    assert len(standin.completions) == 1
+    assert len(standin.slack_messages) == 2
+    main.summary_store.close()
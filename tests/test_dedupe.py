@@ -0,0 +1,115 @@
+import random
+
+import pytest
+
+import dedupe
+import main
+from dedupe import DuplicateIndex, drop_near_duplicates, minhash_signature, shingle_hashes
+from models import Feed, Story
+from standins import WORDS, StandInConfig, paragraph
+
+
+def article(seed, words=120):
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def story(hash, text, permalink=None):
+    return Story(hash, f"Title {hash}", text, permalink or f"https://{hash}.example/a")
+
+
+def test_signatures_match_for_identical_text_and_fill_empty_bins():
+    text = article("a")
+    assert minhash_signature(shingle_hashes(text), 64) == minhash_signature(
+        shingle_hashes(text.upper()), 64
+    )
+    short = minhash_signature(shingle_hashes(article("b", words=12)), 64)
+    assert len(short) == 64 and None not in short
+    assert minhash_signature(set(), 64) == ()
+
+
+def test_index_finds_edited_copies_but_not_other_articles():
+    index = DuplicateIndex()
+    original = story("wire", article("wire"))
+    assert index.add(original) is None
+    words = original.content_text.split()
+    edited = " ".join(["Reuters", "-"] + words[:60] + ["reportedly"] + words[60:115])
+    assert index.add(story("copy", edited)) is original
+    assert index.add(story("other", article("other"))) is None
+    # Excerpts are too short to judge and are never folded
+    assert index.add(story("x1", "Read the full story on our site.")) is None
+    assert index.add(story("x2", "Read the full story on our site.")) is None
+
+
+def test_drop_near_duplicates_keeps_first_story_and_links_the_rest():
+    wire = article("wire")
+    a = Feed(id="1", title="A", stories=[story("a1", wire), story("a2", article("a2"))])
+    b = Feed(id="2", title="B", stories=[story("b1", wire)])
+    c = Feed(id="3", title="C", stories=[story("c1", article("c1")), story("c2", wire)])
+
+    assert drop_near_duplicates([a, b, c]) == 2
+    assert [s.hash for s in a.stories] == ["a1", "a2"]
+    assert b.stories == []
+    assert [s.hash for s in c.stories] == ["c1"]
+    assert a.stories[0].covered_hashes == ["a1", "b1", "c2"]
+
+
+def test_index_compares_candidates_not_pairs(monkeypatch):
+    calls = []
+    real = dedupe.jaccard
+    monkeypatch.setattr(dedupe, "jaccard", lambda a, b: calls.append(1) or real(a, b))
+    feeds = [
+        Feed(id=str(f), title=f"F{f}", stories=[
+            story(f"{f}:{n}", article(f"{f}/{n}")) for n in range(5)
+        ])
+        for f in range(200)
+    ]
+    assert drop_near_duplicates(feeds) == 0
+    # 1000 distinct stories: ~500k pairs, but only a handful of bucket collisions
+    assert len(calls) < 100
+
+
+def test_digest_and_prompt_link_duplicates(monkeypatch):
+    rep = story("a1", "x", "https://www.wire.example/a")
+    rep.duplicates.append(story("b1", "x", "https://local.example/b"))
+    feed = Feed(id="1", title="A", stories=[rep])
+
+    assert "Also at: https://local.example/b\n" in main.feed_prompt(feed)
+    digest = main.format_digest([feed], ["Summary."])
+    assert digest.endswith(
+        "<https://www.wire.example/a|[Read more]> <https://local.example/b|[local.example]>"
+    )
+    assert main.site_name("https://www.wire.example/a") == "wire.example"
+
+    marked = []
+    monkeypatch.setattr(
+        main, "mark_story_hashes_as_read", lambda s, hashes, c: marked.extend(hashes) or []
+    )
+    main.mark_stories_as_read(None, [feed])
+    assert marked == ["a1", "b1"]
+
+
+@pytest.fixture
+def standin(make_standin):
+    config = StandInConfig(
+        feeds=4, stories_per_feed=3, short_content_ratio=0, syndicated_stories=1
+    )
+    return make_standin(config, MARK_STORIES_AS_READ="true")
+
+
+@pytest.mark.parametrize("pipelined", ["false", "true"])
+def test_syndicated_story_is_summarized_once(standin, monkeypatch, pipelined):
+    monkeypatch.setenv("PIPELINED", pipelined)
+    main.main()
+
+    [completion] = standin.completions
+    prompt = completion["messages"][-1]["content"]
+    assert prompt.count("Title: Story 0 of feed") == 1
+    assert prompt.count("Title: ") == 9
+    assert "Also at: " + " ".join(f"{standin.url}/page/{f}/0" for f in (1, 2, 3)) in prompt
+    assert len(standin.marked) == 12
+
+
+def test_paragraph_filler_is_distinct_per_seed():
+    assert paragraph("1/0", 300) != paragraph("1/1", 300)
+    assert len(paragraph("1/0", 300)) == 300
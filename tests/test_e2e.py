@@ -0,0 +1,73 @@
+import pytest
+
+import main
+from standins import StandInConfig
+
+
+@pytest.fixture
+def standin(make_standin):
+    config = StandInConfig(feeds=4, stories_per_feed=3, short_content_ratio=0.25, page_bytes=5000)
+    return make_standin(config, MARK_STORIES_AS_READ="true")
+
+
+@pytest.mark.parametrize("fetch_mode", ["feed", "river"])
+def test_main_end_to_end_against_standins(standin, monkeypatch, fetch_mode):
+    monkeypatch.setenv("FETCH_MODE", fetch_mode)
+    main.main()
+
+    assert standin.requests["login"] == 1
+    assert standin.requests["openai"] == 1
+    assert standin.requests["page"] == 3  # one in four stories is excerpt-only
+    [message] = standin.slack_messages
+    assert "1. *Feed 0*" in message["text"]
+    assert "Story 2 of feed 3" in message["text"]
+    assert len(standin.marked) == 12
+
+    # Everything is read now, so the next run stops after the feed list
+    main.main()
+    assert standin.requests["openai"] == 1
+    assert len(standin.slack_messages) == 1
+
+
+def test_main_end_to_end_with_summary_store(standin, monkeypatch, tmp_path):
+    monkeypatch.setenv("MARK_STORIES_AS_READ", "false")
+    monkeypatch.setenv("SUMMARY_STORE_PATH", str(tmp_path / "summaries.db"))
+    main.main()
+    main.main()
+
+    assert standin.requests["openai"] == 1
+    assert len(standin.slack_messages) == 2
+    assert standin.slack_messages[0]["text"] == standin.slack_messages[1]["text"]
+    assert "Summary of article" in standin.slack_messages[0]["text"]
+    main.summary_store.close()
+
+
+def test_main_reports_stage_metrics(standin, monkeypatch, tmp_path):
+    import json
+
+    monkeypatch.setenv("RUN_REPORT_PATH", str(tmp_path / "report.json"))
+    monkeypatch.setenv("METRICS_TEXTFILE_PATH", str(tmp_path / "report.prom"))
+    main.main()
+
+    report = json.loads((tmp_path / "report.json").read_text())
+    stages = report["stages"]
+    for name in (
+        "authenticate_newsblur",
+        "fetch_feeds",
+        "fetch_feed_stories",
+        "fetch_webpage",
+        "clean_html",
+        "summarize_stories",
+        "send_to_slack",
+    ):
+        assert stages[name]["calls"] >= 1, name
+    assert stages["fetch_feed_stories"]["calls"] == 4
+    counters = report["counters"]
+    assert counters["page_requests"] == 3
+    assert counters["page_bytes"] > 0
+    assert counters["newsblur_requests"] >= 6
+    assert counters["newsblur_bytes"] > 0
+    assert counters["openai_requests"] == 1
+    assert counters["openai_prompt_tokens"] > 0
+    assert counters["slack_requests"] == 1
+    assert "newsblur_digest_openai_prompt_tokens" in (tmp_path / "report.prom").read_text()
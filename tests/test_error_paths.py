@@ -11,6 +11,12 @@ class BadJsonResp:
     def json(self):
         raise ValueError("bad json")
 
+    def iter_content(self, chunk_size=1):
+        yield b"{not json"
+
+    def close(self):
+        pass
+
 
 def test_send_to_slack_missing_url_and_exception(monkeypatch):
     # Missing URL path
@@ -78,15 +84,15 @@ def test_clean_html_variants(monkeypatch):
     assert main.clean_html(None) == ""
     assert "ok" in main.clean_html(b"<p>ok</p>")
 
-    # Force BeautifulSoup to raise to hit error branch
-    orig_bs = main.BeautifulSoup
+    # Force the extractor to raise to hit error branch
+    orig_extract = main.extract_text
 
     def raiser(*a, **k):
-        raise RuntimeError("bs error")
+        raise RuntimeError("parse error")
 
-    monkeypatch.setattr(main, "BeautifulSoup", raiser)
+    monkeypatch.setattr(main, "extract_text", raiser)
     try:
         assert main.clean_html("<p>x</p>") == ""
     finally:
-        monkeypatch.setattr(main, "BeautifulSoup", orig_bs)
+        monkeypatch.setattr(main, "extract_text", orig_extract)
 
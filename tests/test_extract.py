@@ -0,0 +1,122 @@
+import glob
+import os
+
+import pytest
+from bs4 import BeautifulSoup
+
+from extract import TextExtractor, extract_main_text, extract_text, extract_text_from_chunks
+
+FIXTURES = sorted(glob.glob(os.path.join(os.path.dirname(__file__), "fixtures", "pages", "*.html")))
+
+
+@pytest.mark.parametrize("path", FIXTURES, ids=os.path.basename)
+def test_extract_text_matches_beautifulsoup_on_fixtures(path):
+    with open(path, encoding="utf-8") as f:
+        html = f.read()
+    assert extract_text(html) == BeautifulSoup(html, "html.parser").get_text()
+
+
+def test_extract_text_skips_script_style_and_keeps_pre_whitespace():
+    html = "<style>p{}</style><p>a &amp; b</p>\n  <script>x()</script><pre>\n  </pre><![CDATA[c]]>"
+    assert extract_text(html) == "a & b\n\n  c"
+
+
+def test_extract_text_stops_at_limit():
+    html = "<p>" + "word " * 10000 + "</p>"
+    assert extract_text(html, limit=12) == "word word wo"
+
+
+def test_extract_text_from_chunks_stops_consuming_input():
+    consumed = []
+
+    def chunks():
+        for i in range(100):
+            consumed.append(i)
+            yield f"<p>{'x' * 50}</p>"
+
+    assert extract_text_from_chunks(chunks(), limit=120) == "x" * 120
+    assert len(consumed) == 3
+
+
+def test_text_extractor_flushes_trailing_text_on_close():
+    parser = TextExtractor()
+    parser.feed("<p>tail text")
+    parser.close()
+    assert parser.text() == "tail text"
+
+
+def load_fixture(name):
+    with open(os.path.join(os.path.dirname(__file__), "fixtures", "pages", name), encoding="utf-8") as f:
+        return f.read()
+
+
+def test_extract_main_text_drops_boilerplate():
+    text = extract_main_text(load_fixture("news_article.html"))
+    assert text.startswith("City Council Approves New Transit Plan")
+    assert "pending environmental review" in text
+    for boilerplate in ("cookies", "Subscribe", "Related stories", "Privacy policy", "gtag"):
+        assert boilerplate not in text
+
+    text = extract_main_text(load_fixture("tech_blog.html"))
+    assert "-X importtime" in text
+    for boilerplate in ("Popular posts", "Newsletter", "Share this post", "Powered by"):
+        assert boilerplate not in text
+
+
+def test_extract_main_text_drops_boilerplate_with_unclosed_tags():
+    # <li> and <p> inside the dropped nav and sidebar are never closed explicitly
+    text = extract_main_text(load_fixture("unclosed_nav.html"))
+    assert text.startswith("Library Extends Weekend Opening Hours")
+    assert "free computer terminals" in text
+    for boilerplate in ("Schools", "Most read", "bakery", "Privacy policy"):
+        assert boilerplate not in text
+
+    article = "<article>" + "<p>Article text, long enough to count as content.</p>" * 8 + "</article>"
+    unclosed = "<nav><ul><li><a>Home</a><li><a>X</a></ul></nav>" + article
+    closed = "<nav><ul><li><a>Home</a></li><li><a>X</a></li></ul></nav>" + article
+    assert extract_main_text(unclosed) == extract_main_text(closed) is not None
+
+
+def test_extract_main_text_returns_none_without_article():
+    assert extract_main_text(load_fixture("minimal_excerpt.html")) is None
+    assert extract_main_text("<div><a href='/'>Home</a></div>") is None
+
+
+def test_extract_main_text_joins_sibling_paragraphs():
+    paragraph = "<p>" + "A sentence about the story, with detail. " * 4 + "</p>"
+    html = (
+        "<body><div class='story-body'>" + paragraph * 3 + "</div>"
+        "<p>" + "Trailing paragraph outside the main container, still article text. " * 2 + "</p>"
+        "<div class='footer-links'><a href='/'>" + "link " * 40 + "</a></div></body>"
+    )
+    text = extract_main_text(html)
+    assert text.count("A sentence about the story") == 12
+    assert "Trailing paragraph" in text
+    assert "link link" not in text
+
+
+def test_extract_main_text_handles_void_and_unclosed_tags():
+    body = "Body text with enough words, commas, and detail to be scored as content. " * 5
+    html = f"<div class='content'><p>{body}<br>line two<img src=x><p>{body}</div></span><![CDATA[x]]>"
+    text = extract_main_text(html)
+    assert "line two" in text
+    assert text.count("Body text") == 10
+
+
+def test_extract_main_text_closes_implied_paragraphs_and_items():
+    body = "Body text with enough words, commas, and detail to be scored as content. "
+    paragraphs = "".join(f"<p>{i} {body}" for i in range(3000))
+    items = "".join(f"<li>{i} {body}" for i in range(3000))
+    html = f"<div class='content'>{paragraphs}</div><ul>{items}</ul>"
+    text = extract_main_text(html)
+    assert text.startswith("0 Body text")
+    assert "2999 Body text" in text
+    # Each paragraph is its own line rather than nested in the one before
+    assert len(text.splitlines()) >= 3000
+
+
+def test_extract_main_text_paragraph_closes_at_table_scope():
+    body = "Body text with enough words, commas, and detail to be scored as content. " * 5
+    html = f"<div class='content'><p>{body}<table><tr><td><p>cell {body}</td></tr></table> after</div>"
+    text = extract_main_text(html)
+    assert "cell Body text" in text and text.endswith("after")
@@ -0,0 +1,122 @@
+import json
+import threading
+import time
+
+import main
+from models import Feed, Story
+
+
+def test_fetch_feed_stories_defers_fallback(monkeypatch):
+    raw = {
+        "stories": [
+            {
+                "story_title": "A",
+                "story_content": "<p>short</p>",
+                "story_permalink": "http://example.com/a",
+                "story_hash": "h1",
+            }
+        ]
+    }
+
+    class Resp:
+        status_code = 200
+
+        def iter_content(self, chunk_size=1):
+            yield json.dumps(raw).encode("utf-8")
+
+        def close(self):
+            pass
+
+    class Sess:
+        def get(self, url, params=None, **kwargs):
+            return Resp()
+
+    def fail(url, **kwargs):
+        raise AssertionError("fallback should be deferred")
+
+    monkeypatch.setattr(main, "fetch_webpage", fail)
+    stories = main.fetch_feed_stories(Sess(), Feed(id="1", title="T"), fetch_fallback=False)
+    assert stories[0].content_text == "short"
+
+
+def test_fetch_fallback_content_gathers_across_feeds(monkeypatch):
+    long_text = "y" * (main.MIN_CONTENT_LENGTH + 10)
+    feed_a = Feed(id="1", title="A")
+    feed_a.stories = [
+        Story("h1", "t", "short", "http://a.test/1"),
+        Story("h2", "t", long_text, "http://a.test/2"),
+    ]
+    feed_b = Feed(id="2", title="B")
+    feed_b.stories = [
+        Story("h3", "t", "", "http://a.test/1"),  # same permalink as h1
+        Story("h4", "t", "", "http://b.test/4"),
+        Story("h5", "t", "", None),
+    ]
+    feed_c = Feed(id="3", title="C")
+    feed_c.stories = None
+
+    fetched = []
+    lock = threading.Lock()
+    sessions = set()
+
+    def fake_fetch(url, session=None):
+        with lock:
+            fetched.append(url)
+            sessions.add(id(session))
+        time.sleep(0.05)
+        if url.startswith("http://b.test"):
+            return None
+        return "page " + "z" * (main.MAX_CONTENT_LENGTH + 5)
+
+    monkeypatch.setattr(main, "fetch_webpage", fake_fetch)
+
+    updated = main.fetch_fallback_content([feed_a, feed_b, feed_c], concurrency=4)
+
+    assert updated == 2
+    assert sorted(fetched) == ["http://a.test/1", "http://b.test/4"]
+    assert len(sessions) == 1 and None not in sessions
+    assert feed_a.stories[0].content_text.startswith("page ")
+    assert len(feed_a.stories[0].content_text) == main.MAX_CONTENT_LENGTH
+    assert feed_b.stories[0].content_text == feed_a.stories[0].content_text
+    assert feed_a.stories[1].content_text == long_text
+    assert feed_b.stories[1].content_text == ""
+
+
+def test_fetch_fallback_content_nothing_pending_and_errors(monkeypatch):
+    feed = Feed(id="1", title="A")
+    feed.stories = [Story("h1", "t", "x" * main.MIN_CONTENT_LENGTH, "http://a.test/1")]
+    assert main.fetch_fallback_content([feed]) == 0
+
+    feed.stories = [Story("h1", "t", "", "http://a.test/1")]
+
+    def boom(url, session=None):
+        raise RuntimeError("parse")
+
+    monkeypatch.setattr(main, "fetch_webpage", boom)
+    assert main.fetch_fallback_content([feed], session=main.requests.Session()) == 0
+
+
+def test_create_web_session_limits_connections_per_host():
+    session = main.create_web_session(per_host=2, host_pools=5)
+    adapter = session.get_adapter("https://example.com/")
+    assert adapter._pool_maxsize == 2
+    assert adapter._pool_block is True
+    assert adapter._pool_connections == 5
+
+
+def test_fetch_webpage_uses_given_session():
+    class Resp:
+        status_code = 200
+        headers = {"Content-Type": "text/html; charset=utf-8"}
+
+        def iter_content(self, chunk_size=1):
+            yield b"<p>pooled</p>"
+
+        def close(self):
+            pass
+
+    class Sess:
+        def get(self, url, **kwargs):
+            return Resp()
+
+    assert main.fetch_webpage("http://x", session=Sess()) == "pooled"
@@ -0,0 +1,87 @@
+import threading
+import time
+
+import main
+from models import Feed, Story
+
+
+def test_fetch_all_feed_stories_preserves_order_and_runs_in_parallel(monkeypatch):
+    feeds = [Feed(id=str(i), title=f"F{i}") for i in range(6)]
+    active = {"now": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def fake_fetch(session, feed, fetch_fallback=True):
+        with lock:
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+        # Later feeds finish first to prove results are re-ordered
+        time.sleep(0.05 * (6 - int(feed.id)))
+        with lock:
+            active["now"] -= 1
+        return [Story(f"h{feed.id}", "t", "c", "u")]
+
+    monkeypatch.setattr(main, "fetch_feed_stories", fake_fetch)
+
+    start = time.monotonic()
+    results = main.fetch_all_feed_stories(object(), feeds, concurrency=3)
+    elapsed = time.monotonic() - start
+
+    assert [r[0].hash for r in results] == [f"h{i}" for i in range(6)]
+    assert active["peak"] == 3
+    # Sequential would take 1.05s
+    assert elapsed < 0.8
+
+
+def test_fetch_all_feed_stories_errors_and_timeouts_become_none(monkeypatch):
+    feeds = [Feed(id="ok", title="A"), Feed(id="boom", title="B"), Feed(id="slow", title="C")]
+
+    def fake_fetch(session, feed, fetch_fallback=True):
+        if feed.id == "boom":
+            raise RuntimeError("unexpected")
+        if feed.id == "slow":
+            time.sleep(0.5)
+        return [Story(feed.id, "t", "c", "u")]
+
+    monkeypatch.setattr(main, "fetch_feed_stories", fake_fetch)
+
+    results = main.fetch_all_feed_stories(object(), feeds, concurrency=3, feed_timeout=0.2)
+    assert results[0][0].hash == "ok"
+    assert results[1] is None
+    assert results[2] is None
+
+
+def test_fetch_all_feed_stories_times_each_feed_from_its_own_start(monkeypatch):
+    # Waiting on "first" must not extend the time "second" is allowed to run
+    delays = {"first": 0.27, "second": 0.54, "queued": 0.05}
+    feeds = [Feed(id=name, title=name) for name in delays]
+
+    def fake_fetch(session, feed, fetch_fallback=True):
+        time.sleep(delays[feed.id])
+        return [Story(feed.id, "t", "c", "u")]
+
+    monkeypatch.setattr(main, "fetch_feed_stories", fake_fetch)
+
+    start = time.monotonic()
+    results = main.fetch_all_feed_stories(object(), feeds, concurrency=2, feed_timeout=0.3)
+    elapsed = time.monotonic() - start
+
+    assert results[0][0].hash == "first"
+    assert results[1] is None
+    # "queued" only starts once "first" frees a worker, and still gets its full timeout
+    assert results[2][0].hash == "queued"
+    assert elapsed < 0.5
+
+
+def test_fetch_all_feed_stories_sequential(monkeypatch):
+    feeds = [Feed(id="1", title="A"), Feed(id="2", title="B")]
+    monkeypatch.setattr(main, "fetch_feed_stories", lambda s, f, fetch_fallback=True: None if f.id == "2" else [])
+    assert main.fetch_all_feed_stories(object(), feeds, concurrency=1) == [[], None]
+
+
+def test_env_int(monkeypatch):
+    monkeypatch.setenv("X_INT", "4")
+    assert main.env_int("X_INT", 1) == 4
+    monkeypatch.setenv("X_INT", "nope")
+    assert main.env_int("X_INT", 1) == 1
+    monkeypatch.delenv("X_INT")
+    assert main.env_int("X_INT", 2) == 2
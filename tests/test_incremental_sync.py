@@ -0,0 +1,140 @@
+import main
+from models import Feed, Story
+from storage import SyncCheckpoint
+
+
+class Resp:
+    def __init__(self, status_code=200, json_data=None):
+        self.status_code = status_code
+        self._json = json_data or {}
+
+    def json(self):
+        return self._json
+
+
+def test_fetch_feeds_keeps_unread_counters():
+    data = {
+        "feeds": {
+            "1": {"feed_title": "Busy", "ps": 1, "nt": 4, "ng": 0},
+            "2": {"feed_title": "Idle", "ps": 0, "nt": 0, "ng": 0},
+            "3": {"feed_title": "Unknown"},
+            "4": {"feed_title": "Odd", "nt": "x", "ps": -2},
+        }
+    }
+
+    class Sess:
+        def get(self, url, **kwargs):
+            return Resp(200, data)
+
+    feeds = main.fetch_feeds(Sess())
+    assert [f.unread_count for f in feeds] == [5, 0, None, 0]
+
+
+def test_select_feeds_to_fetch_skips_idle_feeds():
+    feeds = [
+        Feed(id="1", title="A", unread_neutral=2),
+        Feed(id="2", title="B", unread_positive=0, unread_neutral=0, unread_negative=0),
+        Feed(id="3", title="C"),
+    ]
+    assert [f.id for f in main.select_feeds_to_fetch(object(), feeds)] == ["1", "3"]
+
+
+def test_select_feeds_to_fetch_uses_checkpoint(tmp_path):
+    checkpoint = SyncCheckpoint(str(tmp_path / "sync.db"))
+    checkpoint.mark_processed(["1:a", "2:a", "2:b"])
+    requested = []
+
+    class Sess:
+        def get(self, url, params=None, **kwargs):
+            requested.append((url, params))
+            return Resp(200, {"unread_feed_story_hashes": {
+                "1": ["1:a", "1:new"],
+                "2": [["2:a", 1700000000], ["2:b", 1700000001]],
+            }})
+
+    feeds = [Feed(id=i, title=i, unread_neutral=2) for i in ("1", "2", "3")]
+    selected = main.select_feeds_to_fetch(Sess(), feeds, checkpoint)
+
+    assert [f.id for f in selected] == ["1", "3"]
+    assert len(requested) == 1
+    assert requested[0][0].endswith("/reader/unread_story_hashes")
+    assert requested[0][1] == [("feed_id", "1"), ("feed_id", "2"), ("feed_id", "3")]
+
+
+def test_fetch_unread_story_hashes_errors():
+    feeds = [Feed(id="1", title="A")]
+
+    class SessExc:
+        def get(self, url, **kwargs):
+            raise main.requests.exceptions.RequestException("net")
+
+    class SessStatus:
+        def get(self, url, **kwargs):
+            return Resp(500)
+
+    class BadJson:
+        status_code = 200
+
+        def json(self):
+            raise ValueError("bad")
+
+    class SessBad:
+        def get(self, url, **kwargs):
+            return BadJson()
+
+    for sess in (SessExc(), SessStatus(), SessBad()):
+        assert main.fetch_unread_story_hashes(sess, feeds) is None
+
+
+def test_checkpoint_drops_processed_stories_and_expires(tmp_path):
+    path = str(tmp_path / "sync.db")
+    checkpoint = SyncCheckpoint(path)
+    checkpoint.mark_processed(["h1"])
+    feed = Feed(id="1", title="A")
+    feed.stories = [Story("h1", "t", "c", "u"), Story("h2", "t", "c", "u")]
+    main.drop_processed_stories([feed, Feed(id="2", title="B", stories=None)], checkpoint)
+    assert [s.hash for s in feed.stories] == ["h2"]
+    checkpoint.close()
+
+    assert SyncCheckpoint(path, max_age=-1).processed(["h1"]) == set()
+
+
+def test_main_skips_idle_feeds_and_records_checkpoint(tmp_path, monkeypatch):
+    for k, v in {
+        "NEWSBLUR_USERNAME": "u",
+        "NEWSBLUR_PASSWORD": "p",
+        "MODEL_ID": "m",
+        "SLACK_WEBHOOK_URL": "https://hooks.slack.test/x",
+        "SYNC_CHECKPOINT_PATH": str(tmp_path / "sync.db"),
+    }.items():
+        monkeypatch.setenv(k, v)
+    monkeypatch.setattr(main, "authenticate_newsblur", lambda u, p: object())
+    monkeypatch.setattr(main, "fetch_unread_story_hashes", lambda s, f: None)
+    monkeypatch.setattr(
+        main,
+        "fetch_feeds",
+        lambda s: [Feed(id="1", title="A", unread_neutral=1), Feed(id="2", title="B", unread_neutral=0)],
+    )
+    fetched = []
+
+    def fake_fetch(session, feed, fetch_fallback=True):
+        fetched.append(feed.id)
+        return [Story("h1", "t", "x" * 200, "u")]
+
+    monkeypatch.setattr(main, "fetch_feed_stories", fake_fetch)
+    monkeypatch.setattr(main, "summarize_stories", lambda feeds, model_id, **kw: (feeds, "SUMMARY"))
+    sent = []
+    monkeypatch.setattr(main, "send_to_slack", lambda summary, url: sent.append(summary) or True)
+
+    main.main()
+    assert fetched == ["1"]
+    assert sent == ["SUMMARY"]
+    assert SyncCheckpoint(str(tmp_path / "sync.db")).processed(["h1"]) == {"h1"}
+
+    # Second run: the story was already delivered, so nothing is sent
+    main.main()
+    assert sent == ["SUMMARY"]
+
+    monkeypatch.setattr(main, "fetch_feeds", lambda s: [Feed(id="2", title="B", unread_neutral=0)])
+    main.main()
+    assert fetched == ["1", "1"]
@@ -0,0 +1,139 @@
+import json
+
+import pytest
+
+import main
+from extract import decode_chunks
+from jsonstream import iter_array_items
+from models import Feed
+
+
+def pieces(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 1000])
+def test_iter_array_items_matches_json_loads_for_any_chunking(size):
+    doc = {
+        "authenticated": True,
+        "feed_tags": [["a", 1], ["b", 2]],
+        "stories": [{"story_hash": f"1:{i}", "n": i * 1.5, "story_content": "é\"\\" * i} for i in range(5)],
+        "user_profiles": [],
+        "updated": 1234567,
+    }
+    text = json.dumps(doc, indent=1)
+    assert list(iter_array_items(pieces(text, size), "stories")) == doc["stories"]
+
+
+def test_iter_array_items_handles_multibyte_characters_split_across_chunks():
+    data = json.dumps({"stories": ["naïve café ✓"]}, ensure_ascii=False).encode("utf-8")
+    chunks = decode_chunks(data[i:i + 1] for i in range(len(data)))
+    assert list(iter_array_items(chunks, "stories")) == ["naïve café ✓"]
+
+
+def test_iter_array_items_stops_reading_when_the_caller_stops():
+    text = json.dumps({"stories": [{"i": i, "body": "x" * 100} for i in range(1000)]})
+    read = []
+
+    def chunks():
+        for piece in pieces(text, 64):
+            read.append(piece)
+            yield piece
+
+    items = iter_array_items(chunks(), "stories")
+    assert [next(items)["i"] for _ in range(3)] == [0, 1, 2]
+    assert sum(map(len, read)) < 1000
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("{}", []),
+        ('{"stories": []}', []),
+        ('{"stories": null, "other": [1]}', []),
+        ('{"other": {"stories": [1]}}', []),
+        ('{"count": 12345, "stories": [1, 23, 456]}', [1, 23, 456]),
+    ],
+)
+def test_iter_array_items_edge_cases(text, expected):
+    assert list(iter_array_items(pieces(text, 2), "stories")) == expected
+
+
+@pytest.mark.parametrize(
+    "text", ["", "[1, 2]", '{"stories": [1, 2', '{"stories": [1 2]}', '{1: []}', '{"a" 1}']
+)
+def test_iter_array_items_rejects_malformed_json(text):
+    with pytest.raises(ValueError):
+        list(iter_array_items(pieces(text, 3), "stories"))
+
+
+class StreamedResp:
+    status_code = 200
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.sent = 0
+        self.closed = False
+
+    def iter_content(self, chunk_size=1):
+        for i in range(0, len(self.body), chunk_size):
+            self.sent += 1
+            yield self.body[i:i + chunk_size]
+
+    def close(self):
+        self.closed = True
+
+
+def test_fetch_feed_stories_stops_reading_after_max_stories():
+    raw = {
+        "stories": [
+            {
+                "story_title": f"S{i}",
+                "story_content": "<p>" + "word " * 20_000 + "</p>",
+                "story_permalink": f"http://example.com/{i}",
+                "story_hash": f"h{i}",
+            }
+            for i in range(50)
+        ]
+    }
+    resp = StreamedResp(json.dumps(raw).encode("utf-8"))
+
+    class Sess:
+        def get(self, url, **kwargs):
+            assert kwargs["stream"] is True
+            return resp
+
+    stories = main.fetch_feed_stories(Sess(), Feed(id="1", title="T"))
+    assert [s.hash for s in stories] == [f"h{i}" for i in range(main.MAX_STORIES)]
+    assert all(len(s.content_text) == main.MAX_CONTENT_LENGTH for s in stories)
+    assert resp.closed
+    total_chunks = -(-len(resp.body) // main.FETCH_CHUNK_SIZE)
+    assert resp.sent < total_chunks / 5
+
+
+def test_fetch_feed_stories_over_a_newsblur_session_reads_only_what_it_needs(make_standin):
+    from standins import StandInConfig
+
+    server = make_standin(
+        StandInConfig(feeds=1, stories_per_feed=400, content_chars=5000, short_content_ratio=0)
+    )
+    payload = len(json.dumps({"stories": server.unread(0)}))
+    main.metrics.reset()
+    # The session's response hooks must not read the streamed body themselves
+    with main.create_newsblur_session() as session:
+        stories = main.fetch_feed_stories(session, Feed("0", "Feed 0"), fetch_fallback=False)
+
+    assert len(stories) == main.MAX_STORIES
+    assert main.metrics.counters["newsblur_requests"] == 1
+    assert 0 < main.metrics.counters["newsblur_bytes"] < payload / 20
+
+
+def test_fetch_feed_stories_reports_truncated_payload():
+    resp = StreamedResp(b'{"stories": [{"story_hash": "h1"')
+
+    class Sess:
+        def get(self, url, **kwargs):
+            return resp
+
+    assert main.fetch_feed_stories(Sess(), Feed(id="1", title="T")) is None
+    assert resp.closed
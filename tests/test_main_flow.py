@@ -36,14 +36,17 @@ def test_main_happy_path(monkeypatch):
     monkeypatch.setattr(
         main,
         "fetch_feed_stories",
-        lambda s, f: [Story(hash="h", title="t", content_text="c", permalink="u")],
+        lambda s, f, fetch_fallback=True: [
+            Story(hash="h", title="t", content_text="c", permalink="u")
+        ],
     )
-    monkeypatch.setattr(main, "summarize_stories", lambda feeds, model_id: "SUMMARY")
+    monkeypatch.setattr(main, "fetch_fallback_content", lambda feeds, concurrency: 0)
+    monkeypatch.setattr(main, "summarize_stories", lambda feeds, model_id, **kwargs: (feeds, "SUMMARY"))
 
     def fake_send(summary, url):
         called["send"] += 1
 
-    def fake_mark(session, feeds):
+    def fake_mark(session, feeds, **kwargs):
         called["mark"] += 1
 
     monkeypatch.setattr(main, "send_to_slack", fake_send)
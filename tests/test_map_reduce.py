@@ -0,0 +1,155 @@
+import threading
+import time
+
+import main
+from models import Feed, Story
+
+
+def make_feeds(n, content_len=400):
+    feeds = []
+    for i in range(1, n + 1):
+        feed = Feed(id=str(i), title=f"Feed {i}")
+        feed.stories = [Story(f"h{i}", f"Story {i}", "x" * content_len, f"http://e/{i}")]
+        feeds.append(feed)
+    return feeds
+
+
+def test_chunk_by_tokens_respects_budget():
+    assert main.chunk_by_tokens(list("abcde"), [3, 3, 3, 10, 1], 6) == [
+        ["a", "b"],
+        ["c"],
+        ["d"],
+        ["e"],
+    ]
+    assert main.chunk_by_tokens([], [], 5) == []
+
+
+def test_merge_digests_renumbers_feeds():
+    merged = main.merge_digests([
+        "1. *A*\n  1. *s* - x\n2. *B*\n  1. *t* - y",
+        "1. *C*\n  1. *u* - z\n  2. *v* - w\n",
+    ])
+    assert merged.splitlines() == [
+        "1. *A*",
+        "  1. *s* - x",
+        "2. *B*",
+        "  1. *t* - y",
+        "3. *C*",
+        "  1. *u* - z",
+        "  2. *v* - w",
+    ]
+
+
+def test_summarize_stories_map_reduce_runs_chunks_in_parallel(monkeypatch):
+    prompts = []
+    active = {"now": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def fake_prompt(content, model_id):
+        with lock:
+            prompts.append(content)
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+        time.sleep(0.05)
+        with lock:
+            active["now"] -= 1
+        titles = [line[6:] for line in content.splitlines() if line.startswith("Feed: ")]
+        return "\n".join(f"1. *{t}*\n  1. *story*" for t in titles)
+
+    monkeypatch.setattr(main, "summarize_prompt", fake_prompt)
+    monkeypatch.setattr(main, "summary_store", None)
+
+    feeds = make_feeds(6)
+    budget = main.estimate_tokens(main.feed_prompt(feeds[0])) * 2
+    summarized, digest = main.summarize_stories(feeds, "m", chunk_tokens=budget, concurrency=3)
+
+    assert summarized == feeds
+    assert len(prompts) == 3
+    assert active["peak"] > 1
+    top_level = [line for line in digest.splitlines() if not line.startswith(" ")]
+    assert top_level == [f"{i}. *Feed {i}*" for i in range(1, 7)]
+
+
+def test_summarize_stories_single_call_when_small_or_disabled(monkeypatch):
+    calls = []
+    monkeypatch.setattr(main, "summarize_prompt", lambda c, m: calls.append(c) or "ok")
+    monkeypatch.setattr(main, "summary_store", None)
+
+    assert main.summarize_stories(make_feeds(3), "m", chunk_tokens=100000)[1] == "ok"
+    assert main.summarize_stories(make_feeds(3), "m", chunk_tokens=0)[1] == "ok"
+    assert len(calls) == 2
+
+
+def test_summarize_chunks_tolerates_partial_failures(monkeypatch):
+    def flaky(content, model_id):
+        if "Feed 1" in content:
+            raise RuntimeError("boom")
+        return "1. *Feed 2*"
+
+    monkeypatch.setattr(main, "summarize_prompt", flaky)
+    feeds = make_feeds(2)
+    chunks = [[(feed, f"Feed: {feed.title}\n")] for feed in feeds]
+    # The failed chunk's feed is not reported as summarized
+    assert main.summarize_chunks(chunks, "m", 2) == ([feeds[1]], "1. *Feed 2*")
+
+    monkeypatch.setattr(main, "summarize_prompt", lambda c, m: None)
+    try:
+        main.summarize_chunks(chunks, "m", 2)
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("expected RuntimeError")
+
+
+def test_summarize_story_batches_splits_by_tokens(monkeypatch):
+    batches = []
+
+    def fake_batch(stories, model_id):
+        batches.append([s.hash for s in stories])
+        return [f"sum {s.hash}" for s in stories]
+
+    monkeypatch.setattr(main, "summarize_story_batch", fake_batch)
+    stories = [story for feed in make_feeds(4) for story in feed.stories]
+    budget = main.estimate_tokens("Story 1" + "x" * 400) * 2
+
+    result = main.summarize_story_batches(stories, "m", budget, 2)
+    assert result == ["sum h1", "sum h2", "sum h3", "sum h4"]
+    assert sorted(batches) == [["h1", "h2"], ["h3", "h4"]]
+
+    batches.clear()
+    assert main.summarize_story_batches(stories, "m", 0, 2) == result
+    assert batches == [["h1", "h2", "h3", "h4"]]
+
+
+def test_run_leaves_feeds_of_failed_chunks_unread(monkeypatch):
+    monkeypatch.setenv("NEWSBLUR_USERNAME", "u")
+    monkeypatch.setenv("NEWSBLUR_PASSWORD", "p")
+    monkeypatch.setenv("MODEL_ID", "m")
+    monkeypatch.setenv("SLACK_WEBHOOK_URL", "https://hooks.slack.test/x")
+    monkeypatch.setenv("MARK_STORIES_AS_READ", "true")
+    monkeypatch.setenv("SUMMARY_CHUNK_TOKENS", "1")
+    monkeypatch.delenv("PIPELINED", raising=False)
+    feeds = make_feeds(3)
+
+    def flaky(content, model_id):
+        if "Feed: Feed 2" in content:
+            raise RuntimeError("boom")
+        return "1. *Feed*"
+
+    marked = []
+    monkeypatch.setattr(main, "summary_store", None)
+    monkeypatch.setattr(main, "connect_newsblur", lambda u, p, store: (object(), feeds))
+    monkeypatch.setattr(main, "select_feeds_to_fetch", lambda s, feeds, checkpoint: feeds)
+    monkeypatch.setattr(
+        main, "fetch_all_feed_stories", lambda s, feeds, **kw: [feed.stories for feed in feeds]
+    )
+    monkeypatch.setattr(main, "fetch_fallback_content", lambda feeds, concurrency: 0)
+    monkeypatch.setattr(main, "summarize_prompt", flaky)
+    monkeypatch.setattr(main, "send_to_slack", lambda summary, url: True)
+    monkeypatch.setattr(
+        main, "mark_stories_as_read", lambda s, feeds, **kw: marked.extend(f.id for f in feeds)
+    )
+
+    main.main()
+
+    assert marked == ["1", "3"]
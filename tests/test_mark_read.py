@@ -0,0 +1,100 @@
+import threading
+
+import main
+from models import Feed, Story
+from storage import MarkReadJournal
+
+
+class Resp:
+    def __init__(self, status_code=200):
+        self.status_code = status_code
+
+
+class RecordingSession:
+    def __init__(self, fail=()):
+        self.posts = []
+        self.fail = set(fail)
+        self.lock = threading.Lock()
+
+    def post(self, url, data=None, **kwargs):
+        hashes = [value for _, value in data]
+        with self.lock:
+            self.posts.append(hashes)
+        if self.fail & set(hashes):
+            return Resp(500)
+        return Resp(200)
+
+
+def make_feeds(n_feeds, per_feed):
+    feeds = []
+    for f in range(n_feeds):
+        feed = Feed(id=str(f), title="F")
+        feed.stories = [Story(f"{f}:{i}", "t", "c", "u") for i in range(per_feed)]
+        feeds.append(feed)
+    return feeds
+
+
+def test_mark_stories_as_read_rechunks_across_feeds():
+    session = RecordingSession()
+    feeds = make_feeds(3, 4)
+    feeds[1].stories.append(feeds[0].stories[0])  # duplicate across feeds
+    main.mark_stories_as_read(session, feeds)
+
+    assert all(len(chunk) <= main.MARK_READ_CHUNK_SIZE for chunk in session.posts)
+    assert len(session.posts) == 3
+    posted = sorted(h for chunk in session.posts for h in chunk)
+    assert posted == sorted(s.hash for feed in make_feeds(3, 4) for s in feed.stories)
+
+
+def test_failed_chunks_are_journaled_and_replayed(tmp_path):
+    journal = MarkReadJournal(str(tmp_path / "journal.db"))
+    session = RecordingSession(fail={"1:0"})
+    main.mark_stories_as_read(session, make_feeds(2, 5), journal=journal)
+    assert journal.pending() == [f"1:{i}" for i in range(5)]
+    journal.close()
+
+    # Next run: still failing, so the hashes stay queued
+    journal = MarkReadJournal(str(tmp_path / "journal.db"))
+    main.replay_mark_read_journal(RecordingSession(fail={"1:0"}), journal)
+    assert len(journal.pending()) == 5
+
+    session = RecordingSession()
+    main.replay_mark_read_journal(session, journal)
+    assert session.posts == [[f"1:{i}" for i in range(5)]]
+    assert journal.pending() == []
+
+    # Nothing pending: no requests
+    session = RecordingSession()
+    main.replay_mark_read_journal(session, journal)
+    assert session.posts == []
+
+
+def test_mark_story_hashes_as_read_empty():
+    assert main.mark_story_hashes_as_read(RecordingSession(), []) == []
+
+
+def test_main_replays_journal_before_fetching_stories(tmp_path, monkeypatch):
+    path = str(tmp_path / "journal.db")
+    MarkReadJournal(path).add(["old:1"])
+    for k, v in {
+        "NEWSBLUR_USERNAME": "u",
+        "NEWSBLUR_PASSWORD": "p",
+        "MODEL_ID": "m",
+        "SLACK_WEBHOOK_URL": "https://hooks.slack.test/x",
+        "MARK_READ_JOURNAL_PATH": path,
+    }.items():
+        monkeypatch.setenv(k, v)
+    session = RecordingSession()
+    order = []
+    monkeypatch.setattr(main, "authenticate_newsblur", lambda u, p: session)
+    monkeypatch.setattr(main, "fetch_feeds", lambda s: [Feed(id="1", title="A")])
+
+    def fake_fetch(session_, feed, fetch_fallback=True):
+        order.append(list(session.posts))
+        return []
+
+    monkeypatch.setattr(main, "fetch_feed_stories", fake_fetch)
+
+    main.main()
+    assert order == [[["old:1"]]]
+    assert MarkReadJournal(path).pending() == []
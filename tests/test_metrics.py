@@ -0,0 +1,70 @@
+import json
+import threading
+
+import main
+from metrics import RunMetrics, write_prometheus_textfile
+
+
+def test_run_metrics_stages_and_counters():
+    m = RunMetrics()
+
+    @m.timed("work")
+    def work(n):
+        m.incr("items", n)
+        return n
+
+    threads = [threading.Thread(target=work, args=(2,)) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    with m.stage("phase"):
+        pass
+
+    report = m.report()
+    assert report["stages"]["work"]["calls"] == 5
+    assert report["stages"]["phase"]["calls"] == 1
+    assert report["counters"] == {"items": 10}
+    assert report["peak_rss_bytes"] > 0
+    json.dumps(report)
+
+    m.reset()
+    assert m.report()["stages"] == {} and m.report()["counters"] == {}
+
+
+def test_write_prometheus_textfile(tmp_path):
+    report = {
+        "started_at": 1700000000.0,
+        "duration_seconds": 1.5,
+        "peak_rss_bytes": 1024,
+        "stages": {"fetch_feeds": {"calls": 1, "seconds": 0.25}},
+        "counters": {"page_bytes": 42},
+    }
+    path = tmp_path / "digest.prom"
+    write_prometheus_textfile(report, str(path))
+    text = path.read_text()
+    assert "newsblur_digest_run_duration_seconds 1.5\n" in text
+    assert 'newsblur_digest_stage_seconds{stage="fetch_feeds"} 0.25\n' in text
+    assert 'newsblur_digest_stage_calls{stage="fetch_feeds"} 1\n' in text
+    assert "# TYPE newsblur_digest_page_bytes gauge\nnewsblur_digest_page_bytes 42\n" in text
+    assert "newsblur_digest_peak_rss_bytes 1024\n" in text
+
+
+def test_emit_run_report_writes_files_and_survives_errors(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "metrics", RunMetrics())
+    main.metrics.incr("x")
+    report = main.emit_run_report(str(tmp_path / "r.json"), str(tmp_path / "r.prom"))
+    assert json.loads((tmp_path / "r.json").read_text())["counters"] == {"x": 1}
+    assert (tmp_path / "r.prom").exists()
+    assert report["counters"] == {"x": 1}
+
+    # Unwritable paths are logged, not raised
+    main.emit_run_report(str(tmp_path / "missing" / "r.json"))
+
+
+def test_main_emits_report_on_early_exit(tmp_path, monkeypatch):
+    for k in ["NEWSBLUR_USERNAME", "NEWSBLUR_PASSWORD", "MODEL_ID", "SLACK_WEBHOOK_URL"]:
+        monkeypatch.delenv(k, raising=False)
+    monkeypatch.setenv("RUN_REPORT_PATH", str(tmp_path / "report.json"))
+    main.main()
+    assert "duration_seconds" in json.loads((tmp_path / "report.json").read_text())
@@ -11,3 +11,14 @@ def test_story_dataclass():
     assert story.title == "T"
     assert story.permalink.startswith("http")
 
+
+
+def test_feed_unread_count():
+    assert Feed(id="1", title="T").unread_count is None
+    assert Feed(id="1", title="T", unread_positive=1, unread_neutral=2).unread_count == 3
+
+
+def test_models_are_slotted():
+    story = Story(hash="h1", title="T", content_text="C", permalink="http://x")
+    assert not hasattr(story, "__dict__")
+    assert not hasattr(Feed(id="1", title="T"), "__dict__")
@@ -0,0 +1,112 @@
+import main
+from storage import PageCache
+
+
+class Resp:
+    def __init__(self, status_code=200, content=b"", headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    def iter_content(self, chunk_size=1):
+        yield self.content
+
+    def close(self):
+        pass
+
+
+def test_page_cache_roundtrip_and_lru_eviction(tmp_path):
+    cache = PageCache(str(tmp_path / "pages.db"), max_bytes=10)
+    cache.put("a", "aaaa", etag='"1"')
+    cache.put("b", "bbbb")
+    assert cache.get("a").etag == '"1"'  # a is now most recently used
+    cache.put("c", "cccc")
+    assert cache.get("b") is None
+    assert cache.get("a").text == "aaaa"
+    assert cache.get("c").text == "cccc"
+    assert cache.total_bytes() == 8
+    # Entries bigger than the whole cache are not stored
+    cache.put("huge", "x" * 11)
+    assert cache.get("huge") is None
+    cache.close()
+
+    reopened = PageCache(str(tmp_path / "pages.db"), max_bytes=10)
+    assert reopened.get("a").text == "aaaa"
+    reopened.close()
+
+
+def test_fetch_webpage_cache_hit_skips_network_and_parse(tmp_path, monkeypatch):
+    cache = PageCache(str(tmp_path / "pages.db"), max_age=3600)
+    monkeypatch.setattr(main, "page_cache", cache)
+    calls = []
+
+    def get(url, **kwargs):
+        calls.append(kwargs.get("headers"))
+        return Resp(200, b"<p>hello</p>", {"ETag": '"v1"', "Last-Modified": "Mon"})
+
+    monkeypatch.setattr(main.requests, "get", get)
+    assert main.fetch_webpage("http://x") == "hello"
+
+    def no_parse(_):
+        raise AssertionError("clean_html should not run on a cache hit")
+
+    monkeypatch.setattr(main, "clean_html", no_parse)
+    assert main.fetch_webpage("http://x") == "hello"
+    assert calls == [None]
+
+
+def test_fetch_webpage_revalidates_stale_entries(tmp_path, monkeypatch):
+    cache = PageCache(str(tmp_path / "pages.db"), max_age=0)
+    cache.put("http://x", "old text", etag='"v1"', last_modified="Mon")
+    monkeypatch.setattr(main, "page_cache", cache)
+    seen = []
+
+    def not_modified(url, headers=None, **kwargs):
+        seen.append(headers)
+        return Resp(304)
+
+    monkeypatch.setattr(main.requests, "get", not_modified)
+    assert main.fetch_webpage("http://x") == "old text"
+    assert seen == [{"If-None-Match": '"v1"', "If-Modified-Since": "Mon"}]
+
+    def changed(url, headers=None, **kwargs):
+        return Resp(200, b"<p>new text</p>", {"ETag": '"v2"'})
+
+    monkeypatch.setattr(main.requests, "get", changed)
+    assert main.fetch_webpage("http://x") == "new text"
+    assert cache.get("http://x").etag == '"v2"'
+
+    def down(url, **kwargs):
+        raise main.requests.exceptions.RequestException("down")
+
+    # Stale content is served when revalidation fails
+    monkeypatch.setattr(main.requests, "get", down)
+    assert main.fetch_webpage("http://x") == "new text"
+
+    # So is it when the server errors, but not when the page is gone
+    monkeypatch.setattr(main.requests, "get", lambda url, **kwargs: Resp(503))
+    assert main.fetch_webpage("http://x") == "new text"
+    monkeypatch.setattr(main.requests, "get", lambda url, **kwargs: Resp(404))
+    assert main.fetch_webpage("http://x") is None
+    assert main.fetch_webpage("http://uncached") is None
+
+
+def test_main_enables_stores(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "page_cache", None)
+    monkeypatch.setattr(main, "summary_store", None)
+    for k, v in {
+        "NEWSBLUR_USERNAME": "u",
+        "NEWSBLUR_PASSWORD": "p",
+        "MODEL_ID": "m",
+        "SLACK_WEBHOOK_URL": "https://hooks.slack.test/x",
+        "PAGE_CACHE_PATH": str(tmp_path / "pages.db"),
+        "SUMMARY_STORE_PATH": str(tmp_path / "summaries.db"),
+    }.items():
+        monkeypatch.setenv(k, v)
+    monkeypatch.setattr(main, "authenticate_newsblur", lambda u, p: None)
+
+    main.main()
+    assert isinstance(main.page_cache, PageCache)
+    main.page_cache.close()
+    assert main.summary_store is not None
+    main.summary_store.close()
@@ -0,0 +1,169 @@
+import threading
+import time
+
+import pytest
+
+import main
+from models import Feed, Story
+from pipeline import iter_pipeline
+from standins import StandInConfig
+
+
+def test_iter_pipeline_runs_items_through_every_stage():
+    stages = [("double", lambda x: x * 2, 3), ("inc", lambda x: x + 1, 2)]
+    results = dict(iter_pipeline(range(20), stages, queue_size=2))
+    assert results == {i: i * 2 + 1 for i in range(20)}
+
+
+def test_iter_pipeline_yields_none_for_dropped_and_failed_items():
+    def check(x):
+        if x == 3:
+            raise ValueError("boom")
+        return None if x == 5 else x
+
+    results = dict(iter_pipeline(range(8), [("check", check, 2), ("same", lambda x: x, 1)]))
+    assert results == {0: 0, 1: 1, 2: 2, 3: None, 4: 4, 5: None, 6: 6, 7: 7}
+    assert list(iter_pipeline([], [("same", lambda x: x, 4)])) == []
+
+
+def test_iter_pipeline_applies_backpressure():
+    started = []
+
+    def produce(x):
+        started.append(x)
+        return x
+
+    results = iter_pipeline(range(100), [("produce", produce, 1)], queue_size=2)
+    next(results)
+    time.sleep(0.1)
+    # Workers block once the bounded queues are full instead of running ahead
+    assert len(started) <= 6
+    assert len(list(results)) == 99
+
+
+def test_iter_pipeline_overlaps_stages():
+    def slow(x):
+        time.sleep(0.05)
+        return x
+
+    start = time.perf_counter()
+    list(iter_pipeline(range(8), [("a", slow, 1), ("b", slow, 1)]))
+    # Phased this takes 16 * 50 ms; pipelined roughly 9 * 50 ms
+    assert time.perf_counter() - start < 0.65
+
+
+def test_iter_pipeline_stops_workers_when_abandoned():
+    results = iter_pipeline(range(1000), [("same", lambda x: x, 2)], queue_size=1)
+    next(results)
+    before = threading.active_count()
+    results.close()
+    deadline = time.monotonic() + 2
+    while threading.active_count() >= before and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert threading.active_count() < before
+
+
+def make_feed(i, content="x" * 400):
+    feed = Feed(id=str(i), title=f"Feed {i}")
+    feed.stories = [Story(f"h{i}", f"Story {i}", content, f"http://e/{i}")]
+    return feed
+
+
+def test_run_pipelined_summarizes_full_chunks_in_feed_order(monkeypatch):
+    feeds = [Feed(id=str(i), title=f"Feed {i}") for i in range(6)]
+    delays = {"0": 0.15, "3": 0.05}
+
+    def fake_fetch(session, feed, fetch_fallback=True):
+        time.sleep(delays.get(feed.id, 0))
+        if feed.id == "4":
+            return []
+        return make_feed(feed.id).stories
+
+    prompts = []
+
+    def fake_prompt(content, model_id):
+        prompts.append(content)
+        titles = [line[6:] for line in content.splitlines() if line.startswith("Feed: ")]
+        return "\n".join(f"1. *{t}*" for t in titles)
+
+    monkeypatch.setattr(main, "fetch_feed_stories", fake_fetch)
+    monkeypatch.setattr(main, "summarize_prompt", fake_prompt)
+    monkeypatch.setattr(main, "summary_store", None)
+    budget = main.estimate_tokens(main.feed_prompt(make_feed(0))) * 2
+    feeds_with_stories, digest = main.run_pipelined(
+        None, feeds, "m", fetch_workers=6, chunk_tokens=budget
+    )
+
+    assert [f.id for f in feeds_with_stories] == ["0", "1", "2", "3", "5"]
+    assert len(prompts) == 3
+    assert digest.splitlines() == [
+        "1. *Feed 0*", "2. *Feed 1*", "3. *Feed 2*", "4. *Feed 3*", "5. *Feed 5*"
+    ]
+
+
+def test_run_pipelined_leaves_out_feeds_of_failed_chunks(monkeypatch):
+    feeds = [Feed(id=str(i), title=f"Feed {i}") for i in range(5)]
+
+    def fake_prompt(content, model_id):
+        if "Feed: Feed 2" in content:
+            raise RuntimeError("boom")
+        titles = [line[6:] for line in content.splitlines() if line.startswith("Feed: ")]
+        return "\n".join(f"1. *{t}*" for t in titles)
+
+    monkeypatch.setattr(
+        main, "fetch_feed_stories",
+        lambda session, feed, fetch_fallback=True: make_feed(feed.id).stories,
+    )
+    monkeypatch.setattr(main, "summarize_prompt", fake_prompt)
+    monkeypatch.setattr(main, "summary_store", None)
+    budget = main.estimate_tokens(main.feed_prompt(make_feed(0))) * 2
+    summarized, digest = main.run_pipelined(None, feeds, "m", chunk_tokens=budget)
+
+    # Feeds 2 and 3 shared the failed chunk, so they stay unread for the next run
+    assert [f.id for f in summarized] == ["0", "1", "4"]
+    assert digest.splitlines() == ["1. *Feed 0*", "2. *Feed 1*", "3. *Feed 4*"]
+
+
+def test_run_pipelined_without_model_only_fetches(monkeypatch):
+    monkeypatch.setattr(
+        main, "fetch_feed_stories", lambda session, feed, fetch_fallback=True: None
+    )
+    assert main.run_pipelined(None, [Feed(id="1", title="A")], None) == ([], None)
+
+
+def test_run_pipelined_raises_when_every_chunk_fails(monkeypatch):
+    monkeypatch.setattr(
+        main, "fetch_feed_stories",
+        lambda session, feed, fetch_fallback=True: make_feed(feed.id).stories,
+    )
+    monkeypatch.setattr(main, "summarize_prompt", lambda *a: 1 / 0)
+    monkeypatch.setattr(main, "summary_store", None)
+    with pytest.raises(RuntimeError):
+        main.run_pipelined(None, [Feed(id="1", title="A")], "m")
+
+
+@pytest.fixture
+def standin(make_standin):
+    config = StandInConfig(
+        feeds=8, stories_per_feed=2, short_content_ratio=0.5, page_bytes=3000,
+        newsblur_latency=0.05, page_latency=0.05, openai_latency=0.1,
+    )
+    return make_standin(
+        config, FETCH_CONCURRENCY="2", FALLBACK_CONCURRENCY="2", SUMMARY_CHUNK_TOKENS="400"
+    )
+
+
+def test_pipelined_run_matches_phased_digest_and_is_faster(standin, monkeypatch):
+    start = time.perf_counter()
+    main.main()
+    phased = time.perf_counter() - start
+
+    monkeypatch.setenv("PIPELINED", "true")
+    start = time.perf_counter()
+    main.main()
+    pipelined = time.perf_counter() - start
+
+    first, second = standin.slack_messages
+    assert second["text"] == first["text"]
+    assert standin.requests["openai"] > 2
+    assert pipelined < phased
@@ -0,0 +1,111 @@
+import sys
+
+import pytest
+
+import main
+import tokens
+from models import Feed, Story
+from standins import StandInConfig
+
+
+class CharEncoding:
+    """Stands in for a tiktoken encoding: one token per character."""
+
+    def encode(self, text, disallowed_special=()):
+        return [ord(c) for c in text]
+
+    def decode(self, ids):
+        return "".join(map(chr, ids))
+
+
+@pytest.fixture(params=["heuristic", "tokenizer"])
+def encoding(request, monkeypatch):
+    monkeypatch.setattr(tokens, "_loaded", True)
+    monkeypatch.setattr(tokens, "_encoding", None if request.param == "heuristic" else CharEncoding())
+    return request.param
+
+
+def make_feed(n, lengths):
+    feed = Feed(id=str(n), title=f"Feed {n}")
+    feed.stories = [
+        Story(f"{n}:{i}", f"Story {i}", "word " * (length // 5), f"http://e/{n}/{i}")
+        for i, length in enumerate(lengths)
+    ]
+    return feed
+
+
+def test_fair_shares_cuts_only_the_largest_demands():
+    assert tokens.fair_shares([10, 100, 1000], 2000) == [10, 100, 1000]
+    assert tokens.fair_shares([10, 100, 1000], 300) == [10, 100, 190]
+    assert tokens.fair_shares([10, 400, 1000], 300) == [10, 145, 145]
+    assert tokens.fair_shares([1000, 10, 1000], 410) == [200, 10, 200]
+    assert tokens.fair_shares([5, 5], 0) == [0, 0]
+    assert tokens.fair_shares([], 10) == []
+
+
+def test_truncate_tokens_fits_the_limit(encoding):
+    text = "The quick brown fox jumps over the lazy dog. " * 20
+    for limit in (1, 7, 50, 10_000):
+        cut = tokens.truncate_tokens(text, limit)
+        assert text.startswith(cut)
+        assert tokens.count_tokens(cut) <= limit
+    assert tokens.truncate_tokens(text, 10_000) == text
+
+
+def test_count_tokens_falls_back_without_tiktoken(monkeypatch):
+    monkeypatch.setattr(tokens, "_loaded", False)
+    monkeypatch.setattr(tokens, "_encoding", None)
+    monkeypatch.setitem(sys.modules, "tiktoken", None)
+    assert tokens.get_encoding() is None
+    assert tokens.count_tokens("x" * 40) == 11
+
+
+def test_fit_prompt_budget_trims_longest_content_fairly_across_feeds(encoding):
+    busy = make_feed(1, [4000] * 5)
+    quiet = make_feed(2, [4000])
+    short = make_feed(3, [200, 200])
+    feeds = [busy, quiet, short]
+    short_texts = [s.content_text for s in short.stories]
+    budget = main.estimate_tokens("".join(map(main.feed_prompt, feeds))) // 3
+
+    removed = main.fit_prompt_budget(feeds, budget)
+
+    assert removed > 0
+    assert main.estimate_tokens("".join(map(main.feed_prompt, feeds))) <= budget
+    # Short content is kept whole; the quiet feed's one story gets as much
+    # room as all of the busy feed's stories together
+    assert [s.content_text for s in short.stories] == short_texts
+    busy_tokens = sum(main.estimate_tokens(s.content_text) for s in busy.stories)
+    quiet_tokens = main.estimate_tokens(quiet.stories[0].content_text)
+    assert abs(busy_tokens - quiet_tokens) <= 10
+    assert all(s.title and s.permalink for f in feeds for s in f.stories)
+
+
+def test_fit_prompt_budget_leaves_prompts_within_budget_alone(encoding):
+    feeds = [make_feed(1, [300, 300])]
+    prompt = main.feed_prompt(feeds[0])
+    assert main.fit_prompt_budget(feeds, 10_000) == 0
+    assert main.fit_prompt_budget(feeds, 0) == 0
+    assert main.feed_prompt(feeds[0]) == prompt
+
+
+@pytest.fixture
+def standin(make_standin, monkeypatch):
+    monkeypatch.setattr(tokens, "_loaded", True)
+    monkeypatch.setattr(tokens, "_encoding", None)
+    config = StandInConfig(feeds=4, stories_per_feed=3, content_chars=3000, short_content_ratio=0)
+    return make_standin(config, PROMPT_TOKEN_BUDGET="1000")
+
+
+@pytest.mark.parametrize("pipelined", ["false", "true"])
+def test_run_keeps_the_prompt_within_budget(standin, monkeypatch, pipelined):
+    monkeypatch.setenv("PIPELINED", pipelined)
+    main.main()
+
+    [completion] = standin.completions
+    prompt = completion["messages"][-1]["content"]
+    articles = prompt[prompt.index("Feed: "):]
+    assert main.estimate_tokens(articles) <= 1000
+    assert articles.count("Title: ") == 12
+    assert main.metrics.counters["prompt_tokens_trimmed"] > 0
+    assert len(standin.slack_messages) == 1
@@ -0,0 +1,140 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import main
+from ratelimit import RateLimiter, parse_reset
+from standins import StandInConfig
+
+
+def learned(requests=None, tokens=None, **extra):
+    """A limiter that has seen one response with the given limit headers."""
+    headers = dict(extra)
+    for name, values in (("requests", requests), ("tokens", tokens)):
+        if values:
+            limit, remaining, reset = values
+            headers[f"x-ratelimit-limit-{name}"] = str(limit)
+            headers[f"x-ratelimit-remaining-{name}"] = str(remaining)
+            headers[f"x-ratelimit-reset-{name}"] = reset
+    limiter = RateLimiter()
+    limiter.observe(200, headers)
+    return limiter
+
+
+def test_parse_reset():
+    assert parse_reset("6m0s") == 360
+    assert parse_reset("1h2m3.5s") == 3723.5
+    assert parse_reset("20ms") == pytest.approx(0.02)
+    assert parse_reset("0.250s") == 0.25
+    for value in (None, "", "soon", "5 parsecs", "3"):
+        assert parse_reset(value) is None
+
+
+def test_limits_follow_the_response_headers():
+    limiter = RateLimiter(requests_per_minute=500, tokens_per_minute=30_000)
+    assert limiter.limits == (500, 30_000)
+    limiter.observe(200, {"x-ratelimit-limit-requests": "5000", "x-ratelimit-limit-tokens": "bad"})
+    assert limiter.limits == (5000, 30_000)
+
+
+def test_requests_are_spaced_at_the_refill_rate():
+    # 2 requests used up, refilled in 200ms: one request every 100ms
+    limiter = learned(requests=(2, 0, "200ms"))
+    start = time.monotonic()
+    for _ in range(3):
+        with limiter.reserve(10):
+            pass
+    assert 0.25 <= time.monotonic() - start < 1.0
+    assert limiter.waited >= 0.25
+
+
+def test_unused_tokens_are_refunded():
+    limiter = learned(tokens=(1000, 1000, "1s"))
+    with limiter.reserve(900) as reservation:
+        reservation.used = 100
+    start = time.monotonic()
+    with limiter.reserve(800):
+        pass
+    assert time.monotonic() - start < 0.05
+
+
+def test_waiting_callers_are_served_by_priority():
+    limiter = learned(requests=(10, 0, "1s"))  # One request every 100ms
+    order = []
+
+    def call(name, priority):
+        with limiter.reserve(1, priority=priority):
+            order.append(name)
+
+    low = threading.Thread(target=call, args=("low", 1))
+    low.start()
+    time.sleep(0.03)
+    high = threading.Thread(target=call, args=("high", 0))
+    high.start()
+    low.join(2)
+    high.join(2)
+    assert order == ["high", "low"]
+
+
+def test_unknown_limits_let_parallel_requests_through():
+    limiter = RateLimiter()
+    inside = threading.Barrier(4, timeout=2)
+
+    def call():
+        with limiter.reserve(10**9):
+            # Breaks only if all four reservations are held at once
+            inside.wait()
+
+    with ThreadPoolExecutor(4) as pool:
+        for future in [pool.submit(call) for _ in range(4)]:
+            future.result()
+    assert limiter.waited < 0.5
+
+
+def test_a_429_holds_every_request_until_the_reset():
+    limiter = learned(requests=(100, 100, "0s"))
+    limiter.observe(429, {"retry-after": "0.2"})
+    start = time.monotonic()
+    with limiter.reserve(1):
+        pass
+    assert time.monotonic() - start >= 0.15
+
+    limiter.observe(429, {"x-ratelimit-reset-tokens": "150ms"})
+    start = time.monotonic()
+    with limiter.reserve(1):
+        pass
+    assert time.monotonic() - start >= 0.1
+
+
+@pytest.fixture
+def limited_standin(make_standin):
+    return make_standin(
+        StandInConfig(openai_rpm_limit=4, openai_tpm_limit=2000, openai_limit_window=1.0)
+    )
+
+
+def test_concurrent_completions_stay_under_the_stand_in_limits(limited_standin):
+    prompts = [f"Feed: F{i}\nTitle: T\nContent: {'word ' * 200}\nLink: http://x/{i}\n" for i in range(12)]
+    start = time.monotonic()
+    # The first response teaches the limiter the limits
+    digests = [main.summarize_prompt(prompts[0], "bench-model")]
+    assert main.openai_limiter.limits == (4, 2000)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        digests += executor.map(lambda p: main.summarize_prompt(p, "bench-model"), prompts[1:])
+    elapsed = time.monotonic() - start
+
+    assert all(digests)
+    assert limited_standin.requests.get("openai_429", 0) == 0
+    assert limited_standin.requests["openai"] == 12
+    # 4 go at once, then the other 8 at 4 per second: throughput stays near the limit
+    assert 1.5 <= elapsed < 4.0
+
+
+def test_stand_in_throttles_a_client_that_ignores_its_limits(limited_standin):
+    for _ in range(5):
+        allowed, headers = limited_standin.charge_rate_limits(10)
+    assert not allowed
+    assert headers["x-ratelimit-remaining-requests"] == "0"
+    assert parse_reset(headers["x-ratelimit-reset-requests"]) > 0
@@ -1,3 +1,5 @@
+import json
+
 import main
 from models import Feed, Story
 
@@ -7,22 +9,35 @@ class Resp:
         self.status_code = status_code
         self._json = json_data or {}
         self.content = content
+        self.headers = {}
 
     def json(self):
         return self._json
 
+    def iter_content(self, chunk_size=1):
+        yield self.content or json.dumps(self._json).encode("utf-8")
+
+    def close(self):
+        pass
+
 
 def test_authenticate_newsblur_success_and_failure(monkeypatch):
     calls = {"post": []}
 
     class Sess:
+        def __init__(self):
+            self.hooks = {"response": []}
+
+        def mount(self, prefix, adapter):
+            pass
+
         def post(self, url, data=None, **kwargs):
             calls["post"].append((url, data))
             if data.get("password") == "ok":
                 return Resp(200)
             return Resp(403)
 
-    monkeypatch.setattr(main.requests, "Session", lambda: Sess())
+    monkeypatch.setattr(main, "ResilientSession", lambda *args, **kwargs: Sess())
 
     s_ok = main.authenticate_newsblur("u", "ok")
     assert s_ok is not None
@@ -0,0 +1,162 @@
+import time
+
+import pytest
+import requests
+
+import main
+from resilience import CircuitBreaker, CircuitOpenError, ResilientSession, RetryPolicy
+from standins import StandInConfig, StandInServer
+
+FAST = RetryPolicy(max_retries=2, backoff_base=0.01, backoff_max=0.05)
+
+
+@pytest.fixture
+def standin():
+    with StandInServer(StandInConfig(feeds=3, stories_per_feed=2)) as server:
+        yield server
+
+
+def make_session(policy=FAST, breaker=None, **kwargs):
+    events = []
+    session = ResilientSession(policy, breaker or CircuitBreaker(), on_event=events.append, **kwargs)
+    return session, events
+
+
+def test_retry_delay_uses_jittered_exponential_backoff():
+    policy = RetryPolicy(backoff_base=1.0, backoff_max=3.0)
+    for attempt, ceiling in [(1, 1.0), (2, 2.0), (3, 3.0), (8, 3.0)]:
+        delays = [policy.delay(attempt) for _ in range(50)]
+        assert all(0 <= d <= ceiling for d in delays)
+        assert len(set(delays)) > 1
+    assert policy.delay(1, retry_after=2.5) == 2.5
+    assert policy.delay(1, retry_after=60) == 3.0
+
+
+def test_circuit_breaker_opens_then_allows_one_trial(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("resilience.time.monotonic", lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+    breaker.record_failure("h")
+    assert breaker.allow("h")
+    breaker.record_failure("h")
+    assert breaker.is_open("h") and not breaker.allow("h")
+    assert breaker.allow("other")
+
+    now[0] += 10
+    assert breaker.allow("h")
+    assert not breaker.allow("h")  # Only one trial at a time
+    breaker.record_failure("h")
+    assert not breaker.allow("h")
+
+    now[0] += 10
+    assert breaker.allow("h")
+    breaker.record_success("h")
+    assert not breaker.is_open("h") and breaker.allow("h")
+
+
+def test_breaker_with_zero_threshold_never_opens():
+    breaker = CircuitBreaker(failure_threshold=0)
+    for _ in range(10):
+        breaker.record_failure("h")
+    assert breaker.allow("h")
+
+
+def test_get_is_retried_through_errors_and_dropped_connections(standin):
+    standin.inject("/reader/feeds", 503, "reset", 502)
+    session, events = make_session(RetryPolicy(max_retries=3, backoff_base=0.01))
+    response = session.get(f"{standin.url}/reader/feeds", timeout=5)
+
+    assert response.status_code == 200
+    assert response.json()["authenticated"] is True
+    assert standin.requests["fault"] == 3
+    assert events == ["http_retries"] * 3
+
+
+def test_last_retryable_response_is_returned_when_retries_run_out(standin):
+    standin.inject("/reader/feeds", 503, 503, 503, 503)
+    session, events = make_session()
+    assert session.get(f"{standin.url}/reader/feeds", timeout=5).status_code == 503
+    assert standin.requests["fault"] == 3
+    assert len(events) == 2
+
+
+def test_post_is_only_retried_when_it_cannot_have_been_processed(standin):
+    url = f"{standin.url}/reader/mark_story_hashes_as_read"
+    session, _ = make_session()
+    standin.inject("/reader/mark_story_hashes_as_read", 500)
+    assert session.post(url, data={"story_hash": "1:0"}, timeout=5).status_code == 500
+    assert standin.marked == set()
+
+    standin.inject("/reader/mark_story_hashes_as_read", 429)
+    assert session.post(url, data={"story_hash": "1:0"}, timeout=5).status_code == 200
+    assert standin.marked == {"1:0"}
+
+    standin.inject("/reader/mark_story_hashes_as_read", "reset")
+    with pytest.raises(requests.exceptions.ConnectionError):
+        session.post(url, data={"story_hash": "1:1"}, timeout=5)
+
+
+def test_open_circuit_fails_fast_without_contacting_host(standin):
+    standin.inject("/page/", *["reset"] * 6)
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    session, events = make_session(RetryPolicy(max_retries=5, backoff_base=0.01), breaker)
+
+    with pytest.raises(CircuitOpenError):
+        session.get(f"{standin.url}/page/0/1", timeout=5)
+    assert standin.requests["fault"] == 3
+    with pytest.raises(requests.exceptions.RequestException):
+        session.get(f"{standin.url}/reader/feeds", timeout=5)
+    assert standin.requests.get("feeds") is None
+    assert events.count("http_circuit_rejections") == 2
+
+
+def test_non_transient_errors_are_not_retried():
+    session, events = make_session()
+    with pytest.raises(requests.exceptions.InvalidURL):
+        session.get("http://", timeout=1)
+    assert events == []
+
+
+def test_slow_get_is_hedged_and_first_response_wins(standin):
+    standin.inject("/reader/feeds", 2.0)
+    session, events = make_session(hedge_after=0.05)
+    start = time.perf_counter()
+    response = session.get(f"{standin.url}/reader/feeds", timeout=5)
+
+    assert response.status_code == 200
+    assert time.perf_counter() - start < 1.0
+    assert events == ["http_hedges"]
+    assert standin.requests["feeds"] == 1  # The stalled request is still pending
+    session.close()
+
+
+def test_hedging_skips_posts_and_fast_requests(standin):
+    session, events = make_session(hedge_after=0.5)
+    assert session.get(f"{standin.url}/reader/feeds", timeout=5).status_code == 200
+    standin.inject("/api/login", 0.7)
+    assert session.post(f"{standin.url}/api/login", timeout=5).status_code == 200
+    assert events == []
+    session.close()
+
+
+def test_main_survives_flaky_newsblur_and_publishers(standin, monkeypatch):
+    for name, value in standin.env().items():
+        monkeypatch.setenv(name, value)
+    monkeypatch.setenv("HTTP_BACKOFF_BASE", "0.01")
+    monkeypatch.setenv("NEWSBLUR_HEDGE_DELAY", "0.2")
+    monkeypatch.setattr(main, "NEWSBLUR_URL", standin.url)
+    monkeypatch.setattr(main, "openai", None)
+    monkeypatch.setattr(main, "page_cache", None)
+    monkeypatch.setattr(main, "summary_store", None)
+    metrics = main.RunMetrics()
+    monkeypatch.setattr(main, "metrics", metrics)
+    standin.inject("/reader/feed/1", 503, "reset")
+    standin.inject("/reader/feed/2", 1.0)
+    standin.inject("/page/", 502)
+    main.run_pipeline()
+
+    [message] = standin.slack_messages
+    for n in range(3):
+        assert f"*Feed {n}*" in message["text"]
+    assert metrics.counters["http_retries"] == 3
+    assert metrics.counters["http_hedges"] == 1
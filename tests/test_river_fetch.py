@@ -0,0 +1,132 @@
+import main
+from models import Feed
+
+
+class Resp:
+    def __init__(self, status_code=200, json_data=None):
+        self.status_code = status_code
+        self._json = json_data or {}
+
+    def json(self):
+        return self._json
+
+
+def raw_story(feed_id, n):
+    return {
+        "story_feed_id": feed_id,
+        "story_title": f"T{feed_id}-{n}",
+        "story_content": "<p>" + "x" * 200 + "</p>",
+        "story_permalink": f"http://example.com/{feed_id}/{n}",
+        "story_hash": f"{feed_id}:{n}",
+    }
+
+
+def test_fetch_river_stories_batches_pages_and_caps(monkeypatch):
+    monkeypatch.setattr(main, "MAX_STORIES", 2)
+    feeds = [Feed(id=str(i), title=f"F{i}") for i in range(1, 4)]
+    requests_made = []
+
+    # Feed 1 fills up on the first page, feed 2 on the second; feed 3 is idle
+    pages = {
+        1: [raw_story(1, 1), raw_story(1, 2), raw_story(1, 3), raw_story(2, 1), raw_story(99, 1)],
+        2: [raw_story(2, 2), raw_story(2, 3)],
+    }
+
+    class Sess:
+        def get(self, url, params=None, **kwargs):
+            requests_made.append((url, params))
+            page = dict((k, v) for k, v in params if k == "page")["page"]
+            return Resp(200, {"stories": pages.get(page, [])})
+
+    results = main.fetch_river_stories(Sess(), feeds, batch_size=10)
+
+    assert [s.hash for s in results[0]] == ["1:1", "1:2"]
+    assert [s.hash for s in results[1]] == ["2:1", "2:2"]
+    assert results[2] == []
+    assert all(url.endswith("/reader/river_stories") for url, _ in requests_made)
+    # Pages are offsets into the batch, so every page asks for the same feeds
+    page2_feeds = [v for k, v in requests_made[1][1] if k == "feeds"]
+    assert page2_feeds == ["1", "2", "3"]
+    # Page 3 is empty, which ends the batch
+    assert len(requests_made) == 3
+
+
+def test_fetch_river_stories_matches_feed_mode_when_feeds_fill_unevenly(make_standin):
+    import requests
+
+    from standins import StandInConfig
+
+    # Feed 0 fills up on the first page while the others have had nothing yet
+    make_standin(
+        StandInConfig(feeds=4, stories_per_feed=12, short_content_ratio=0, river_page_size=6)
+    )
+    feeds = [Feed(id=str(i), title=f"Feed {i}") for i in range(4)]
+    with requests.Session() as session:
+        river = main.fetch_river_stories(session, feeds, fetch_fallback=False)
+        per_feed = [main.fetch_feed_stories(session, feed, fetch_fallback=False) for feed in feeds]
+
+    assert [[s.hash for s in stories] for stories in river] == [
+        [s.hash for s in stories] for stories in per_feed
+    ]
+    assert [s.hash for s in river[2]] == [f"2:{n}" for n in range(main.MAX_STORIES)]
+
+
+def test_fetch_river_stories_failed_batch_yields_none(monkeypatch):
+    feeds = [Feed(id=str(i), title="F") for i in range(3)]
+    calls = []
+
+    class Sess:
+        def get(self, url, params=None, **kwargs):
+            feed_ids = [v for k, v in params if k == "feeds"]
+            calls.append(feed_ids)
+            if "0" in feed_ids:
+                return Resp(500)
+            return Resp(200, {"stories": []})
+
+    results = main.fetch_river_stories(Sess(), feeds, batch_size=2)
+    assert calls == [["0", "1"], ["2"]]
+    assert results == [None, None, []]
+
+
+def test_fetch_river_page_errors():
+    class SessExc:
+        def get(self, url, **kwargs):
+            raise main.requests.exceptions.RequestException("net")
+
+    class BadJson:
+        status_code = 200
+
+        def json(self):
+            raise ValueError("bad")
+
+    class SessBad:
+        def get(self, url, **kwargs):
+            return BadJson()
+
+    assert main._fetch_river_page(SessExc(), ["1"], 1) is None
+    assert main._fetch_river_page(SessBad(), ["1"], 1) is None
+
+
+def test_main_uses_river_mode(monkeypatch):
+    monkeypatch.setenv("NEWSBLUR_USERNAME", "u")
+    monkeypatch.setenv("NEWSBLUR_PASSWORD", "p")
+    monkeypatch.setenv("MODEL_ID", "m")
+    monkeypatch.setenv("SLACK_WEBHOOK_URL", "https://hooks.slack.test/x")
+    monkeypatch.setenv("FETCH_MODE", "river")
+
+    called = {}
+    monkeypatch.setattr(main, "authenticate_newsblur", lambda u, p: object())
+    monkeypatch.setattr(main, "fetch_feeds", lambda s: [Feed(id="1", title="T")])
+
+    def fake_river(session, feeds, fetch_fallback=True):
+        called["river"] = fetch_fallback
+        return [[]]
+
+    monkeypatch.setattr(main, "fetch_river_stories", fake_river)
+    main.main()
+    assert called["river"] is False
+
+    monkeypatch.setenv("FETCH_MODE", "bogus")
+    called.clear()
+    main.main()
+    assert called == {}
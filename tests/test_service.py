@@ -0,0 +1,146 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+import main
+import service
+from standins import StandInConfig
+
+
+@pytest.fixture
+def http_service():
+    started = []
+
+    def serve(digest, token=None):
+        server = service.create_server(digest, "127.0.0.1", 0, token)
+        threading.Thread(
+            target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        ).start()
+        started.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield serve
+    for server in started:
+        server.shutdown()
+        server.server_close()
+
+
+def request(url, method="GET", headers=None):
+    req = urllib.request.Request(url, method=method, headers=headers or {}, data=b"" if method == "POST" else None)
+    try:
+        with urllib.request.urlopen(req, timeout=5) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert condition()
+
+
+def test_http_trigger_rejects_overlapping_runs(http_service):
+    release = threading.Event()
+    digest = service.DigestService(lambda: release.wait(5) and {"counters": {"x": 1}})
+    url = http_service(digest)
+
+    assert request(f"{url}/healthz") == (200, {"status": "ok"})
+    assert request(f"{url}/run", "POST") == (202, {"status": "started"})
+    assert request(f"{url}/run", "POST") == (409, {"status": "already running"})
+    assert digest.run_now() is False
+    status = request(f"{url}/status")[1]
+    assert status["running"] is True and status["rejected"] == 2
+
+    release.set()
+    wait_for(lambda: not digest.running)
+    status = request(f"{url}/status")[1]
+    assert status["runs"] == 1
+    assert status["last_run"]["counters"] == {"x": 1}
+    assert request(f"{url}/run", "POST")[0] == 202
+    assert request(f"{url}/nope")[0] == 404
+    assert request(f"{url}/nope", "POST")[0] == 404
+
+
+def test_http_trigger_requires_token_when_configured(http_service):
+    digest = service.DigestService(lambda: None)
+    url = http_service(digest, token="s3cret")
+
+    assert request(f"{url}/run", "POST")[0] == 401
+    assert request(f"{url}/run", "POST", {"Authorization": "Bearer wrong"})[0] == 401
+    assert request(f"{url}/run", "POST", {"Authorization": "Bearer s3cret"})[0] == 202
+
+
+def test_service_without_token_only_listens_on_loopback(caplog):
+    assert service.listen_host("0.0.0.0", "s3cret") == "0.0.0.0"
+    assert service.listen_host("localhost", None) == "localhost"
+    assert "SERVICE_TOKEN is not set" not in caplog.text
+
+    assert service.listen_host("0.0.0.0", None) == "127.0.0.1"
+    assert "SERVICE_TOKEN is not set" in caplog.text
+
+
+def test_scheduler_runs_periodically_and_skips_overlaps():
+    active = {"now": 0, "peak": 0}
+
+    def run():
+        active["now"] += 1
+        active["peak"] = max(active["peak"], active["now"])
+        time.sleep(0.08)
+        active["now"] -= 1
+
+    digest = service.DigestService(run, interval=0.03)
+    digest.start_scheduler()
+    wait_for(lambda: digest.runs >= 3)
+    digest.stop()
+    assert active["peak"] == 1
+    assert digest.rejected >= 1
+
+
+def test_failed_run_is_reported_and_releases_the_lock():
+    digest = service.DigestService(lambda: 1 / 0)
+    assert digest.run_now() is True
+    assert "division by zero" in digest.last_run["error"]
+    assert not digest.running
+
+
+@pytest.fixture
+def standin(make_standin):
+    config = StandInConfig(
+        feeds=4, stories_per_feed=2, short_content_ratio=0.5, login_latency=0.3, page_latency=0.1
+    )
+    return make_standin(config)
+
+
+def test_warm_service_runs_are_faster_than_the_first(standin):
+    main.keep_state_warm()
+    digest = service.DigestService(lambda: main.run_digest(configure_shared=False))
+
+    assert digest.run_now()
+    first = digest.last_run["duration_seconds"]
+    assert digest.run_now()
+    second = digest.last_run["duration_seconds"]
+
+    assert len(standin.slack_messages) == 2
+    assert standin.slack_messages[0]["text"] == standin.slack_messages[1]["text"]
+    assert standin.requests["login"] == 1  # The warm session is reused
+    assert standin.requests["page"] == 4  # Pages come from the in-memory cache
+    assert digest.last_run["counters"]["page_cache_hits"] == 4
+    assert second < first / 2
+
+
+def test_warm_session_is_replaced_when_rejected(standin):
+    main.keep_state_warm()
+    main.run_digest(configure_shared=False)
+    session = main.warm_sessions["bench"]
+    session.cookies.clear()
+    standin.inject("/reader/feeds", 403)
+    main.run_digest(configure_shared=False)
+
+    assert standin.requests["login"] == 2
+    assert main.warm_sessions["bench"] is not session
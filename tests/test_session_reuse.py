@@ -0,0 +1,110 @@
+import json
+import os
+import time
+
+import main
+from models import Feed
+from storage import CookieStore
+
+
+class Resp:
+    def __init__(self, status_code=200, json_data=None):
+        self.status_code = status_code
+        self._json = json_data or {}
+
+    def json(self):
+        return self._json
+
+
+def test_cookie_store_roundtrip_and_permissions(tmp_path):
+    store = CookieStore(str(tmp_path / "cookies.json"))
+    assert store.load() == []
+
+    session = main.create_newsblur_session()
+    session.cookies.set("newsblur_sessionid", "abc", domain=".newsblur.com", path="/")
+    session.cookies.set("expired", "x", domain=".newsblur.com", expires=int(time.time()) - 10)
+    store.save(session.cookies)
+    assert os.stat(store.path).st_mode & 0o777 == 0o600
+
+    loaded = store.load()
+    assert [c["name"] for c in loaded] == ["newsblur_sessionid"]
+
+    restored = main.restore_newsblur_session(store)
+    assert restored.cookies.get("newsblur_sessionid", domain=".newsblur.com") == "abc"
+
+    store.clear()
+    store.clear()
+    assert main.restore_newsblur_session(store) is None
+
+    with open(store.path, "w") as f:
+        json.dump({"not": "a list"}, f)
+    assert store.load() == []
+
+
+def test_newsblur_session_pools_connections():
+    adapter = main.create_newsblur_session(pool_size=7).get_adapter("https://newsblur.com/")
+    assert adapter._pool_maxsize == 7
+
+
+def test_fetch_feeds_rejects_unauthenticated_payload():
+    class Sess:
+        def get(self, url, **kwargs):
+            return Resp(200, {"authenticated": False, "feeds": {}})
+
+    assert main.fetch_feeds(Sess()) is None
+
+
+def test_connect_newsblur_reuses_stored_cookies(tmp_path, monkeypatch):
+    store = CookieStore(str(tmp_path / "cookies.json"))
+    logins = []
+
+    def fake_login(username, password):
+        logins.append(username)
+        session = main.create_newsblur_session()
+        session.cookies.set("newsblur_sessionid", "fresh", domain=".newsblur.com")
+        return session
+
+    feeds_ok = {"value": True}
+
+    def fake_fetch_feeds(session):
+        if session.cookies.get("newsblur_sessionid") == "stale" or not feeds_ok["value"]:
+            return None
+        return [Feed(id="1", title="A")]
+
+    monkeypatch.setattr(main, "authenticate_newsblur", fake_login)
+    monkeypatch.setattr(main, "fetch_feeds", fake_fetch_feeds)
+
+    # Cold: full login, cookies stored
+    session, feeds = main.connect_newsblur("u", "p", store)
+    assert logins == ["u"] and feeds[0].id == "1"
+    assert store.load()[0]["value"] == "fresh"
+
+    # Warm: no login
+    session, feeds = main.connect_newsblur("u", "p", store)
+    assert logins == ["u"] and feeds[0].id == "1"
+
+    # Rejected cookie: falls back to a full login and replaces the cookie
+    session.cookies.set("newsblur_sessionid", "stale", domain=".newsblur.com")
+    store.save(session.cookies)
+    session, feeds = main.connect_newsblur("u", "p", store)
+    assert logins == ["u", "u"]
+    assert store.load()[0]["value"] == "fresh"
+
+    monkeypatch.setattr(main, "authenticate_newsblur", lambda u, p: None)
+    store.clear()
+    assert main.connect_newsblur("u", "p", store) == (None, None)
+
+
+def test_main_uses_cookie_store(tmp_path, monkeypatch):
+    for k, v in {
+        "NEWSBLUR_USERNAME": "u",
+        "NEWSBLUR_PASSWORD": "p",
+        "MODEL_ID": "m",
+        "SLACK_WEBHOOK_URL": "https://hooks.slack.test/x",
+        "NEWSBLUR_SESSION_PATH": str(tmp_path / "cookies.json"),
+    }.items():
+        monkeypatch.setenv(k, v)
+    seen = []
+    monkeypatch.setattr(main, "connect_newsblur", lambda u, p, store: seen.append(store) or (object(), []))
+    main.main()
+    assert isinstance(seen[0], CookieStore)
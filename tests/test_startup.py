@@ -0,0 +1,48 @@
+import os
+import subprocess
+import sys
+
+import main
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Modules that must only be imported by the stage that needs them
+DEFERRED_MODULES = ("openai", "bs4", "numpy", "tiktoken")
+
+
+def run_python(code, env=None):
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=PROJECT_ROOT,
+        env={**os.environ, **(env or {})},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return result.stdout.strip()
+
+
+def test_import_does_not_load_heavy_dependencies():
+    loaded = run_python(
+        "import sys, main; print(','.join(m for m in %r if m in sys.modules))" % (DEFERRED_MODULES,)
+    )
+    assert loaded == ""
+
+
+def test_early_exit_run_does_not_load_openai():
+    loaded = run_python(
+        "import sys, main; main.main(); print('openai' in sys.modules)",
+        env={
+            "NEWSBLUR_USERNAME": "",
+            "NEWSBLUR_PASSWORD": "",
+            "MODEL_ID": "",
+            "SLACK_WEBHOOK_URL": "",
+        },
+    )
+    assert loaded == "False"
+
+
+def test_get_openai_client_is_created_once(monkeypatch):
+    monkeypatch.setattr(main, "openai", None)
+    client = main.get_openai_client()
+    assert type(client).__name__ == "OpenAI"
+    assert main.get_openai_client() is client
@@ -0,0 +1,100 @@
+import pytest
+
+import main
+from extract import decode_chunks
+
+
+class StreamResp:
+    def __init__(self, chunks, content_type="text/html", status_code=200):
+        self.status_code = status_code
+        self.headers = {"Content-Type": content_type} if content_type else {}
+        self._chunks = chunks
+        self.read = 0
+        self.closed = False
+
+    def iter_content(self, chunk_size=1):
+        for chunk in self._chunks:
+            self.read += 1
+            yield chunk
+
+    def close(self):
+        self.closed = True
+
+
+def test_parse_content_type():
+    assert main.parse_content_type(None) == ("", "utf-8")
+    assert main.parse_content_type("Text/HTML; Charset=\"ISO-8859-1\"") == ("text/html", "ISO-8859-1")
+    assert main.parse_content_type("application/pdf") == ("application/pdf", "utf-8")
+
+
+def test_fetch_webpage_streams_and_requests_stream(monkeypatch):
+    seen = {}
+    resp = StreamResp([b"<p>hello ", b"world</p>"])
+
+    def get(url, **kwargs):
+        seen.update(kwargs)
+        return resp
+
+    monkeypatch.setattr(main.requests, "get", get)
+    assert main.fetch_webpage("http://x") == "hello world"
+    assert seen["stream"] is True
+    assert resp.closed
+
+
+def test_fetch_webpage_rejects_non_html(monkeypatch):
+    resp = StreamResp([b"%PDF-1.7"], content_type="application/pdf")
+    monkeypatch.setattr(main.requests, "get", lambda url, **kw: resp)
+    assert main.fetch_webpage("http://x/doc.pdf") is None
+    assert resp.read == 0
+    assert resp.closed
+
+
+def test_fetch_webpage_stops_at_text_budget(monkeypatch):
+    monkeypatch.setattr(main, "MAIN_CONTENT_EXTRACTION", False)
+    monkeypatch.setattr(main, "MAX_CONTENT_LENGTH", 50)
+    resp = StreamResp([b"<p>" + b"x" * 40 + b"</p>"] * 100)
+    monkeypatch.setattr(main.requests, "get", lambda url, **kw: resp)
+    assert main.fetch_webpage("http://x") == "x" * 50
+    assert resp.read == 2
+
+
+@pytest.mark.parametrize("main_content", [True, False])
+def test_fetch_webpage_stops_at_byte_cap(monkeypatch, main_content):
+    monkeypatch.setattr(main, "MAIN_CONTENT_EXTRACTION", main_content)
+    monkeypatch.setattr(main, "FETCH_MAX_BYTES", 25)
+    # Whitespace-heavy markup produces little text per byte
+    resp = StreamResp([b"<p>ab</p>" + b" " * 10] * 100)
+    monkeypatch.setattr(main.requests, "get", lambda url, **kw: resp)
+    text = main.fetch_webpage("http://x")
+    assert text.startswith("ab ")
+    assert resp.read == 2
+
+
+def test_fetch_webpage_read_errors(monkeypatch):
+    class Broken(StreamResp):
+        def iter_content(self, chunk_size=1):
+            yield b"<p>partial"
+            raise main.requests.exceptions.ChunkedEncodingError("reset")
+
+    monkeypatch.setattr(main.requests, "get", lambda url, **kw: Broken([]))
+    assert main.fetch_webpage("http://x") is None
+
+    def explode(*args, **kwargs):
+        raise RuntimeError("parser")
+
+    # A failing main-content pass falls back to the full page text
+    monkeypatch.setattr(main, "extract_main_text", explode)
+    monkeypatch.setattr(main.requests, "get", lambda url, **kw: StreamResp([b"<p>x</p>"]))
+    assert main.fetch_webpage("http://x") == "x"
+
+    monkeypatch.setattr(main, "MAIN_CONTENT_EXTRACTION", False)
+    monkeypatch.setattr(main, "extract_text_from_chunks", explode)
+    monkeypatch.setattr(main.requests, "get", lambda url, **kw: StreamResp([b"<p>x</p>"]))
+    assert main.fetch_webpage("http://x") == ""
+
+
+def test_decode_chunks_handles_split_multibyte_and_bad_charset():
+    data = "café".encode("utf-8")
+    assert "".join(decode_chunks([data[:4], data[4:]])) == "café"
+    assert "".join(decode_chunks([b"abc"], "no-such-codec")) == "abc"
+    assert "".join(decode_chunks(["é".encode("latin-1")], "latin-1")) == "é"
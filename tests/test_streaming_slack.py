@@ -0,0 +1,98 @@
+import logging
+
+import pytest
+
+import main
+from standins import StandInConfig
+
+
+@pytest.fixture
+def standin(make_standin):
+    config = StandInConfig(feeds=4, stories_per_feed=2, short_content_ratio=0)
+    return make_standin(config, SLACK_STREAMING="true")
+
+
+def test_iter_digest_sections_splits_on_feed_headings():
+    deltas = ["1. *A*\n  1. *x* - s", "um <l|[Read more]>\n2. *B*", "\n  1. *y*\n", "3. *C*"]
+    assert list(main.iter_digest_sections(deltas)) == [
+        "1. *A*\n  1. *x* - sum <l|[Read more]>",
+        "2. *B*\n  1. *y*",
+        "3. *C*",
+    ]
+    assert list(main.iter_digest_sections(["", "\n"])) == []
+
+
+def test_streaming_posts_threaded_sections_in_order(standin, monkeypatch):
+    monkeypatch.setenv("SLACK_BOT_TOKEN", "xoxb-test")
+    monkeypatch.setenv("SLACK_CHANNEL", "C123")
+    monkeypatch.delenv("SLACK_WEBHOOK_URL")
+    main.main()
+
+    [completion] = standin.completions
+    assert completion["stream"] is True
+    messages = standin.slack_messages
+    assert [m["text"].split("\n")[-3] for m in messages] == [
+        f"{n + 1}. *Feed {n}*" for n in range(4)
+    ]
+    assert messages[0]["text"].startswith("Here is the latest summarized news:")
+    assert "thread_ts" not in messages[0]
+    assert {m["thread_ts"] for m in messages[1:]} == {"1700000000.000001"}
+    assert {m["channel"] for m in messages} == {"C123"}
+    assert messages[0]["authorization"] == "Bearer xoxb-test"
+
+
+def test_first_section_reaches_slack_before_the_stream_ends(standin, monkeypatch):
+    standin.config.openai_line_delay = 0.05
+    metrics = main.RunMetrics()
+    monkeypatch.setattr(main, "metrics", metrics)
+    main.run_pipeline()
+
+    # Without threading support each section goes to the webhook in order
+    assert len(standin.slack_messages) == 4
+    assert standin.slack_messages[1]["text"].startswith("2. *Feed 1*")
+    # 12 lines at 50 ms each: the first feed is posted while the rest streams
+    assert standin.slack_received_at[0] < standin.stream_finished_at - 0.2
+    assert metrics.stages["slack_first_message"]["calls"] == 1
+    assert metrics.counters["openai_completion_tokens"] > 0
+    assert metrics.counters["slack_requests"] == 4
+
+
+def test_streaming_stops_at_first_failed_post(monkeypatch):
+    feeds = [main.Feed(id=1, title="A")]
+    monkeypatch.setattr(main, "stream_prompt", lambda content, model_id: iter(["1. A\n2. B\n"]))
+    posted = []
+    monkeypatch.setattr(
+        main, "post_webhook_message", lambda text, url: posted.append(text) or False
+    )
+    summary, sent = main.stream_summary_to_slack(feeds, "m", "https://hooks.slack.test/x")
+
+    assert sent is False
+    assert summary == "1. A"
+    assert posted == ["Here is the latest summarized news:\n\n1. A"]
+
+
+def test_streaming_reuses_summary_store_digest(monkeypatch):
+    feeds = [main.Feed(id=1, title="A"), main.Feed(id=2, title="B")]
+    monkeypatch.setattr(main, "summary_store", object())
+    monkeypatch.setattr(main, "summarize_stories", lambda feeds, model_id: (feeds, "1. *A*\n2. *B*"))
+    monkeypatch.setattr(main, "stream_prompt", lambda *a: pytest.fail("should not stream"))
+    posted = []
+    monkeypatch.setattr(
+        main, "post_webhook_message", lambda text, url: posted.append(text) or True
+    )
+    assert main.stream_summary_to_slack(feeds, "m", "https://x") == ("1. *A*\n2. *B*", True)
+    assert posted[1] == "2. *B*"
+
+
+def test_post_slack_message_reports_api_errors(monkeypatch, caplog):
+    class Resp:
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return {"ok": False, "error": "channel_not_found"}
+
+    monkeypatch.setattr(main.requests, "post", lambda *a, **k: Resp())
+    with caplog.at_level(logging.ERROR):
+        assert main.post_slack_message("hi", "xoxb", "C1") is None
+    assert "channel_not_found" in caplog.text
@@ -38,8 +38,9 @@ def test_summarize_stories_builds_prompt_and_returns_mock(monkeypatch):
         Story(hash="h1", title="Title A", content_text="Content A", permalink="http://example.com/a")
     ]
 
-    result = main.summarize_stories([feed], model_id="test-model")
+    summarized, result = main.summarize_stories([feed], model_id="test-model")
 
+    assert summarized == [feed]
     assert result == "SUMMARY"
     messages = captured["messages"]
     # System prompt present
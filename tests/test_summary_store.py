@@ -0,0 +1,119 @@
+import json
+
+import main
+from models import Feed, Story
+from storage import SummaryStore
+
+
+class Msg:
+    def __init__(self, content):
+        self.content = content
+
+
+class Choice:
+    def __init__(self, content):
+        self.message = Msg(content)
+
+
+class Resp:
+    def __init__(self, content):
+        self.choices = [Choice(content)]
+
+
+class Completions:
+    def __init__(self):
+        self.calls = []
+
+    def create(self, model, messages, **kwargs):
+        self.calls.append(messages[-1]["content"])
+        ids = [line[4:] for line in messages[-1]["content"].splitlines() if line.startswith("ID: ")]
+        return Resp(json.dumps({i: f"summary {i} ({model})" for i in ids}))
+
+
+class OpenAIStub:
+    def __init__(self):
+        self.chat = type("Chat", (), {})()
+        self.chat.completions = Completions()
+
+
+def make_feeds():
+    a = Feed(id="1", title="Feed A")
+    a.stories = [
+        Story("h1", "One", "content one", "http://a/1"),
+        Story("h2", "Two", "content two", "http://a/2"),
+    ]
+    b = Feed(id="2", title="Feed B")
+    b.stories = [Story("h3", "Three", "content three", "http://b/3")]
+    return [a, b]
+
+
+def test_summary_store_keys_and_persistence(tmp_path):
+    key = SummaryStore.key("h1", "text", "m")
+    assert key != SummaryStore.key("h1", "text changed", "m")
+    assert key != SummaryStore.key("h1", "text", "other-model")
+
+    store = SummaryStore(str(tmp_path / "s.db"))
+    store.put_many({key: "cached"})
+    store.close()
+    assert SummaryStore(str(tmp_path / "s.db")).get_many([key, "missing"]) == {key: "cached"}
+    # Expired entries are pruned when the store is opened
+    assert SummaryStore(str(tmp_path / "s.db"), max_age=-1).get_many([key]) == {}
+
+
+def test_summarize_stories_only_sends_delta(tmp_path, monkeypatch):
+    stub = OpenAIStub()
+    monkeypatch.setattr(main, "openai", stub)
+    monkeypatch.setattr(main, "summary_store", SummaryStore(str(tmp_path / "s.db")))
+
+    _, first = main.summarize_stories(make_feeds(), "m")
+    assert len(stub.chat.completions.calls) == 1
+    assert first.splitlines() == [
+        "1. *Feed A*",
+        "  1. *One* - summary 1 (m) <http://a/1|[Read more]>",
+        "  2. *Two* - summary 2 (m) <http://a/2|[Read more]>",
+        "2. *Feed B*",
+        "  1. *Three* - summary 3 (m) <http://b/3|[Read more]>",
+    ]
+
+    # Everything cached: no model call at all
+    assert main.summarize_stories(make_feeds(), "m")[1] == first
+    assert len(stub.chat.completions.calls) == 1
+
+    # Only the changed story goes to the model
+    feeds = make_feeds()
+    feeds[1].stories[0].content_text = "updated content"
+    _, digest = main.summarize_stories(feeds, "m")
+    assert len(stub.chat.completions.calls) == 2
+    assert "Three" in stub.chat.completions.calls[-1]
+    assert "One" not in stub.chat.completions.calls[-1]
+    assert "*Three* - summary 1 (m)" in digest
+    assert "*One* - summary 1 (m)" in digest
+
+
+def test_summarize_story_batch_handles_missing_and_bad_json(monkeypatch):
+    class PartialCompletions:
+        def __init__(self, content):
+            self.content = content
+
+        def create(self, **kwargs):
+            return Resp(self.content)
+
+    stub = OpenAIStub()
+    stub.chat.completions = PartialCompletions('{"1": "only one"}')
+    monkeypatch.setattr(main, "openai", stub)
+    stories = make_feeds()[0].stories
+    assert main.summarize_story_batch(stories, "m") == ["only one", None]
+
+    stub.chat.completions = PartialCompletions("not json")
+    try:
+        main.summarize_story_batch(stories, "m")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("expected ValueError")
+
+
+def test_format_digest_without_summary():
+    feed = Feed(id="1", title="F")
+    feed.stories = [Story("h", "T", "c", "http://x")]
+    assert main.format_digest([feed], [None]) == "1. *F*\n  1. *T* <http://x|[Read more]>"
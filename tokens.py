@@ -0,0 +1,75 @@
+"""Token counting and fair budget splitting for prompts.
+
+Tokens are counted with tiktoken's local BPE tokenizer. tiktoken downloads
+the encoding file on first use and caches it under ``TIKTOKEN_CACHE_DIR``;
+the Docker image ships it pre-fetched. If tiktoken is missing or the file
+cannot be loaded, a warning is logged and tokens are estimated at
+``CHARS_PER_TOKEN`` characters per token, which is close for English text.
+"""
+import logging
+import threading
+
+TOKENIZER_ENCODING = "o200k_base"  # Encoding of the gpt-4o and o-series models
+CHARS_PER_TOKEN = 4
+
+_encoding = None
+_loaded = False
+_lock = threading.Lock()
+
+
+def get_encoding():
+    """Return the tiktoken encoding, or None to estimate from characters.
+
+    Loaded on first use so importing the digest stays fast.
+    """
+    global _encoding, _loaded
+    if not _loaded:
+        with _lock:
+            if not _loaded:
+                try:
+                    import tiktoken
+
+                    _encoding = tiktoken.get_encoding(TOKENIZER_ENCODING)
+                except Exception as e:
+                    # Not installed, or the encoding file could not be fetched
+                    logging.warning(f"Estimating tokens from characters: {e}")
+                    _encoding = None
+                _loaded = True
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    encoding = get_encoding()
+    if encoding is None:
+        return len(text) // CHARS_PER_TOKEN + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text: str, limit: int) -> str:
+    """Return the longest prefix of ``text`` counting at most ``limit`` tokens."""
+    encoding = get_encoding()
+    if encoding is None:
+        chars = max(0, limit - 1) * CHARS_PER_TOKEN
+        return text if len(text) <= chars else text[:chars]
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= limit:
+        return text
+    return encoding.decode(tokens[:max(0, limit)])
+
+
+def fair_shares(demands: list[int], budget: int) -> list[int]:
+    """Split ``budget`` between ``demands`` max-min fairly.
+
+    No demand gets more than it asks for, and whatever the smaller demands
+    leave over is shared equally by the larger ones, so only the largest
+    demands are cut, all to the same level.
+    """
+    if sum(demands) <= budget:
+        return list(demands)
+    shares = [0] * len(demands)
+    remaining = max(0, budget)
+    order = sorted(range(len(demands)), key=demands.__getitem__)
+    for position, i in enumerate(order):
+        shares[i] = min(demands[i], remaining // (len(order) - position))
+        remaining -= shares[i]
+    return shares